@@ -0,0 +1,339 @@
+"""Asyncio ceremony runner for load-testing the coordinator
+
+Every simulated device runs as its own coroutine over one shared aiohttp
+session, so a round takes as long as its slowest device rather than the
+sum of all of them, and many ceremonies can share one event loop.
+Device-side crypto still runs inline on the loop; what overlaps is the
+time spent waiting on the coordinator.
+"""
+import asyncio
+import time
+
+import aiohttp
+
+import wire
+from transport import DEFAULT_POOL_SIZE, DEFAULT_RETRIES, DEFAULT_BACKOFF, DEFAULT_TIMEOUT
+
+# Seconds each event long-poll is held open before the device re-checks on its own
+EVENT_POLL_TIMEOUT = 10
+
+# Responses a GET is retried on, matching transport.Transport
+RETRY_STATUSES = (502, 503, 504)
+
+class AsyncTransport:
+    """aiohttp counterpart of transport.Transport, used as an async context manager"""
+
+    def __init__(self, base_url, pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF, timeout=DEFAULT_TIMEOUT, binary=False):
+        self.base_url = base_url.rstrip('/')
+        self.binary = binary
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = None
+        self.watch_session = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={'Accept': f"{wire.MIMETYPE}, application/json;q=0.5"} if self.binary else None
+        )
+        # Long-polls hold their connection for the whole wait, so they get
+        # their own unbounded pool rather than starving submissions
+        self.watch_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=0),
+            timeout=aiohttp.ClientTimeout(total=EVENT_POLL_TIMEOUT + self.timeout)
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        await self.watch_session.close()
+
+    async def _request(self, method, path, **kwargs):
+        """Returns (status, parsed JSON or wire format body, or None)"""
+        if self.binary and kwargs.get('json') is not None:
+            kwargs['data'] = wire.encode(kwargs.pop('json'))
+            kwargs['headers'] = {'Content-Type': wire.MIMETYPE}
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.session.request(method, f"{self.base_url}{path}", **kwargs) as response:
+                    if method != 'GET' or response.status not in RETRY_STATUSES or attempt == self.retries:
+                        try:
+                            if response.content_type == wire.MIMETYPE:
+                                return response.status, wire.decode(await response.read())
+                            return response.status, await response.json(content_type=None)
+                        except ValueError:
+                            return response.status, None
+            except aiohttp.ClientConnectorError:
+                # Never reached the server, so any method is safe to retry
+                if attempt == self.retries:
+                    raise
+            except aiohttp.ClientError:
+                # The server may already have applied a POST
+                if method != 'GET' or attempt == self.retries:
+                    raise
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def get(self, path, params=None):
+        return await self._request('GET', path, params=params)
+
+    async def post(self, path, json=None):
+        return await self._request('POST', path, json=json)
+
+    async def wait_for_event(self, device_id, cursor, match):
+        """Long-poll a device's event feed for the first event satisfying match
+
+        Returns (event, cursor); event is None if nothing matched within
+        EVENT_POLL_TIMEOUT.
+        """
+        params = {"since": cursor, "timeout": EVENT_POLL_TIMEOUT}
+        async with self.watch_session.get(f"{self.base_url}/events/{device_id}/poll", params=params) as response:
+            result = await response.json()
+        for event in result['events']:
+            if match(event):
+                return event, event['id']
+        return None, result['cursor']
+
+    async def wait_for_result(self, session_id, timeout=30):
+        """Long-poll /signing/result until the session completes or fails, or timeout passes
+
+        Runs on watch_session in EVENT_POLL_TIMEOUT slices, so no single poll
+        comes near the client timeout. Returns (status, result).
+        """
+        deadline = time.time() + timeout
+        while True:
+            wait = max(0, min(EVENT_POLL_TIMEOUT, deadline - time.time()))
+            params = {"session_id": session_id, "timeout": wait}
+            async with self.watch_session.get(f"{self.base_url}/signing/result", params=params) as response:
+                status, result = response.status, await response.json(content_type=None)
+            if status != 200 or result['status'] in ('completed', 'failed') or time.time() >= deadline:
+                return status, result
+
+async def run_dkg_device(transport, device, session_id, target_eoa, total_signers):
+    """One device's DKG: deal shares, then fetch its own once the coordinator announces they are ready"""
+    dkg_data = device.generate_dkg_round1(target_eoa, total_signers)
+    status, _ = await transport.post("/dkg/submit", json={
+        "session_id": session_id,
+        "device_id": device.device_name,
+        "share_index": device.share_index,
+        "commitments": dkg_data["commitments"],
+        "shares": dkg_data["shares"]
+    })
+    if status != 200:
+        print(f"✗ {device.device_name} failed to submit DKG data")
+        return False
+    print(f"✓ {device.device_name} submitted DKG data")
+
+    cursor = 0
+    while True:
+        status, result = await transport.get("/dkg/shares", params=device.dkg_shares_query(session_id))
+        if status != 200:
+            print(f"✗ Failed to fetch DKG shares for {device.device_name}")
+            return False
+        complete, incoming = device.receive_dkg_shares(session_id, result)
+        if complete:
+            break
+        # The cursor makes this race-free: an announcement published since the fetch is still returned
+        event, cursor = await transport.wait_for_event(
+            device.device_name, cursor, lambda event: event['session_id'] == session_id
+        )
+        if event and event['type'] == 'session_failed':
+            print(f"✗ DKG {session_id} failed")
+            return False
+
+    if device.verify_shares(incoming):
+        print(f"✗ {device.device_name} rejected the DKG")
+        return False
+    device.complete_dkg(target_eoa, incoming)
+    return True
+
+async def refill_presignatures(transport, devices, dkg_session_id, count):
+    """Offline phase with every device's submission in flight at once"""
+    print(f"\n=== Offline Phase: Precomputing {count} Presignatures ===")
+    status, batch = await transport.post("/presign/start", json={
+        "dkg_session_id": dkg_session_id,
+        "count": count
+    })
+    if status != 200:
+        print("Failed to start presigning")
+        return False
+
+    participants = {name: devices[name] for name in batch['participants']}
+    contributions = {}
+    for device_name, device in participants.items():
+        entries = device.generate_presignatures(
+            batch['target_eoa'], batch['presignature_ids'], batch['coefficients'][device_name]
+        )
+        if entries is None:
+            return False
+        contributions[device_name] = entries
+    # MtA is local to this process, so every pair runs before the submissions go out
+    for presignature_id in batch['presignature_ids']:
+        for device_name, device in participants.items():
+            for other_name, other_device in participants.items():
+                if other_name != device_name:
+                    device.presign_mta(presignature_id, other_device)
+    for device_name, device in participants.items():
+        deltas = device.store_presignatures(batch['presignature_ids'])
+        for entry, delta in zip(contributions[device_name], deltas):
+            entry['delta_i'] = delta
+
+    async def submit(device_name, device):
+        status, _ = await transport.post("/presign/submit", json={
+            "session_id": batch['session_id'],
+            "device_id": device_name,
+            "presignatures": contributions[device_name]
+        })
+        print(f"✓ {device_name} submitted {len(contributions[device_name])} presignatures")
+        return status == 200
+
+    return all(await asyncio.gather(*(
+        submit(device_name, device) for device_name, device in participants.items()
+    )))
+
+async def run_online_signing(transport, devices, session_id, message_hash, presignature):
+    async def submit(device_name):
+        share = devices[device_name].sign_with_presignature(message_hash, presignature)
+        if not share:
+            print(f"✗ {device_name} failed to compute signature share")
+            return False
+        status, _ = await transport.post("/signing/share", json={
+            "session_id": session_id,
+            "device_id": device_name,
+            "share": share
+        })
+        print(f"✓ {device_name} submitted signature share")
+        return status == 200
+
+    print(f"\n=== Phase 3: Online Signing ({presignature['presignature_id']}) ===")
+    return all(await asyncio.gather(*(submit(name) for name in presignature['participants'])))
+
+async def run_interactive_signing(transport, devices, session_id, message_hash, target_eoa):
+    async def commit(device_name, device):
+        commitment = device.start_signing(session_id, [target_eoa])
+        if not commitment:
+            print(f"✗ {device_name} failed to generate commitment")
+            return None
+        status, response = await transport.post("/signing/commit", json={
+            "session_id": session_id,
+            "device_id": device_name,
+            "commitment": commitment[0]
+        })
+        print(f"✓ {device_name} submitted commitment")
+        return response if status == 200 else None
+
+    async def submit_delta(device_name, device):
+        status, response = await transport.post("/signing/mta", json={
+            "session_id": session_id,
+            "device_id": device_name,
+            "delta": device.mta_output(session_id)[0]
+        })
+        print(f"✓ {device_name} submitted its MtA output")
+        return response if status == 200 else None
+
+    async def share(device_name, device, r):
+        status, _ = await transport.post("/signing/share", json={
+            "session_id": session_id,
+            "device_id": device_name,
+            "share": device.signature_shares(session_id, [message_hash], [r])[0]
+        })
+        print(f"✓ {device_name} submitted signature share")
+        return status == 200
+
+    # Every device commits; the first threshold to arrive form the quorum
+    responses = await asyncio.gather(*(commit(name, device) for name, device in devices.items()))
+    if not all(responses):
+        return False
+    opened = next((response for response in responses if 'quorum' in response), None)
+    if not opened:
+        print(f"✗ No quorum formed for {session_id}")
+        return False
+    quorum = {name: devices[name] for name in opened['quorum']}
+    for name, device in devices.items():
+        if name not in quorum:
+            device.signing.pop(session_id, None)
+
+    print("\n=== Phase 3: MtA Protocol ===")
+    for name, device in quorum.items():
+        device.begin_mta(session_id, opened['coefficients'][name])
+    for name, device in quorum.items():
+        for other_name, other_device in quorum.items():
+            if other_name != name:
+                device.run_mta(session_id, other_device)
+    responses = await asyncio.gather(*(submit_delta(name, device) for name, device in quorum.items()))
+    if not all(responses):
+        return False
+    r = next((response['r'] for response in responses if 'r' in response), None)
+    if r is None:
+        print(f"✗ Share round did not open for {session_id}")
+        return False
+    return all(await asyncio.gather(*(share(name, device, r) for name, device in quorum.items())))
+
+async def run_signing_ceremony(transport, devices, presign_batch=0):
+    """Async counterpart of client.run_signing_ceremony; returns message_hash and duration"""
+    start_time = time.time()
+
+    status, dkg_data = await transport.post("/dkg/start", json={
+        "total_signers": len(devices),
+        "participants": list(devices)
+    })
+    if status != 200:
+        print("Failed to start DKG")
+        return None
+    dkg_session_id = dkg_data['session_id']
+
+    print(f"\n=== Phase 1: Distributed Key Generation ({dkg_session_id}) ===")
+    if not all(await asyncio.gather(*(
+        run_dkg_device(transport, device, dkg_session_id, dkg_data['target_eoa'], len(devices))
+        for device in devices.values()
+    ))):
+        return None
+
+    if presign_batch and not await refill_presignatures(transport, devices, dkg_session_id, presign_batch):
+        return None
+
+    print(f"\n=== Phase 2: Signature Generation ({dkg_session_id}) ===")
+    status, signing_data = await transport.post("/signing/start", json={
+        "dkg_session_id": dkg_session_id
+    })
+    if status != 200:
+        print("Failed to get signing request")
+        return None
+
+    session_id = signing_data['session_id']
+    message_hash = signing_data['message_hash']
+    presignature = signing_data.get('presignature')
+    if presignature:
+        completed = await run_online_signing(transport, devices, session_id, message_hash, presignature)
+    else:
+        completed = await run_interactive_signing(
+            transport, devices, session_id, message_hash, signing_data['target_eoa']
+        )
+    if not completed:
+        return None
+    status, result = await transport.wait_for_result(session_id)
+    if status != 200 or result['status'] != 'completed':
+        print(f"✗ Signing session {session_id} did not complete")
+        return None
+
+    if presign_batch and signing_data.get('presignature_refill'):
+        await refill_presignatures(transport, devices, dkg_session_id, signing_data['presignature_refill'])
+
+    return {
+        'message_hash': message_hash,
+        'duration': time.time() - start_time
+    }
+
+def run_ceremonies(base_url, device_sets, presign_batch=0, pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES,
+                   binary=False):
+    """Run one ceremony per device set concurrently; returns their results in order"""
+    async def run_all():
+        async with AsyncTransport(base_url, pool_size=pool_size, retries=retries, binary=binary) as transport:
+            return await asyncio.gather(*(
+                run_signing_ceremony(transport, devices, presign_batch) for devices in device_sets
+            ))
+
+    return asyncio.run(run_all())
@@ -10,18 +10,26 @@ import uuid
 import argparse
 from datetime import datetime
 import time
+import async_runner
+from keystore import Keystore
+from transport import Transport, DEFAULT_POOL_SIZE, DEFAULT_RETRIES
+from device_crypto import (
+    CryptoPool, deal_key_batch, deal_shares, nonce_points, verify_feldman_share, verify_feldman_shares
+)
+from secp256k1 import base_mult, point_from_json, point_to_json
+import batch_auth
+import derivation
 
 # Constants
 CURVE = ec.SECP256K1()
 CURVE_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
-# Generator point for secp256k1
-G = ec.generate_private_key(CURVE).public_key().public_numbers()
-GENERATOR = ec.EllipticCurvePublicNumbers(G.x, G.y, CURVE).public_key()
 
 SERVER_URL = "http://localhost:5010"
+ENROLLMENT_KEY = "supersecretpassword"  # must match the server's config.json
 THRESHOLD = 3
 TOTAL_SIGNERS = 5
 CONFIG_FILE = "config.json"
+KEYSTORE_FILE = "keystore.log"
 ENCLAVE_STATE_FILE = "enclave_sim.json"
 TEST_DEVICES_FILE = "test_devices.json"
 
@@ -54,12 +62,7 @@ class GG20Device:
         # Generate commitment to polynomial coefficients
         for coeff in coeffs:
             # Generate point commitment
-            key = ec.derive_private_key(coeff, CURVE)
-            point = key.public_key().public_numbers()
-            commitments.append({
-                'x': point.x,
-                'y': point.y
-            })
+            commitments.append(point_to_json(base_mult(coeff)))
         
         # Generate shares for each participant
         for j in range(1, TOTAL_SIGNERS + 1):
@@ -82,32 +85,26 @@ class GG20Device:
         """Verify a share using Feldman's VSS"""
         print(f"  Verifying share from {from_id}...")
         
-        # Convert commitments back to points
-        commitment_points = []
-        for comm in commitments:
-            point = ec.EllipticCurvePublicNumbers(
-                comm['x'], comm['y'], CURVE
-            ).public_key()
-            commitment_points.append(point)
-        
-        # Verify the share against commitments
+        # Verify share * G == sum(C_i * j^i) against the dealer's commitments
         my_index = int(self.device_id.split('_')[1])
-        lhs = ec.derive_private_key(share, CURVE).public_key()
-        
-        rhs = commitment_points[0]
-        for i in range(1, len(commitment_points)):
-            # Use scalar multiplication properly
-            scalar = pow(my_index, i, CURVE_ORDER)
-            temp_key = ec.derive_private_key(scalar, CURVE)
-            rhs = rhs.public_numbers().x + temp_key.public_key().public_numbers().x
-        
-        if lhs.public_numbers().x == rhs:
+        if verify_feldman_share(my_index, share, commitments):
             print("  ✓ Share verified successfully")
             return True
         else:
             print("  ✗ Share verification failed!")
             return False
     
+    def verify_shares(self, incoming):
+        """Verify shares from every dealer at once, {dealer_id: (share, commitments)}"""
+        print(f"  Verifying {len(incoming)} shares...")
+        my_index = int(self.device_id.split('_')[1])
+        invalid = verify_feldman_shares(my_index, incoming)
+        if invalid:
+            print(f"  ✗ Share verification failed for {', '.join(invalid)}")
+        else:
+            print("  ✓ All shares verified successfully")
+        return invalid
+    
     def start_signing(self, message_hash):
         """Round 1 of GG20 signing: Generate k_i and gamma_i"""
         print(f"\n=== Signing Round 1 for {self.device_id} ===")
@@ -118,19 +115,13 @@ class GG20Device:
         self.w_i = secrets.randbelow(CURVE_ORDER)
         
         # Compute R_i = g^k_i and commitment
-        self.R_i = ec.derive_private_key(self.k_i, CURVE).public_key()
-        self.Gamma_i = ec.derive_private_key(self.gamma_i, CURVE).public_key()
+        self.R_i = base_mult(self.k_i)
+        self.Gamma_i = base_mult(self.gamma_i)
         
         # Create commitment to both values
         commitment = {
-            'R_i': {
-                'x': self.R_i.public_numbers().x,
-                'y': self.R_i.public_numbers().y
-            },
-            'Gamma_i': {
-                'x': self.Gamma_i.public_numbers().x,
-                'y': self.Gamma_i.public_numbers().y
-            }
+            'R_i': point_to_json(self.R_i),
+            'Gamma_i': point_to_json(self.Gamma_i)
         }
         
         print("  ✓ Generated random values")
@@ -159,109 +150,219 @@ class GG20Device:
         m = int(message_hash, 16)
         
         # Compute sigma_i = k_i * m + r * secret_share_i
-        r = R.public_numbers().x % CURVE_ORDER
+        r = R[0] % CURVE_ORDER
         sigma_i = (self.k_i * m + r * self.secret_share) % CURVE_ORDER
         
         print("  ✓ Computed signature share")
         return sigma_i
 
-def load_or_create_config():
-    """Load existing config or create new one"""
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, 'r') as f:
-            config = json.load(f)
-            print(f"✓ Loaded existing config with {len(config['devices'])} devices")
-            return config
-    else:
-        config = {
-            "created_at": datetime.now().isoformat(),
-            "last_updated": datetime.now().isoformat(),
-            "devices": {},  # {device_name: {device_config, key_material}}
-            "ceremonies": {}  # {ceremony_id: {participants, status, created_at}}
-        }
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(config, f, indent=2)
-            print("✓ Created new config")
-        return config
+_keystore = None
+
+def load_or_create_keystore():
+    """Open the shared device keystore, migrating an old whole-file config.json on first use"""
+    global _keystore
+    if _keystore is None:
+        is_new = not os.path.exists(KEYSTORE_FILE)
+        _keystore = Keystore(KEYSTORE_FILE)
+        if is_new and os.path.exists(CONFIG_FILE):
+            with open(CONFIG_FILE, 'r') as f:
+                _keystore.import_config(json.load(f))
+            print(f"✓ Migrated {CONFIG_FILE} into {KEYSTORE_FILE}")
+        print(f"✓ Loaded keystore with {len(_keystore.device_names())} devices")
+    return _keystore
+
+_transport = None
+
+def configure_transport(pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES, binary=False):
+    """Replace the shared coordinator transport, e.g. with CLI-supplied pool settings"""
+    global _transport
+    if _transport is not None:
+        _transport.close()
+    _transport = Transport(SERVER_URL, pool_size=pool_size, retries=retries, binary=binary)
+    return _transport
+
+def get_transport():
+    """Keep-alive connection pool shared by every device and ceremony in this process"""
+    return _transport or configure_transport()
+
+_crypto_pool = None
+
+def configure_crypto_pool(workers=0):
+    """Run the harness's device-side crypto on `workers` processes (inline when <= 1)"""
+    global _crypto_pool
+    if _crypto_pool is not None:
+        _crypto_pool.shutdown()
+    _crypto_pool = CryptoPool(workers)
+    return _crypto_pool
+
+def get_crypto_pool():
+    return _crypto_pool or configure_crypto_pool()
+
+_sign_requests = False
+
+def configure_request_signing(enabled):
+    """Have the harness batch-sign its /signing/* and /presign/submit requests"""
+    global _sign_requests
+    _sign_requests = enabled
+
+def request_auth(device, messages):
+    """Batch auth for a harness request, or None when request signing is off"""
+    if not _sign_requests:
+        return None
+    auth, _ = device.sign_batch(messages)
+    return auth
 
 class EnclaveClient:
-    def __init__(self, device_name=None, config=None):
+    def __init__(self, device_name=None, keystore=None, transport=None):
         self.device_name = device_name
-        self.config = config or load_or_create_config()
+        self.keystore = keystore or load_or_create_keystore()
+        self.transport = transport or get_transport()
+        self.presignatures = {}  # {presignature_id: signing state of one message} until its MtA is done
+        self.signing = {}  # {session_id: {"x", "k", "gamma", "w", "delta", "sigma"}, one entry per message}
+        self.dkg_inbox = {}  # {session_id: {"version", "incoming": {dealer_id: (share, commitments)}}}
+        self._enclave_key = None  # parsed from the keystore on first use
         self.setup_device()
     
+    @staticmethod
+    def generate_enclave_key():
+        """A fresh enclave key pair as (private PEM, public PEM)"""
+        private_key = ec.generate_private_key(CURVE)
+        private_bytes = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        public_bytes = private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        return private_bytes.decode(), public_bytes.decode()
+    
     def setup_device(self):
         """Setup or load device configuration"""
         if self.device_name:
-            if self.device_name not in self.config['devices']:
+            if not self.keystore.device(self.device_name):
                 # Generate new device identity
-                private_key = ec.generate_private_key(CURVE)
-                public_key = private_key.public_key()
-                
-                # Serialize keys
-                private_bytes = private_key.private_bytes(
-                    encoding=serialization.Encoding.PEM,
-                    format=serialization.PrivateFormat.PKCS8,
-                    encryption_algorithm=serialization.NoEncryption()
-                )
-                public_bytes = public_key.public_bytes(
-                    encoding=serialization.Encoding.PEM,
-                    format=serialization.PublicFormat.SubjectPublicKeyInfo
-                )
+                private_bytes, public_bytes = self.generate_enclave_key()
                 
-                # Create device entry
-                self.config['devices'][self.device_name] = {
-                    "device_config": {
-                        "created_at": datetime.now().isoformat(),
-                        "enclave_private_key": private_bytes.decode(),
-                        "enclave_public_key": public_bytes.decode()
-                    },
-                    "key_material": {}  # {eth_address: {partial_key_data}}
-                }
-                self.save_config()
+                # Create device entry; key material is stored per EOA alongside it
+                self.keystore.put_device(self.device_name, {
+                    "created_at": datetime.now().isoformat(),
+                    "enclave_private_key": private_bytes,
+                    "enclave_public_key": public_bytes
+                })
                 print(f"✓ Created new device: {self.device_name}")
             else:
                 print(f"✓ Loaded existing device: {self.device_name}")
     
-    def save_config(self):
-        """Save current configuration"""
-        self.config["last_updated"] = datetime.now().isoformat()
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(self.config, f, indent=2)
-    
     def store_key_material(self, eth_address, key_material):
         """Store key material for an EOA"""
         if self.device_name:
-            self.config['devices'][self.device_name]['key_material'][eth_address] = {
+            self.keystore.put_key_material(self.device_name, eth_address, {
                 "created_at": datetime.now().isoformat(),
                 "data": key_material
-            }
-            self.save_config()
+            })
             print(f"✓ Stored key material for {eth_address}")
     
     def get_key_material(self, eth_address):
         """Retrieve key material for an EOA"""
         if self.device_name:
-            device_data = self.config['devices'][self.device_name]
-            return device_data['key_material'].get(eth_address, {}).get('data')
+            return (self.keystore.key_material(self.device_name, eth_address) or {}).get('data')
         return None
 
+    def enroll(self):
+        """Register this device's enclave public key with the server"""
+        response = self.transport.post("/enroll", json={
+            "device_id": self.device_name,
+            "public_key": self.keystore.device(self.device_name)['enclave_public_key'],
+            "enrollment_key": ENROLLMENT_KEY
+        })
+        return response.status_code == 200
+
+    def rotate_enclave_key(self):
+        """Replace the enclave key, the server accepting the new one on a signature by the old"""
+        private_bytes, public_bytes = self.generate_enclave_key()
+        payload = batch_auth.rotation_signing_payload(self.device_name, public_bytes)
+        signature = self.enclave_key().sign(payload, ec.ECDSA(hashes.SHA256()))
+        response = self.transport.post("/enroll", json={
+            "device_id": self.device_name,
+            "public_key": public_bytes,
+            "signature": base64.b64encode(signature).decode()
+        })
+        if response.status_code != 200:
+            print(f"✗ Key rotation rejected: {response.json().get('error')}")
+            return False
+        self.keystore.put_device(self.device_name, {
+            **self.keystore.device(self.device_name),
+            "enclave_private_key": private_bytes,
+            "enclave_public_key": public_bytes,
+            "rotated_at": datetime.now().isoformat()
+        })
+        self._enclave_key = None
+        return True
+
     def checkin_with_server(self):
         """Register device with server and get pending signing requests"""
         print(f"\n=== Device Check-in: {self.device_name} ===")
         
-        response = requests.post(f"{SERVER_URL}/enroll", json={
-            "device_id": self.device_name,
-            "public_key": self.config['devices'][self.device_name]['device_config']['enclave_public_key']
-        })
-        
-        if response.status_code == 200:
+        if self.enroll():
             print("✓ Successfully checked in with server")
-            # Handle any pending signing requests
-            return response.json().get("pending_requests", [])
         else:
             print("✗ Failed to check in with server")
-            return []
+        # Signing requests are pushed to the device's event feed rather than returned here
+        return self.pending_signing_requests()
+    
+    def enclave_key(self):
+        if self._enclave_key is None:
+            self._enclave_key = serialization.load_pem_private_key(
+                self.keystore.device(self.device_name)['enclave_private_key'].encode(), password=None
+            )
+        return self._enclave_key
+
+    def sign_batch(self, messages):
+        """Sign the Merkle root over a round's messages with the enclave key
+
+        Returns (auth, proofs): auth authenticates a request carrying all
+        the messages; one carrying only messages[i] sends
+        {**auth, "proofs": [proofs[i]]}.
+        """
+        root, proofs = batch_auth.merkle_proofs(messages)
+        signature = self.enclave_key().sign(batch_auth.root_signing_payload(root), ec.ECDSA(hashes.SHA256()))
+        return {'root': root.hex(), 'signature': base64.b64encode(signature).decode()}, proofs
+    
+    def poll_events(self, since=0, timeout=0):
+        """Events from this device's feed after `since`, waiting up to `timeout` seconds
+
+        Returns (events, cursor), where cursor is the `since` for the next call.
+        """
+        response = self.transport.get(f"/events/{self.device_name}/poll", params={
+            "since": since,
+            "timeout": timeout
+        }, timeout=timeout + self.transport.timeout)
+        if response.status_code != 200:
+            print(f"✗ Failed to fetch events for {self.device_name}")
+            return [], since
+        result = response.json()
+        return result['events'], result['cursor']
+    
+    def pending_signing_requests(self):
+        """Signing sessions in the event backlog that have neither completed nor failed"""
+        events, _ = self.poll_events()
+        pending = {}
+        for event in events:
+            if event['type'] == 'signing_request' or (event['type'] == 'round_open' and event['kind'] == 'signing'):
+                # Batch sessions name their vectors as eth_addresses and message_hashes instead
+                pending[event['session_id']] = {
+                    'session_id': event['session_id'],
+                    'eth_address': event.get('eth_address'),
+                    'message_hash': event.get('message_hash'),
+                    'eth_addresses': event.get('eth_addresses'),
+                    'message_hashes': event.get('message_hashes'),
+                    'round': event['round']
+                }
+            elif event['type'] in ('signature_complete', 'session_failed'):
+                pending.pop(event['session_id'], None)
+        return list(pending.values())
     
     def participate_in_signing(self, eth_address, message_hash):
         """Participate in GG20 signing for a specific EOA"""
@@ -276,23 +377,20 @@ class EnclaveClient:
         
         return "partial_signature"  # Replace with actual partial signature
 
-    def generate_dkg_round1(self):
-        """Round 1 of DKG: Generate shares and commitments"""
+    def generate_dkg_round1(self, target_eoa, total_signers=TOTAL_SIGNERS):
+        """Round 1 of DKG: Generate shares and commitments for the session's target EOA"""
+        coeffs = self.dkg_coefficients(target_eoa)
+        return self.dkg_round1_message(target_eoa, *deal_shares(coeffs, range(1, total_signers + 1)))
+
+    def dkg_coefficients(self, target_eoa):
+        """Load or create this device's secret polynomial for an EOA"""
         print(f"\n=== DKG Round 1 for {self.device_name} ===")
-        
-        # Get target EOA from server
-        response = requests.post(f"{SERVER_URL}/dkg/start")
-        if response.status_code != 200:
-            print("Failed to start DKG")
-            return None
-        
-        target_eoa = response.json()['target_eoa']
         print(f"  • Target EOA address: {target_eoa}")
         
         # Check if we already have key material for this EOA
-        if target_eoa in self.config['devices'][self.device_name]['key_material']:
+        key_material = self.keystore.key_material(self.device_name, target_eoa)
+        if key_material:
             print(f"  • Using existing key material for {target_eoa}")
-            key_material = self.config['devices'][self.device_name]['key_material'][target_eoa]
             coeffs = [int(c) for c in key_material['polynomial_coeffs']]
         else:
             # Generate new key material
@@ -300,37 +398,19 @@ class EnclaveClient:
             coeffs = [secrets.randbelow(CURVE_ORDER) for _ in range(THRESHOLD)]
             key_material = {
                 'polynomial_coeffs': [str(c) for c in coeffs],
-                'share_index': int(self.device_name.split('_')[1]),
+                'share_index': self.share_index,
                 'group_public_key': None,  # Will be set later
                 'partial_private_key': str(coeffs[0]),  # First coefficient is the share
                 'created_at': datetime.now().isoformat()
             }
-            self.config['devices'][self.device_name]['key_material'][target_eoa] = key_material
-            self.save_config()
+            self.keystore.put_key_material(self.device_name, target_eoa, key_material)
             print(f"  ✓ Stored new key material")
-        
-        # Generate shares and commitments using coeffs
-        shares = {}
-        commitments = []
-        
-        # Generate commitment to polynomial coefficients
-        for coeff in coeffs:
-            # Generate point commitment
-            key = ec.derive_private_key(coeff, CURVE)
-            point = key.public_key().public_numbers()
-            commitments.append({
-                'x': point.x,
-                'y': point.y
-            })
-        
-        # Generate shares for each participant
-        for j in range(1, TOTAL_SIGNERS + 1):
-            # Evaluate polynomial at point j
-            share = coeffs[0]  # First coefficient is the secret
-            for i in range(1, THRESHOLD):
-                share = (share + coeffs[i] * pow(j, i, CURVE_ORDER)) % CURVE_ORDER
-            
-            shares[f"device_{j}"] = share
+        return coeffs
+
+    def dkg_round1_message(self, target_eoa, commitments, shares):
+        """DKG submission from the output of device_crypto.deal_shares"""
+        commitments = [point_to_json(point) for point in commitments]
+        shares = {self.peer_name(j): share for j, share in enumerate(shares, start=1)}
         
         print(f"  ✓ Generated {len(shares)} shares")
         print(f"  ✓ Generated {len(commitments)} commitments")
@@ -341,58 +421,317 @@ class EnclaveClient:
             'target_eoa': target_eoa
         }
 
-    def start_signing(self, message_hash, target_eoa):
-        """Round 1 of GG20 signing: Generate k_i and gamma_i"""
+    def fetch_dkg_shares(self, session_id):
+        """Pull the shares dealt to this device since its last fetch
+
+        Returns (complete, incoming) where incoming accumulates
+        {dealer_id: (share, commitments)} across calls.
+        """
+        response = self.transport.get("/dkg/shares", params=self.dkg_shares_query(session_id))
+        if response.status_code != 200:
+            print(f"✗ Failed to fetch DKG shares for {self.device_name}")
+            return False, self.dkg_inbox[session_id]['incoming']
+        return self.receive_dkg_shares(session_id, response.json())
+
+    def dkg_shares_query(self, session_id):
+        """Query parameters for /dkg/shares, resuming after the last version seen"""
+        inbox = self.dkg_inbox.setdefault(session_id, {'version': 0, 'incoming': {}})
+        return {
+            "session_id": session_id,
+            "device_id": self.device_name,
+            "since": inbox['version']
+        }
+
+    def receive_dkg_shares(self, session_id, result):
+        """Merge a /dkg/shares response into the inbox; returns (complete, incoming)"""
+        inbox = self.dkg_inbox.setdefault(session_id, {'version': 0, 'incoming': {}})
+        for dealer_id, share in result['shares'].items():
+            inbox['incoming'][dealer_id] = (share, result['commitments'][dealer_id])
+        inbox['version'] = result['version']
+        return result['status'] == 'complete', inbox['incoming']
+
+    @property
+    def share_index(self):
+        """device_3 -> 3; a prefixed name like ceremony_ab12_device_3 keeps its own device set"""
+        return int(self.device_name.rsplit('_', 1)[1])
+
+    def peer_name(self, share_index):
+        """Name of the device holding share_index in this device's set"""
+        return f"{self.device_name.rsplit('_', 1)[0]}_{share_index}"
+
+    def verify_shares(self, incoming, invalid=None):
+        """Verify the DKG shares dealt to this device, {dealer_id: (share, commitments)}
+
+        invalid may carry the result of verify_feldman_shares computed elsewhere.
+        """
+        print(f"\n=== Verifying DKG shares for {self.device_name} ===")
+        if invalid is None:
+            invalid = verify_feldman_shares(self.share_index, incoming)
+        if invalid:
+            print(f"  ✗ Invalid shares from {', '.join(invalid)}")
+        else:
+            print(f"  ✓ Verified {len(incoming)} shares")
+        return invalid
+
+    def complete_dkg(self, target_eoa, incoming):
+        """Store this device's share of the group key, with the group key and chain code, once its shares verify
+
+        target_eoa only names the DKG; the share is also stored under the
+        group key's own address, which signing requests name. Returns that
+        address.
+        """
+        commitments = {dealer_id: dealer_commitments for dealer_id, (_, dealer_commitments) in incoming.items()}
+        public_key = derivation.group_public_key(commitments)
+        key_material = {
+            **self.keystore.key_material(self.device_name, target_eoa),
+            'secret_share': str(sum(int(share) for share, _ in incoming.values()) % CURVE_ORDER),
+            'group_public_key': point_to_json(public_key),
+            'chain_code': derivation.chain_code(commitments).hex()
+        }
+        eth_address = derivation.eth_address(public_key)
+        self.keystore.put_key_materials(self.device_name, {
+            target_eoa: key_material,
+            eth_address: {
+                'share_index': key_material['share_index'],
+                'secret_share': key_material['secret_share'],
+                'group_public_key': key_material['group_public_key'],
+                'chain_code': key_material['chain_code'],
+                'dkg_label': target_eoa,
+                'created_at': datetime.now().isoformat()
+            }
+        })
+        return eth_address
+
+    def batch_dkg_coefficients(self, key_count):
+        """Fresh secret polynomials for each key of a batch DKG; nothing is kept once they are dealt"""
+        return [[secrets.randbelow(CURVE_ORDER) for _ in range(THRESHOLD)] for _ in range(key_count)]
+
+    def batch_dkg_message(self, dealt):
+        """Batch DKG submission from device_crypto.deal_key_batch: one vector per key in a single message"""
+        return {
+            'commitments': [[point_to_json(point) for point in commitments] for commitments, _ in dealt],
+            'shares': {
+                self.peer_name(j): [shares[j - 1] for _, shares in dealt]
+                for j in range(1, len(dealt[0][1]) + 1)
+            }
+        }
+
+    @staticmethod
+    def flatten_batch_shares(incoming):
+        """{dealer_id: (share vector, commitment vectors)} -> {"dealer_id/key_index": (share, commitments)}
+
+        Every key's shares are checked with the same share index, so one
+        verify_feldman_shares call covers the whole batch.
+        """
+        return {
+            f"{dealer_id}/{key_index}": (share, commitments[key_index])
+            for dealer_id, (share_vector, commitments) in incoming.items()
+            for key_index, share in enumerate(share_vector)
+        }
+
+    def complete_batch_dkg(self, session_id, incoming):
+        """Store this device's share of every key of a verified batch DKG; returns their addresses in order"""
+        key_count = len(next(iter(incoming.values()))[0])
+        key_materials = {}
+        for key_index in range(key_count):
+            commitments = {
+                dealer_id: dealer_commitments[key_index]
+                for dealer_id, (_, dealer_commitments) in incoming.items()
+            }
+            public_key = derivation.group_public_key(commitments)
+            key_materials[derivation.eth_address(public_key)] = {
+                'share_index': self.share_index,
+                'secret_share': str(sum(int(shares[key_index]) for shares, _ in incoming.values()) % CURVE_ORDER),
+                'group_public_key': point_to_json(public_key),
+                'chain_code': derivation.chain_code(commitments).hex(),
+                'dkg_session_id': session_id,
+                'key_index': key_index,
+                'created_at': datetime.now().isoformat()
+            }
+        self.keystore.put_key_materials(self.device_name, key_materials)
+        return list(key_materials)
+
+    def derive_child_key(self, target_eoa, path):
+        """Derive this device's share of a child EOA locally; returns the child's address"""
+        parent = self.keystore.key_material(self.device_name, target_eoa)
+        if not parent or not parent.get('secret_share'):
+            print(f"✗ No completed DKG for {target_eoa}")
+            return None
+        public_key, chain, tweak = derivation.derive(
+            point_from_json(parent['group_public_key']), bytes.fromhex(parent['chain_code']), path
+        )
+        eth_address = derivation.eth_address(public_key)
+        self.keystore.put_key_material(self.device_name, eth_address, {
+            'share_index': parent['share_index'],
+            'secret_share': str(derivation.derive_share(int(parent['secret_share']), tweak)),
+            'group_public_key': point_to_json(public_key),
+            'chain_code': chain.hex(),
+            'parent_eoa': target_eoa,
+            'path': path,
+            'created_at': datetime.now().isoformat()
+        })
+        return eth_address
+
+    def key_shares(self, eth_addresses):
+        """This device's secret share of each EOA's key, or None if any is missing"""
+        shares = []
+        for eth_address in eth_addresses:
+            key_material = self.keystore.key_material(self.device_name, eth_address)
+            if not key_material or not key_material.get('secret_share'):
+                print(f"✗ No key material found for {eth_address}")
+                return None
+            shares.append(int(key_material['secret_share']))
+        return shares
+
+    def start_signing(self, session_id, eth_addresses):
+        """Commit round: draw k_i and gamma_i per message and commit to Gamma_i = gamma_i * G
+
+        k_i and gamma_i never leave the device; the signing state is kept
+        per session until the share round.
+        """
         print(f"\n=== Signing Round 1 for {self.device_name} ===")
-        print(f"  • Signing for EOA: {target_eoa}")
-        print(f"  • Message hash: {message_hash}")
-        
-        # Get stored key material for this EOA
-        key_material = self.config['devices'][self.device_name]['key_material'].get(target_eoa)
-        if not key_material:
-            print(f"✗ No key material found for {target_eoa}")
+        shares = self.key_shares(eth_addresses)
+        if shares is None:
             return None
-        
-        # Generate random k_i and gamma_i for this signing session
-        self.k_i = secrets.randbelow(CURVE_ORDER)
-        self.gamma_i = secrets.randbelow(CURVE_ORDER)
-        
-        # Create commitment to send to server
-        self.R_i = ec.derive_private_key(self.k_i, CURVE).public_key()
-        
-        commitment = {
-            'k_i': hex(self.k_i),
-            'gamma_i': hex(self.gamma_i),
-            'R_i': {
-                'x': self.R_i.public_numbers().x,
-                'y': self.R_i.public_numbers().y
-            }
+        state = {
+            'x': shares,
+            'k': [secrets.randbelow(CURVE_ORDER) for _ in shares],
+            'gamma': [secrets.randbelow(CURVE_ORDER) for _ in shares]
         }
+        self.signing[session_id] = state
+        print(f"  ✓ Generated {len(shares)} nonce commitments")
+        return [{'Gamma_i': point_to_json(Gamma_i)} for Gamma_i in nonce_points(state['gamma'])]
+
+    @staticmethod
+    def prepare_mta(state, coefficient):
+        """Weight the key shares by this signer's Lagrange coefficient and seed delta_i and sigma_i with the local terms"""
+        lagrange = int(coefficient, 16)
+        state['w'] = [lagrange * x % CURVE_ORDER for x in state['x']]
+        state['delta'] = [k * gamma % CURVE_ORDER for k, gamma in zip(state['k'], state['gamma'])]
+        state['sigma'] = [k * w % CURVE_ORDER for k, w in zip(state['k'], state['w'])]
+
+    @staticmethod
+    def mta(mine, theirs):
+        """Simulated MtA from one signer to another: k_i * gamma_j and k_i * w_j, each split into alpha + beta
+
+        Stands in for the Paillier-based two-party protocol, which this demo
+        does not implement: both halves are added straight to the two
+        devices' state, so delta = sum(delta_i) = k * gamma and
+        sigma = sum(sigma_i) = k * x.
+        """
+        for index, k_i in enumerate(mine['k']):
+            alpha = secrets.randbelow(CURVE_ORDER)
+            mine['delta'][index] = (mine['delta'][index] + alpha) % CURVE_ORDER
+            theirs['delta'][index] = (theirs['delta'][index] + k_i * theirs['gamma'][index] - alpha) % CURVE_ORDER
+            mu = secrets.randbelow(CURVE_ORDER)
+            mine['sigma'][index] = (mine['sigma'][index] + mu) % CURVE_ORDER
+            theirs['sigma'][index] = (theirs['sigma'][index] + k_i * theirs['w'][index] - mu) % CURVE_ORDER
+
+    def begin_mta(self, session_id, coefficient):
+        self.prepare_mta(self.signing[session_id], coefficient)
+
+    def run_mta(self, session_id, other_device):
+        """MtA with another quorum device for every message of a session"""
+        self.mta(self.signing[session_id], other_device.signing[session_id])
+
+    def mta_output(self, session_id):
+        """delta_i for each message, the device's share of k * gamma"""
+        return [hex(delta) for delta in self.signing[session_id]['delta']]
+
+    def signature_shares(self, session_id, message_hashes, r_values):
+        """Share round: s_i = m * k_i + r * sigma_i per message; the session's nonces are then discarded"""
+        state = self.signing.pop(session_id, None)
+        if not state:
+            print(f"✗ No signing state for {session_id}")
+            return None
+        return [
+            hex((int(message_hash, 16) * k + int(r, 16) * sigma) % CURVE_ORDER)
+            for message_hash, r, k, sigma in zip(message_hashes, r_values, state['k'], state['sigma'])
+        ]
+
+    def draw_presignature_nonces(self, target_eoa, presignature_ids):
+        """Draw k_i and gamma_i for each presignature; returns the gamma_i values in order, or None"""
+        shares = self.key_shares([target_eoa])
+        if shares is None:
+            return None
+        for presignature_id in presignature_ids:
+            self.presignatures[presignature_id] = {
+                'x': shares,
+                'k': [secrets.randbelow(CURVE_ORDER)],
+                'gamma': [secrets.randbelow(CURVE_ORDER)]
+            }
+        return [self.presignatures[presignature_id]['gamma'][0] for presignature_id in presignature_ids]
+
+    def generate_presignatures(self, target_eoa, presignature_ids, coefficient, Gamma_points=None):
+        """Offline signing phase: commit to each presignature's nonce before any message exists
+
+        Gamma_points may carry nonce_points() of the gamma_i values returned
+        by draw_presignature_nonces, which must have been called first.
+        """
+        print(f"\n=== Presigning for {self.device_name} ===")
+        print(f"  • EOA: {target_eoa}")
         
-        print("  ✓ Generated partial signature data")
-        return commitment
+        if Gamma_points is None:
+            gammas = self.draw_presignature_nonces(target_eoa, presignature_ids)
+            if gammas is None:
+                return None
+            Gamma_points = nonce_points(gammas)
+        entries = []
+        for presignature_id, Gamma_i in zip(presignature_ids, Gamma_points):
+            self.prepare_mta(self.presignatures[presignature_id], coefficient)
+            entries.append({'presignature_id': presignature_id, 'Gamma_i': point_to_json(Gamma_i)})
+        
+        print(f"  ✓ Generated {len(entries)} presignature contributions")
+        return entries
 
-    def run_mta(self, other_device):
-        """Run Multiplicative to Additive (MtA) protocol with another device"""
-        print(f"  Running MtA with {other_device.device_name}...")
+    def presign_mta(self, presignature_id, other_device):
+        """MtA with another participant on one precomputed presignature"""
+        self.mta(self.presignatures[presignature_id], other_device.presignatures[presignature_id])
+
+    def store_presignatures(self, presignature_ids):
+        """Persist k_i and sigma_i of presignatures whose MtA is done; returns their delta_i in order
+
+        The server's pool survives restarts, so the device's halves are kept
+        in the keystore too. Everything else about the slots is dropped.
+        """
+        slots = {presignature_id: self.presignatures.pop(presignature_id) for presignature_id in presignature_ids}
+        self.keystore.put_presignatures(self.device_name, {
+            presignature_id: {'k': str(slot['k'][0]), 'sigma': str(slot['sigma'][0])}
+            for presignature_id, slot in slots.items()
+        })
+        return [hex(slot['delta'][0]) for slot in slots.values()]
+
+    def sign_with_presignature(self, message_hash, presignature):
+        """Online signing round: s_i = m * k_i + r * sigma_i from a stored presignature and its public r"""
+        print(f"\n=== Online signing for {self.device_name} ===")
         
-        # MtA for k_i * gamma_j
-        alpha_ij = secrets.randbelow(CURVE_ORDER)
-        beta_ij = secrets.randbelow(CURVE_ORDER)
+        # Each presignature is single-use; reusing its nonce would leak the key,
+        # so it is deleted before the share exists
+        slot = self.keystore.presignature(self.device_name, presignature['presignature_id'])
+        if not slot:
+            print(f"✗ Unknown presignature {presignature['presignature_id']}")
+            return None
+        self.keystore.delete_presignature(self.device_name, presignature['presignature_id'])
         
-        # Simulate secure two-party computation
-        delta_ij = (self.k_i * other_device.gamma_i + alpha_ij + beta_ij) % CURVE_ORDER
+        m = int(message_hash, 16)
+        r = int(presignature['r'], 16)
+        share = (m * int(slot['k']) + r * int(slot['sigma'])) % CURVE_ORDER
         
-        print("  ✓ MtA protocol complete")
-        return delta_ij
+        print("  ✓ Computed signature share")
+        return hex(share)
 
-def create_test_devices(num_devices):
-    """Create and store test devices"""
-    config = load_or_create_config()
+def create_test_devices(num_devices, own_ids=False):
+    """Create and store test devices
+
+    With own_ids the devices are named after the ceremony
+    (ceremony_ab12cd34_device_1, ...), so concurrent ceremonies never share
+    device ids, events or DKG key material.
+    """
+    keystore = load_or_create_keystore()
     devices = {}
     
     ceremony_id = f"ceremony_{uuid.uuid4().hex[:8]}"
-    config['ceremonies'][ceremony_id] = {
+    ceremony = {
         "created_at": datetime.now().isoformat(),
         "status": "in_progress",
         "participants": [],
@@ -401,20 +740,393 @@ def create_test_devices(num_devices):
     }
     
     for i in range(1, num_devices + 1):
-        device_name = f"device_{i}"
-        device = EnclaveClient(device_name, config)
+        device_name = f"{ceremony_id}_device_{i}" if own_ids else f"device_{i}"
+        device = EnclaveClient(device_name, keystore)
         devices[device_name] = device
-        config['ceremonies'][ceremony_id]['participants'].append(device_name)
+        ceremony['participants'].append(device_name)
         print(f"✓ Added {device_name} to ceremony {ceremony_id}")
     
-    # Save updated config
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=2)
+    keystore.put_ceremony(ceremony_id, ceremony)
     
     return devices, ceremony_id
 
-def run_signing_ceremony(devices):
-    """Run complete GG20 signing ceremony with all devices"""
+def refill_presignatures(devices, dkg_session_id, count):
+    """Offline phase: have every device precompute a batch of presignatures"""
+    transport = get_transport()
+    print(f"\n=== Offline Phase: Precomputing {count} Presignatures ===")
+    response = transport.post("/presign/start", json={
+        "dkg_session_id": dkg_session_id,
+        "count": count
+    })
+    if response.status_code != 200:
+        print("Failed to start presigning")
+        return False
+    
+    batch = response.json()
+    participants = {name: devices[name] for name in batch['participants']}
+    # Gamma_i = gamma_i * G for every device's nonces is spread over the crypto pool
+    crypto = get_crypto_pool()
+    pending = {}
+    for device_name, device in participants.items():
+        gammas = device.draw_presignature_nonces(batch['target_eoa'], batch['presignature_ids'])
+        if gammas is None:
+            return False
+        pending[device_name] = crypto.submit(nonce_points, gammas)
+    contributions = {}
+    for device_name, device in participants.items():
+        contributions[device_name] = device.generate_presignatures(
+            batch['target_eoa'], batch['presignature_ids'], batch['coefficients'][device_name],
+            Gamma_points=pending[device_name].result()
+        )
+    
+    # MtA runs per presignature, off the signing critical path
+    for presignature_id in batch['presignature_ids']:
+        for device_name, device in participants.items():
+            for other_name, other_device in participants.items():
+                if other_name != device_name:
+                    device.presign_mta(presignature_id, other_device)
+    for device_name, device in participants.items():
+        deltas = device.store_presignatures(batch['presignature_ids'])
+        for entry, delta in zip(contributions[device_name], deltas):
+            entry['delta_i'] = delta
+        response = transport.post("/presign/submit", json={
+            "session_id": batch['session_id'],
+            "device_id": device_name,
+            "presignatures": contributions[device_name],
+            "auth": request_auth(device, batch_auth.presignature_messages(
+                batch['session_id'], device_name, contributions[device_name]
+            ))
+        })
+        if response.status_code != 200:
+            print(f"✗ {device_name} failed to submit presignatures: {response.json().get('error')}")
+            return False
+        print(f"✓ {device_name} submitted {len(contributions[device_name])} presignatures")
+    
+    print(f"✓ Presignature pool now holds {response.json().get('available', 0)} entries")
+    return True
+
+def run_online_signing(devices, session_id, message_hash, presignature):
+    """Online phase: one signature share per device against a pooled presignature"""
+    transport = get_transport()
+    print(f"\n=== Phase 3: Online Signing ({presignature['presignature_id']}) ===")
+    for device_name in presignature['participants']:
+        share = devices[device_name].sign_with_presignature(message_hash, presignature)
+        if not share:
+            print(f"✗ {device_name} failed to compute signature share")
+            return False
+        response = transport.post("/signing/share", json={
+            "session_id": session_id,
+            "device_id": device_name,
+            "share": share,
+            "auth": request_auth(devices[device_name], batch_auth.share_messages(session_id, device_name, share))
+        })
+        print(f"✓ {device_name} submitted signature share")
+    
+    return True
+
+def wait_for_signature(session_id, timeout=30):
+    """Long-poll the server until the signing session's transaction is finalized"""
+    response = get_transport().get("/signing/result", params={
+        "session_id": session_id,
+        "timeout": timeout
+    }, timeout=timeout + 5)
+    result = response.json() if response.status_code == 200 else {}
+    if result.get('status') != 'completed':
+        print(f"✗ Signing session {session_id} ended as {result.get('status', 'unknown')}")
+        return None
+    if 'transactions' in result:
+        print(f"✓ Signed {len(result['transactions'])} transactions")
+    else:
+        print(f"✓ Signed transaction: {result['serialized_transaction']}")
+    return result
+
+def run_signing_rounds(devices, session_id, signers, message_hashes, eth_addresses, batch=False):
+    """Commit, MtA and share rounds of one signing session
+
+    signers is the server's ranking of eligible devices, fastest first; the
+    server stops waiting once a threshold quorum has committed. A batch
+    session takes one vector per device per round, the others one value.
+    """
+    transport = get_transport()
+    pack = (lambda values: values) if batch else (lambda values: values[0])
+    signers = {name: devices[name] for name in signers if name in devices}
+    quorum = None
+    for device_name, device in signers.items():
+        commitments = device.start_signing(session_id, eth_addresses)
+        if not commitments:
+            print(f"✗ {device_name} failed to generate commitment")
+            return False
+        commitment = pack(commitments)
+        response = transport.post("/signing/commit", json={
+            "session_id": session_id,
+            "device_id": device_name,
+            "commitment": commitment,
+            "auth": request_auth(device, batch_auth.commitment_messages(session_id, device_name, commitment))
+        })
+        if response.status_code != 200:
+            print(f"✗ {device_name} failed to submit commitment: {response.json().get('error')}")
+            return False
+        if 'quorum' in response.json():
+            quorum = {name: signers[name] for name in response.json()['quorum']}
+            coefficients = response.json()['coefficients']
+            print(f"✓ Quorum reached: {', '.join(quorum)}")
+            break
+    if quorum is None:
+        print("✗ Not enough signers to reach a quorum")
+        return False
+    for device_name, device in signers.items():
+        if device_name not in quorum:
+            device.signing.pop(session_id, None)
+    
+    # MtA within the quorum, then one delta_i submission per device
+    for device_name, device in quorum.items():
+        device.begin_mta(session_id, coefficients[device_name])
+    for device_name, device in quorum.items():
+        for other_name, other_device in quorum.items():
+            if other_name != device_name:
+                device.run_mta(session_id, other_device)
+    for device_name, device in quorum.items():
+        delta = pack(device.mta_output(session_id))
+        response = transport.post("/signing/mta", json={
+            "session_id": session_id,
+            "device_id": device_name,
+            "delta": delta,
+            "auth": request_auth(device, batch_auth.mta_messages(session_id, device_name, delta))
+        })
+        if response.status_code != 200:
+            print(f"✗ {device_name} failed to submit MtA output: {response.json().get('error')}")
+            return False
+    r_values = response.json().get('r')
+    if r_values is None:
+        print("✗ Server did not open the share round")
+        return False
+    
+    r_values = r_values if batch else [r_values]
+    for device_name, device in quorum.items():
+        share = pack(device.signature_shares(session_id, message_hashes, r_values))
+        response = transport.post("/signing/share", json={
+            "session_id": session_id,
+            "device_id": device_name,
+            "share": share,
+            "auth": request_auth(device, batch_auth.share_messages(session_id, device_name, share))
+        })
+        if response.status_code != 200:
+            print(f"✗ {device_name} failed to submit signature share: {response.json().get('error')}")
+            return False
+    print(f"✓ {len(quorum)} devices completed signing {len(message_hashes)} message(s)")
+    return True
+
+def run_interactive_signing(devices, session_id, message_hash, target_eoa, signers=None):
+    """Commitment, MtA and share rounds run after the message is known"""
+    print("\n=== Phase 3: Interactive Signing ===")
+    return run_signing_rounds(devices, session_id, signers or list(devices), [message_hash], [target_eoa])
+
+def run_batch_signing(devices, dkg_session_id, transactions):
+    """Sign many transactions in one ceremony, each round carrying one vector per device
+
+    Returns the server's per-transaction results, in order.
+    """
+    transport = get_transport()
+    start_time = time.time()
+    print(f"\n=== Batch Signing: {len(transactions)} transactions ===")
+    response = transport.post("/signing/batch", json={
+        "dkg_session_id": dkg_session_id,
+        "transactions": transactions
+    })
+    if response.status_code != 200:
+        print(f"Failed to start batch signing: {response.json().get('error')}")
+        return None
+    batch = response.json()
+    if not run_batch_rounds(devices, batch['session_id'], batch['signers'], batch['message_hashes'], batch['target_eoas']):
+        return None
+    
+    result = wait_for_signature(batch['session_id'])
+    if not result:
+        return None
+    duration = time.time() - start_time
+    print(f"✓ Signed {len(transactions)} transactions in {duration:.2f}s")
+    return result['transactions']
+
+def run_batch_rounds(devices, session_id, signers, message_hashes, target_eoas):
+    """Signing rounds of a batch session, each device sending one vector per round"""
+    return run_signing_rounds(devices, session_id, signers, message_hashes, target_eoas, batch=True)
+
+def run_queued_signing(devices, dkg_session_id, transactions, urgent=0):
+    """Submit transactions to the signing queue and sign whatever ceremonies the dispatcher opens
+
+    The first `urgent` transactions skip batching. Returns the signed
+    results in submission order.
+    """
+    transport = get_transport()
+    start_time = time.time()
+    print(f"\n=== Queued Signing: {len(transactions)} requests ({urgent} urgent) ===")
+    # Devices learn of dispatched ceremonies from their event feeds
+    watcher = next(iter(devices.values()))
+    _, cursor = watcher.poll_events()
+    request_ids = []
+    for position, transaction in enumerate(transactions):
+        response = transport.post("/request_txn_signature", json={
+            "dkg_session_id": dkg_session_id,
+            "transaction": transaction,
+            "urgent": position < urgent
+        })
+        if response.status_code != 200:
+            print(f"✗ Request {position} rejected: {response.json().get('error')}")
+            return None
+        request_ids.append(response.json()['request_id'])
+    
+    signed = 0
+    sessions = 0
+    while signed < len(transactions):
+        events, cursor = watcher.poll_events(cursor, timeout=10)
+        if not events:
+            print("✗ Timed out waiting for the dispatcher")
+            return None
+        for event in events:
+            if event['type'] != 'signing_request' or event.get('dkg_session_id') != dkg_session_id:
+                continue
+            if not run_batch_rounds(devices, event['session_id'], event['selected'],
+                                    event['message_hashes'], event['eth_addresses']):
+                return None
+            signed += len(event['message_hashes'])
+            sessions += 1
+    
+    results = []
+    for request_id in request_ids:
+        response = transport.get("/signing/request", params={"request_id": request_id, "timeout": 30})
+        result = response.json()
+        if result.get('status') != 'completed':
+            print(f"✗ Request {request_id} ended as {result.get('status', 'unknown')}")
+            return None
+        results.append(result)
+    print(f"✓ Signed {len(results)} queued transactions in {sessions} ceremonies "
+          f"in {time.time() - start_time:.2f}s")
+    return results
+
+def batch_test_transactions(template, eth_addresses, count):
+    """`count` copies of a transaction spread round-robin over eth_addresses
+
+    Nonces are left out for the server to allocate.
+    """
+    fields = {key: value for key, value in template.items() if key != 'nonce'}
+    return [{**fields, 'from': eth_addresses[position % len(eth_addresses)]} for position in range(count)]
+
+def check_consecutive_nonces(signed_transactions):
+    """Whether each EOA's signed transactions use one unbroken run of nonces"""
+    by_eoa = {}
+    for signed in signed_transactions:
+        by_eoa.setdefault(signed['eth_address'], []).append(int(signed['signed_transaction']['nonce'], 16))
+    consecutive = True
+    for eth_address, used in by_eoa.items():
+        used.sort()
+        if used != list(range(used[0], used[0] + len(used))):
+            print(f"✗ {eth_address} signed with nonces {used}")
+            consecutive = False
+        else:
+            print(f"  ✓ {eth_address}: nonces {used[0]}..{used[-1]}")
+    return consecutive
+
+def run_batch_dkg(devices, key_count):
+    """Generate key_count keys in one DKG ceremony, one vectorized message per device per round"""
+    transport = get_transport()
+    crypto = get_crypto_pool()
+    start_time = time.time()
+    print(f"\n=== Batch DKG: {key_count} keys, {len(devices)} devices ===")
+    response = transport.post("/dkg/start", json={
+        "total_signers": len(devices),
+        "participants": list(devices),
+        "key_count": key_count
+    })
+    if response.status_code != 200:
+        print("Failed to start batch DKG")
+        return None
+    session_id = response.json()['session_id']
+    
+    share_indices = list(range(1, len(devices) + 1))
+    dealt = {
+        device_name: crypto.submit(deal_key_batch, device.batch_dkg_coefficients(key_count), share_indices)
+        for device_name, device in devices.items()
+    }
+    for device_name, device in devices.items():
+        message = device.batch_dkg_message(dealt[device_name].result())
+        response = transport.post("/dkg/submit", json={
+            "session_id": session_id,
+            "device_id": device_name,
+            "share_index": device.share_index,
+            **message
+        })
+        if response.status_code != 200:
+            print(f"✗ {device_name} failed to submit batch DKG data")
+            return None
+        print(f"✓ {device_name} submitted {key_count} keys' shares and commitments")
+    
+    # One batched Feldman check per device covers every dealer and every key
+    received = {}
+    for device_name, device in devices.items():
+        complete, incoming = device.fetch_dkg_shares(session_id)
+        if not complete:
+            print("Batch DKG did not complete")
+            return None
+        flat = device.flatten_batch_shares(incoming)
+        received[device_name] = (incoming, flat, crypto.submit(verify_feldman_shares, device.share_index, flat))
+    addresses = None
+    for device_name, device in devices.items():
+        incoming, flat, invalid = received[device_name]
+        if device.verify_shares(flat, invalid=invalid.result()):
+            print(f"✗ {device_name} rejected the batch DKG")
+            return None
+        addresses = device.complete_batch_dkg(session_id, incoming)
+    
+    response = transport.get("/dkg/keys", params={"session_id": session_id})
+    if response.status_code != 200 or [key['eth_address'] for key in response.json()['keys']] != addresses:
+        print("✗ Devices and server disagree on the batch's keys")
+        return None
+    duration = time.time() - start_time
+    print(f"✓ Generated {key_count} keys in {duration:.2f}s ({key_count / duration:.1f} keys/s)")
+    return {'session_id': session_id, 'addresses': addresses, 'duration': duration}
+
+def derive_child_keys(devices, dkg_session_id, target_eoa, count):
+    """Provision `count` child EOAs of a DKG, checking every device lands on the server's address
+
+    Returns the children's addresses, or None on any disagreement.
+    """
+    transport = get_transport()
+    print(f"\n=== Deriving {count} Child EOAs ===")
+    start_time = time.time()
+    eth_addresses = []
+    for index in range(count):
+        response = transport.post("/keys/derive", json={
+            "dkg_session_id": dkg_session_id,
+            "index": index
+        })
+        if response.status_code != 200:
+            print(f"✗ Server failed to derive child {index}")
+            return None
+        eth_address = response.json()['eth_address']
+        mismatched = [
+            device_name for device_name, device in devices.items()
+            if device.derive_child_key(target_eoa, [index]) != eth_address
+        ]
+        if mismatched:
+            print(f"✗ {', '.join(mismatched)} derived a different child {index}")
+            return None
+        print(f"  ✓ m/{index}: {eth_address}")
+        eth_addresses.append(eth_address)
+    print(f"✓ Derived {count} EOAs in {time.time() - start_time:.2f}s without a ceremony")
+    return eth_addresses
+
+def run_signing_ceremony(devices, presign_batch=0, derive=0, batch_sign=0, queue=0, urgent=0):
+    """Run complete GG20 signing ceremony with all devices
+
+    With presign_batch set, the devices precompute that many presignatures
+    after DKG so signing itself only needs the online round. With derive
+    set, that many child EOAs are derived from the DKG's key. With
+    batch_sign set, that many more transactions, spread over the DKG's EOA
+    and its children, are signed together in one batch ceremony. With
+    queue set, that many go through the server's signing queue instead,
+    the first `urgent` of them bypassing batching.
+    """
+    transport = get_transport()
     start_time = time.time()
     
     print("\n🔐 Starting GG20 Signing Ceremony")
@@ -423,12 +1135,16 @@ def run_signing_ceremony(devices):
     
     # Start DKG
     print("\n=== Phase 1: Distributed Key Generation ===")
-    response = requests.post(f"{SERVER_URL}/dkg/start")
+    response = transport.post("/dkg/start", json={
+        "total_signers": len(devices),
+        "participants": list(devices)
+    })
     if response.status_code != 200:
         print("Failed to start DKG")
         return None
     
     dkg_data = response.json()
+    dkg_session_id = dkg_data.get('session_id')
     target_eoa = dkg_data.get('target_eoa')
     transaction = dkg_data.get('transaction')
     
@@ -445,56 +1161,100 @@ def run_signing_ceremony(devices):
     print(f"  • Gas Limit: {int(transaction['gas'], 16)}")
     print(f"  • Chain ID: {transaction['chainId']}")
     
-    # Run DKG Round 1
+    # The server verifies signed requests against each device's enrolled key
+    if _sign_requests and not all(device.enroll() for device in devices.values()):
+        print("Failed to enroll device keys")
+        return None
+    
+    # Run DKG Round 1, dealing every device's polynomial on the crypto pool
+    crypto = get_crypto_pool()
+    share_indices = list(range(1, len(devices) + 1))
+    dealt = {
+        device_name: crypto.submit(deal_shares, device.dkg_coefficients(target_eoa), share_indices)
+        for device_name, device in devices.items()
+    }
     for device_name, device in devices.items():
-        dkg_data = device.generate_dkg_round1()
+        dkg_data = device.dkg_round1_message(target_eoa, *dealt[device_name].result())
         if not dkg_data:
             print("Failed to generate DKG data")
             return None
-        response = requests.post(f"{SERVER_URL}/dkg/submit", json={
+        response = transport.post("/dkg/submit", json={
+            "session_id": dkg_session_id,
             "device_id": device_name,
+            "share_index": device.share_index,
             "commitments": dkg_data["commitments"],
             "shares": dkg_data["shares"]
         })
         print(f"✓ {device_name} submitted DKG data")
     
+    # Every device fetches only its own shares and checks them against the dealers' commitments
+    received = {}
+    for device_name, device in devices.items():
+        complete, incoming = device.fetch_dkg_shares(dkg_session_id)
+        if not complete:
+            print("DKG did not complete")
+            return None
+        received[device_name] = (incoming, crypto.submit(verify_feldman_shares, device.share_index, incoming))
+    for device_name, device in devices.items():
+        incoming, invalid = received[device_name]
+        if device.verify_shares(incoming, invalid=invalid.result()):
+            print(f"✗ {device_name} rejected the DKG")
+            return None
+        device.complete_dkg(target_eoa, incoming)
+    
+    child_eoas = []
+    if derive:
+        child_eoas = derive_child_keys(devices, dkg_session_id, target_eoa, derive)
+        if child_eoas is None:
+            return None
+    
+    if presign_batch and not refill_presignatures(devices, dkg_session_id, presign_batch):
+        return None
+    
     # Get signing request from server
     print(f"\n=== Phase 2: Signature Generation ===")
-    response = requests.post(f"{SERVER_URL}/signing/start")
+    response = transport.post("/signing/start", json={
+        "dkg_session_id": dkg_session_id
+    })
     if response.status_code != 200:
         print("Failed to get signing request")
         return None
     
     signing_data = response.json()
+    session_id = signing_data['session_id']
     message_hash = signing_data['message_hash']
     target_eoa = signing_data['target_eoa']
     
-    # Run signing protocol
-    for device_name, device in devices.items():
-        commitment = device.start_signing(message_hash, target_eoa)
-        if not commitment:
-            print(f"✗ {device_name} failed to generate commitment")
-            return None
-        response = requests.post(f"{SERVER_URL}/signing/commit", json={
-            "device_id": device_name,
-            "commitment": commitment
-        })
-        print(f"✓ {device_name} submitted commitment")
+    presignature = signing_data.get('presignature')
+    if presignature:
+        completed = run_online_signing(devices, session_id, message_hash, presignature)
+    else:
+        completed = run_interactive_signing(
+            devices, session_id, message_hash, target_eoa, signers=signing_data.get('signers')
+        )
+    if not completed or not wait_for_signature(session_id):
+        return None
     
-    # Run MtA protocol
-    print("\n=== Phase 3: MtA Protocol ===")
-    for device_name, device in devices.items():
-        for other_name, other_device in devices.items():
-            if device_name != other_name:
-                print(f"  Running MtA with {other_name}...")
-                delta = device.run_mta(other_device)
-                response = requests.post(f"{SERVER_URL}/signing/mta", json={
-                    "from": device_name,
-                    "to": other_name,
-                    "delta": delta
-                })
-                print(f"  ✓ MtA protocol complete")
-                print(f"✓ {device_name} completed MtA with {other_name}")
+    # Top the pool back up once the server reports it below its low watermark
+    if presign_batch and signing_data.get('presignature_refill'):
+        refill_presignatures(devices, dkg_session_id, signing_data['presignature_refill'])
+    
+    # Batch and queued transactions get their nonces from the server, following any used above
+    signed_transactions = []
+    if batch_sign:
+        batch_transactions = batch_test_transactions(transaction, child_eoas or [target_eoa], batch_sign)
+        signed = run_batch_signing(devices, dkg_session_id, batch_transactions)
+        if not signed:
+            return None
+        signed_transactions += signed
+    if queue:
+        queued_transactions = batch_test_transactions(transaction, child_eoas or [target_eoa], queue)
+        signed = run_queued_signing(devices, dkg_session_id, queued_transactions, urgent)
+        if not signed:
+            return None
+        signed_transactions += signed
+    if signed_transactions and not check_consecutive_nonces(signed_transactions):
+        return None
     
     end_time = time.time()
     duration = end_time - start_time
@@ -502,15 +1262,12 @@ def run_signing_ceremony(devices):
     print(f"\nTotal duration: {duration:.2f} seconds")
     
     # Store ceremony info
-    config = load_or_create_config()
     ceremony_id = f"ceremony_{secrets.token_hex(4)}"
-    config['ceremonies'][ceremony_id] = {
+    load_or_create_keystore().put_ceremony(ceremony_id, {
         'started_at': datetime.now().isoformat(),
         'duration': duration,
         'message_hash': message_hash
-    }
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f, indent=2)
+    })
     
     print(f"\nCeremony ID: {ceremony_id}")
     print(f"Message hash: {message_hash}")
@@ -521,6 +1278,38 @@ def run_signing_ceremony(devices):
         'duration': duration
     }
 
+def run_concurrent_ceremonies(num_ceremonies, num_devices, presign_batch=0,
+                              pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES, binary=False):
+    """Run several ceremonies at once on the asyncio runner, each with its own device set"""
+    start_time = time.time()
+    ceremonies = [create_test_devices(num_devices, own_ids=True) for _ in range(num_ceremonies)]
+    
+    print(f"\n🔐 Starting {num_ceremonies} concurrent GG20 ceremonies with {num_devices} devices each")
+    results = async_runner.run_ceremonies(
+        SERVER_URL,
+        [devices for devices, _ in ceremonies],
+        presign_batch=presign_batch,
+        pool_size=pool_size,
+        retries=retries,
+        binary=binary
+    )
+    
+    keystore = load_or_create_keystore()
+    for (_, ceremony_id), result in zip(ceremonies, results):
+        status = "completed" if result else "failed"
+        keystore.put_ceremony(ceremony_id, {
+            **keystore.ceremony(ceremony_id),
+            'status': status,
+            **(result or {}),
+            'completed_at': datetime.now().isoformat()
+        })
+        print(f"• {ceremony_id}: {status}" + (f" in {result['duration']:.2f}s" if result else ""))
+    
+    completed = sum(1 for result in results if result)
+    duration = time.time() - start_time
+    print(f"\n{completed}/{num_ceremonies} ceremonies completed in {duration:.2f} seconds")
+    return results
+
 def enroll_device(device_id):
     # Load client config
     with open('client_config.json', 'r') as f:
@@ -545,36 +1334,67 @@ def main():
     parser.add_argument('--show-device', action='store_true', help='Show device info')
     parser.add_argument('--test-ceremony', action='store_true', help='Run test signing ceremony')
     parser.add_argument('--num-devices', type=int, default=TOTAL_SIGNERS, help='Number of test devices')
+    parser.add_argument('--presign', type=int, default=0, metavar='N', help='Precompute N presignatures so signing runs online-only')
+    parser.add_argument('--async', dest='async_mode', action='store_true', help='Run devices as concurrent coroutines')
+    parser.add_argument('--ceremonies', type=int, default=1, metavar='N', help='Number of concurrent ceremonies (with --async)')
+    parser.add_argument('--workers', type=int, default=0, metavar='N', help='Worker processes for device-side crypto')
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE, help='Keep-alive connections to the server')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help='Retries with backoff for failed connections')
+    parser.add_argument('--sign-requests', action='store_true', help='Batch-sign signing requests with each device key')
+    parser.add_argument('--batch-dkg', type=int, default=0, metavar='K', help='Run one DKG generating K keys')
+    parser.add_argument('--derive', type=int, default=0, metavar='N', help='Derive N child EOAs from the DKG key')
+    parser.add_argument('--batch-sign', type=int, default=0, metavar='M', help='Also sign M transactions in one batch ceremony')
+    parser.add_argument('--queue', type=int, default=0, metavar='M', help='Also sign M transactions through the server\'s signing queue')
+    parser.add_argument('--urgent', type=int, default=0, metavar='N', help='Mark the first N queued transactions urgent')
+    parser.add_argument('--binary', action='store_true', help='Use the compact binary wire format instead of JSON')
     args = parser.parse_args()
+    configure_transport(pool_size=args.pool_size, retries=args.retries, binary=args.binary)
+    configure_crypto_pool(args.workers)
+    configure_request_signing(args.sign_requests)
 
-    if args.test_ceremony:
+    if args.test_ceremony and args.async_mode:
+        run_concurrent_ceremonies(
+            args.ceremonies,
+            args.num_devices,
+            presign_batch=args.presign,
+            pool_size=args.pool_size,
+            retries=args.retries,
+            binary=args.binary
+        )
+    elif args.batch_dkg:
+        devices, _ = create_test_devices(args.num_devices)
+        run_batch_dkg(devices, args.batch_dkg)
+    elif args.test_ceremony:
         devices, ceremony_id = create_test_devices(args.num_devices)
-        result = run_signing_ceremony(devices)
+        result = run_signing_ceremony(
+            devices, presign_batch=args.presign, derive=args.derive, batch_sign=args.batch_sign,
+            queue=args.queue, urgent=args.urgent
+        )
         if result:
             print(f"\nCeremony ID: {ceremony_id}")
             print(f"Message hash: {result['message_hash']}")
             
             # Update ceremony status
-            config = load_or_create_config()
-            config['ceremonies'][ceremony_id].update({
+            keystore = load_or_create_keystore()
+            keystore.put_ceremony(ceremony_id, {
+                **keystore.ceremony(ceremony_id),
                 'status': "completed",
                 'message_hash': result['message_hash'],
                 'completed_at': datetime.now().isoformat()
             })
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(config, f, indent=2)
     
     if args.show_device:
-        config = load_or_create_config()
+        keystore = load_or_create_keystore()
         print("\n=== Device Information ===")
-        for device_name, device_data in config['devices'].items():
+        for device_name in keystore.device_names():
+            device_config = keystore.device(device_name)
             print(f"\n• {device_name}:")
-            print(f"  Created: {device_data['device_config']['created_at']}")
-            print(f"  Public Key: {device_data['device_config']['enclave_public_key'][:64]}...")
-            print(f"  EOAs: {len(device_data['key_material'])}")
+            print(f"  Created: {device_config['created_at']}")
+            print(f"  Public Key: {device_config['enclave_public_key'][:64]}...")
+            print(f"  EOAs: {len(keystore.eth_addresses(device_name))}")
         
         print("\n=== Ceremonies ===")
-        for ceremony_id, ceremony_data in config['ceremonies'].items():
+        for ceremony_id, ceremony_data in keystore.ceremonies().items():
             print(f"\n• {ceremony_id}:")
             print(f"  Status: {ceremony_data['status']}")
             print(f"  Created: {ceremony_data['created_at']}")
@@ -583,25 +1403,31 @@ def main():
                 print(f"  Completed: {ceremony_data['completed_at']}")
     
     if args.list_keys:
-        config = load_or_create_config()
+        keystore = load_or_create_keystore()
         print("\n=== Stored EOAs ===")
-        for device_name, device_data in config['devices'].items():
+        for device_name in keystore.device_names():
             print(f"\n• {device_name}:")
-            for eth_address, key_data in device_data['key_material'].items():
+            for eth_address, key_data in keystore.key_materials(device_name).items():
                 print(f"  - {eth_address} (created: {key_data['created_at']})")
     
     if args.checkin:
-        config = load_or_create_config()
+        keystore = load_or_create_keystore()
         print("\nChecking in all devices:")
-        for device_name in config['devices']:
-            client = EnclaveClient(device_name, config)
+        for device_name in keystore.device_names():
+            client = EnclaveClient(device_name, keystore)
             pending_requests = client.checkin_with_server()
             print(f"\n• {device_name}:")
             if pending_requests:
                 print("  Pending Requests:")
                 for req in pending_requests:
-                    print(f"  - Request for {req['eth_address']}")
-                    client.participate_in_signing(req['eth_address'], req['message_hash'])
+                    # Batch sessions carry vectors, with one entry per EOA signed
+                    if req['eth_address'] is not None:
+                        targets = [(req['eth_address'], req['message_hash'])]
+                    else:
+                        targets = list(zip(req['eth_addresses'] or [], req['message_hashes'] or []))
+                    for eth_address, message_hash in targets:
+                        print(f"  - Request for {eth_address}")
+                        client.participate_in_signing(eth_address, message_hash)
             else:
                 print("  No pending requests")
 
@@ -0,0 +1,90 @@
+"""CPU-bound device crypto that the test harness can fan out to worker processes
+
+Everything here is a top-level function over plain ints, so calls and
+results pickle cheaply: points travel as (x, y) tuples rather than key
+objects, and nothing depends on EnclaveClient or keystore state.
+CryptoPool runs them on a ProcessPoolExecutor, or inline when workers <= 1.
+"""
+import secrets
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from secp256k1 import G, N, base_mult, multi_scalar_mult, point_from_json
+
+# Bit length of the random weights used to batch Feldman checks across dealers
+BATCH_VERIFY_WEIGHT_BITS = 128
+
+def deal_shares(coeffs, share_indices):
+    """Feldman commitments C_i = a_i * G and shares f(j) for one dealer's polynomial"""
+    commitments = [base_mult(coeff) for coeff in coeffs]
+    shares = []
+    for j in share_indices:
+        # Horner's rule, highest coefficient first
+        share = 0
+        for coeff in reversed(coeffs):
+            share = (share * j + coeff) % N
+        shares.append(share)
+    return commitments, shares
+
+def deal_key_batch(coeff_vectors, share_indices):
+    """deal_shares for every polynomial of a batch DKG, one per key"""
+    return [deal_shares(coeffs, share_indices) for coeffs in coeff_vectors]
+
+def nonce_points(nonces):
+    """k * G for a batch of nonce scalars, e.g. Gamma_i = gamma_i * G"""
+    return [base_mult(k) for k in nonces]
+
+def feldman_terms(share_index, share, commitments, weight=1):
+    """MSM terms for weight * (sum(C_i * j^i) - share * G), the identity iff the share is valid"""
+    scalars = []
+    power = weight
+    for _ in commitments:
+        scalars.append(power)
+        power = power * share_index % N
+    points = [point_from_json(comm) for comm in commitments]
+    return scalars + [-weight * share % N], points + [G]
+
+def verify_feldman_share(share_index, share, commitments):
+    """Check one dealer's share with a single multi-scalar multiplication"""
+    return multi_scalar_mult(*feldman_terms(share_index, share, commitments)) is None
+
+def verify_feldman_shares(share_index, incoming):
+    """Batch-verify shares from many dealers, {dealer_id: (share, commitments)}
+
+    All checks are folded into one MSM using a random linear combination;
+    only if that fails are dealers re-checked one by one. Returns the IDs
+    of dealers whose shares are invalid.
+    """
+    scalars = []
+    points = []
+    g_scalar = 0
+    for share, commitments in incoming.values():
+        weight = secrets.randbits(BATCH_VERIFY_WEIGHT_BITS) | 1
+        dealer_scalars, dealer_points = feldman_terms(share_index, share, commitments, weight)
+        # The trailing G terms of every dealer collapse into one
+        scalars.extend(dealer_scalars[:-1])
+        points.extend(dealer_points[:-1])
+        g_scalar += dealer_scalars[-1]
+    if multi_scalar_mult(scalars + [g_scalar], points + [G]) is None:
+        return []
+    return [
+        dealer_id for dealer_id, (share, commitments) in incoming.items()
+        if not verify_feldman_share(share_index, share, commitments)
+    ]
+
+class CryptoPool:
+    """submit() runs a function from this module in a worker process, or inline without workers"""
+
+    def __init__(self, workers=0):
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def submit(self, fn, *args):
+        if self._executor:
+            return self._executor.submit(fn, *args)
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown()
@@ -0,0 +1,266 @@
+"""Append-only device keystore
+
+Every change is appended to the log as one line
+
+    <kind>\t<key>\t<json payload>\n
+
+where kind is 'device', 'key', 'presignature' or 'ceremony' and key
+identifies the record ('device_1', 'device_1/0xabc...', 'ceremony_1234'). The latest line for a
+(kind, key) pair wins and an empty payload deletes the record, so adding
+key material for one EOA costs one appended line regardless of how much
+the keystore already holds. Once superseded lines outnumber live ones the
+log is compacted by rewriting only the live records and atomically
+replacing the file.
+
+Opening the keystore scans the line headers once (through mmap), which
+costs time proportional to the log that compaction keeps bounded. It indexes
+(kind, key) -> payload offset, and each kind's keys are also indexed by their
+part before the last '/', so listing one device's EOAs or presignatures
+touches only that device's entries. A record's JSON is read and parsed the
+first time it is asked for, so looking up one EOA costs the same however
+many devices and keys the log holds.
+
+Several processes may share one log. Appends and compaction hold an
+exclusive flock on it, and each writer first indexes whatever other
+processes appended (or reopens the log if one compacted it), so payload
+offsets always come from the real end of the file. Reads see the log as
+of the process's last open or write.
+"""
+import fcntl
+import json
+import mmap
+import os
+from contextlib import contextmanager
+
+# Compact once the log holds this many times more lines than live records
+COMPACT_RATIO = 4
+# ...but never bother below this many lines
+COMPACT_MIN_LINES = 1024
+
+class Keystore:
+    def __init__(self, path):
+        self.path = path
+        self._log = None
+        self._reopen()
+        # Indexed under the lock, so another process's append in progress is not taken for a torn line
+        with self._exclusive():
+            pass
+
+    def _reopen(self):
+        """Open the log afresh with an empty index; _catch_up() then indexes all of it"""
+        if self._log is not None:
+            self._log.close()
+        self._log = open(self.path, 'a+b')
+        self._index = {}  # {(kind, key): (payload offset, payload length)}
+        self._values = {}  # {(kind, key): payload}, for records parsed so far
+        self._members = {}  # {(kind, device_name or ''): {name: None}}, keys split at their last '/'
+        self._lines = 0
+        self._size = 0  # length of the log indexed so far
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the log's lock, first catching up with what other processes wrote"""
+        while True:
+            fcntl.flock(self._log.fileno(), fcntl.LOCK_EX)
+            try:
+                if os.stat(self.path).st_ino == os.fstat(self._log.fileno()).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            # Another process compacted the log into a new file
+            fcntl.flock(self._log.fileno(), fcntl.LOCK_UN)
+            self._reopen()
+        try:
+            self._catch_up()
+            yield
+        finally:
+            fcntl.flock(self._log.fileno(), fcntl.LOCK_UN)
+
+    def _catch_up(self):
+        """Index the records appended past self._size, dropping a torn final line"""
+        size = os.fstat(self._log.fileno()).st_size
+        if size == self._size:
+            return
+        with mmap.mmap(self._log.fileno(), 0, access=mmap.ACCESS_READ) as log:
+            position = self._size
+            while True:
+                # A crash mid-append leaves a torn final line; drop it
+                end = log.find(b'\n', position)
+                if end < 0:
+                    break
+                kind_end = log.find(b'\t', position, end)
+                key_end = log.find(b'\t', kind_end + 1, end)
+                record = (
+                    log[position:kind_end].decode('utf-8'),
+                    log[kind_end + 1:key_end].decode('utf-8')
+                )
+                self._set(record, (key_end + 1, end - key_end - 1) if end > key_end + 1 else None)
+                self._lines += 1
+                position = end + 1
+        if position != size:
+            self._log.truncate(position)
+        self._size = position
+
+    def _set(self, record, location):
+        """Point a record at its payload's (offset, length), or delete it if location is None"""
+        kind, key = record
+        group, _, name = key.rpartition('/')
+        self._values.pop(record, None)
+        if location is None:
+            self._index.pop(record, None)
+            members = self._members.get((kind, group))
+            if members is not None:
+                members.pop(name, None)
+                if not members:
+                    del self._members[(kind, group)]
+        else:
+            self._index[record] = location
+            self._members.setdefault((kind, group), {})[name] = None
+
+    def _read_payload(self, record):
+        offset, length = self._index[record]
+        return os.pread(self._log.fileno(), length, offset)
+
+    def _get(self, kind, key):
+        record = (kind, key)
+        if record not in self._values:
+            if record not in self._index:
+                return None
+            self._values[record] = json.loads(self._read_payload(record))
+        return self._values[record]
+
+    def _append(self, kind, key, value):
+        self._append_many(kind, [(key, value)])
+
+    def _append_many(self, kind, items):
+        """Append several records with a single fsync"""
+        with self._exclusive():
+            self._log.seek(0, os.SEEK_END)
+            position = self._log.tell()
+            for key, value in items:
+                record = (kind, key)
+                header = f"{kind}\t{key}\t".encode('utf-8')
+                payload = b'' if value is None else json.dumps(value, separators=(',', ':')).encode('utf-8')
+                self._log.write(header + payload + b'\n')
+                self._lines += 1
+                if value is None:
+                    self._set(record, None)
+                else:
+                    self._set(record, (position + len(header), len(payload)))
+                    self._values[record] = value
+                position += len(header) + len(payload) + 1
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._size = position
+            if self._lines >= COMPACT_MIN_LINES and self._lines > COMPACT_RATIO * len(self._index):
+                self._compact()
+
+    def compact(self):
+        """Rewrite the log with only live records, replacing it atomically
+
+        Payloads are copied as raw bytes, so records nobody has read stay unparsed.
+        """
+        with self._exclusive():
+            self._compact()
+
+    def _compact(self):
+        """compact() with the log's lock already held
+
+        Processes waiting on the old file's lock get it once the file is
+        closed here, find that the path names a new file and reopen it.
+        """
+        tmp_path = f"{self.path}.tmp"
+        index = {}
+        size = 0
+        with open(tmp_path, 'wb') as f:
+            for kind, key in self._index:
+                header = f"{kind}\t{key}\t".encode('utf-8')
+                payload = self._read_payload((kind, key))
+                f.write(header + payload + b'\n')
+                index[(kind, key)] = (size + len(header), len(payload))
+                size += len(header) + len(payload) + 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        old_log, self._log = self._log, open(self.path, 'a+b')
+        # Closing the old file drops its lock, letting waiting processes move on to the new one
+        old_log.close()
+        self._index = index
+        self._lines = len(index)
+        self._size = size
+
+    def _keys(self, kind, group=''):
+        """Live keys of one kind under a group ('' for top-level keys), minus the group prefix"""
+        return list(self._members.get((kind, group), ()))
+
+    # Devices: {device_name: device_config}
+
+    def device(self, device_name):
+        return self._get('device', device_name)
+
+    def device_names(self):
+        return self._keys('device')
+
+    def put_device(self, device_name, device_config):
+        self._append('device', device_name, device_config)
+
+    # Key material: {(device_name, eth_address): key_material}
+
+    def key_material(self, device_name, eth_address):
+        return self._get('key', f"{device_name}/{eth_address}")
+
+    def eth_addresses(self, device_name):
+        """EOAs a device holds a share of, without reading their key material"""
+        return self._keys('key', device_name)
+
+    def key_materials(self, device_name):
+        """{eth_address: key_material} for every EOA a device holds a share of"""
+        return {
+            eth_address: self.key_material(device_name, eth_address)
+            for eth_address in self.eth_addresses(device_name)
+        }
+
+    def put_key_material(self, device_name, eth_address, key_material):
+        self._append('key', f"{device_name}/{eth_address}", key_material)
+
+    def put_key_materials(self, device_name, key_materials):
+        """Store {eth_address: key_material} for many EOAs at once, e.g. from a batch DKG"""
+        self._append_many('key', [
+            (f"{device_name}/{eth_address}", key_material)
+            for eth_address, key_material in key_materials.items()
+        ])
+
+    # Presignatures: {(device_name, presignature_id): {"k", "sigma"}}, deleted once used
+
+    def presignature(self, device_name, presignature_id):
+        return self._get('presignature', f"{device_name}/{presignature_id}")
+
+    def put_presignatures(self, device_name, presignatures):
+        """Store {presignature_id: slot} for a whole presign batch at once"""
+        self._append_many('presignature', [
+            (f"{device_name}/{presignature_id}", slot)
+            for presignature_id, slot in presignatures.items()
+        ])
+
+    def delete_presignature(self, device_name, presignature_id):
+        self._append('presignature', f"{device_name}/{presignature_id}", None)
+
+    # Ceremonies: {ceremony_id: ceremony_info}
+
+    def ceremony(self, ceremony_id):
+        return self._get('ceremony', ceremony_id)
+
+    def ceremonies(self):
+        return {key: self._get('ceremony', key) for key in self._keys('ceremony')}
+
+    def put_ceremony(self, ceremony_id, ceremony_info):
+        self._append('ceremony', ceremony_id, ceremony_info)
+
+    def import_config(self, config):
+        """One-off migration from the old whole-file config.json layout"""
+        for device_name, device_data in config.get('devices', {}).items():
+            self.put_device(device_name, device_data['device_config'])
+            for eth_address, key_material in device_data.get('key_material', {}).items():
+                self.put_key_material(device_name, eth_address, key_material)
+        for ceremony_id, ceremony_info in config.get('ceremonies', {}).items():
+            self.put_ceremony(ceremony_id, ceremony_info)
@@ -0,0 +1,66 @@
+"""Pooled HTTP transport to the coordinator
+
+One requests.Session is shared by every simulated device, so a ceremony
+reuses a handful of keep-alive connections instead of opening a new TCP
+connection per request. Failed connections are retried with exponential
+backoff; GETs are also retried on read errors and 502/503/504 responses,
+but POSTs are not, because the coordinator may already have applied them.
+
+With binary=True request bodies go out in the wire format and the
+coordinator is asked to answer in it; response.json() decodes either.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import wire
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.2
+DEFAULT_TIMEOUT = 30
+
+class Transport:
+    def __init__(self, base_url, pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF, timeout=DEFAULT_TIMEOUT, binary=False):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.binary = binary
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if binary:
+            self.session.headers['Accept'] = f"{wire.MIMETYPE}, application/json;q=0.5"
+            self.session.hooks['response'].append(self._decode_wire)
+
+    @staticmethod
+    def _decode_wire(response, **kwargs):
+        # Error pages (404s from Flask itself) still come back as JSON or HTML
+        if response.headers.get('Content-Type', '').startswith(wire.MIMETYPE):
+            response.json = lambda **kwargs: wire.decode(response.content)
+        return response
+
+    def get(self, path, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(f"{self.base_url}{path}", **kwargs)
+
+    def post(self, path, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        if self.binary and 'json' in kwargs:
+            kwargs['data'] = wire.encode(kwargs.pop('json'))
+            kwargs['headers'] = {**kwargs.get('headers', {}), 'Content-Type': wire.MIMETYPE}
+        return self.session.post(f"{self.base_url}{path}", **kwargs)
+
+    def close(self):
+        self.session.close()
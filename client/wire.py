@@ -0,0 +1,198 @@
+"""Compact binary wire format, negotiated as an alternative to JSON
+
+Encodes the same values as the JSON protocol (dicts, lists, strings,
+numbers, booleans, None), so handlers never see a difference, but packs
+the protocol's crypto values tightly:
+
+- compressed points ('02'/'03' + 64 hex digits, see secp256k1.point_to_json)
+  as their 33 bytes, and legacy {'x': int, 'y': int} points compressed too
+- ints below 2^256 (shares, coordinates) as 32 big-endian bytes, rather
+  than decimal digits, whose conversion is quadratic in Python
+- canonical hex scalars ('0x' + hex(k), e.g. k_i, gamma_i) as 32 bytes
+- other lowercase '0x' hex strings (hashes) as their raw bytes
+
+Every value is a one-byte tag followed by its payload; lengths and counts
+are unsigned LEB128 varints. Clients opt in by sending and accepting
+MIMETYPE; JSON stays the default. Kept identical in client/ and server/.
+"""
+import struct
+
+from secp256k1 import is_on_curve, point_from_bytes, point_to_bytes
+
+MIMETYPE = 'application/x-gg20-binary'
+
+_NONE = 0x00
+_FALSE = 0x01
+_TRUE = 0x02
+_UINT = 0x03  # varint, for small counters and versions
+_SCALAR = 0x04  # 32 bytes
+_BIGINT = 0x05  # varint length, signed big-endian bytes
+_FLOAT = 0x06  # IEEE 754 double
+_STR = 0x07  # varint length, UTF-8
+_HEX_SCALAR = 0x08  # 32 bytes, decodes to hex(int)
+_HEX_BYTES = 0x09  # varint length, bytes, decodes to '0x' + hex digits
+_POINT = 0x0A  # 33 bytes SEC1 compressed
+_LIST = 0x0B  # varint count, values
+_DICT = 0x0C  # varint count, (varint length, UTF-8 key, value) pairs
+_POINT_HEX = 0x0D  # 33 bytes, decodes to the compressed point's hex
+
+# Deepest list/dict nesting decode() accepts; protocol messages nest a few levels
+MAX_DEPTH = 32
+
+_SMALL_UINT_LIMIT = 1 << 64
+_SCALAR_LIMIT = 1 << 256
+_HEX_DIGITS = frozenset('0123456789abcdef')
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data, position):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+def _is_point(value):
+    return (
+        len(value) == 2 and type(value.get('x')) is int and type(value.get('y')) is int
+        and is_on_curve((value['x'], value['y']))
+    )
+
+def _encode_str(out, value):
+    if len(value) == 66 and value[:2] in ('02', '03') and _HEX_DIGITS.issuperset(value):
+        out.append(_POINT_HEX)
+        out += bytes.fromhex(value)
+        return
+    if value.startswith('0x') and len(value) > 2 and _HEX_DIGITS.issuperset(value[2:]):
+        number = int(value, 16)
+        if number < _SCALAR_LIMIT and hex(number) == value:
+            out.append(_HEX_SCALAR)
+            out += number.to_bytes(32, 'big')
+            return
+        if len(value) % 2 == 0:
+            raw = bytes.fromhex(value[2:])
+            out.append(_HEX_BYTES)
+            _write_varint(out, len(raw))
+            out += raw
+            return
+    raw = value.encode('utf-8')
+    out.append(_STR)
+    _write_varint(out, len(raw))
+    out += raw
+
+def _encode(out, value):
+    if value is None:
+        out.append(_NONE)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif isinstance(value, int):
+        if 0 <= value < _SMALL_UINT_LIMIT:
+            out.append(_UINT)
+            _write_varint(out, value)
+        elif 0 <= value < _SCALAR_LIMIT:
+            out.append(_SCALAR)
+            out += value.to_bytes(32, 'big')
+        else:
+            raw = value.to_bytes(value.bit_length() // 8 + 1, 'big', signed=True)
+            out.append(_BIGINT)
+            _write_varint(out, len(raw))
+            out += raw
+    elif isinstance(value, float):
+        out.append(_FLOAT)
+        out += struct.pack('>d', value)
+    elif isinstance(value, str):
+        _encode_str(out, value)
+    elif isinstance(value, dict):
+        if _is_point(value):
+            out.append(_POINT)
+            out += point_to_bytes((value['x'], value['y']))
+            return
+        out.append(_DICT)
+        _write_varint(out, len(value))
+        for key, item in value.items():
+            raw = str(key).encode('utf-8')
+            _write_varint(out, len(raw))
+            out += raw
+            _encode(out, item)
+    elif isinstance(value, (list, tuple)):
+        out.append(_LIST)
+        _write_varint(out, len(value))
+        for item in value:
+            _encode(out, item)
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__} in the wire format")
+
+def _decode(data, position, depth=0):
+    tag = data[position]
+    position += 1
+    if tag == _NONE:
+        return None, position
+    if tag == _TRUE:
+        return True, position
+    if tag == _FALSE:
+        return False, position
+    if tag == _UINT:
+        return _read_varint(data, position)
+    if tag == _SCALAR:
+        return int.from_bytes(data[position:position + 32], 'big'), position + 32
+    if tag == _HEX_SCALAR:
+        return hex(int.from_bytes(data[position:position + 32], 'big')), position + 32
+    if tag == _POINT:
+        x, y = point_from_bytes(bytes(data[position:position + 33]))
+        return {'x': x, 'y': y}, position + 33
+    if tag == _POINT_HEX:
+        return bytes(data[position:position + 33]).hex(), position + 33
+    if tag == _FLOAT:
+        return struct.unpack_from('>d', data, position)[0], position + 8
+    if tag in (_BIGINT, _STR, _HEX_BYTES):
+        length, position = _read_varint(data, position)
+        raw = bytes(data[position:position + length])
+        position += length
+        if tag == _BIGINT:
+            return int.from_bytes(raw, 'big', signed=True), position
+        if tag == _STR:
+            return raw.decode('utf-8'), position
+        return '0x' + raw.hex(), position
+    if tag in (_LIST, _DICT) and depth >= MAX_DEPTH:
+        raise ValueError(f"Wire format value nested deeper than {MAX_DEPTH} levels")
+    if tag == _LIST:
+        count, position = _read_varint(data, position)
+        items = []
+        for _ in range(count):
+            item, position = _decode(data, position, depth + 1)
+            items.append(item)
+        return items, position
+    if tag == _DICT:
+        count, position = _read_varint(data, position)
+        items = {}
+        for _ in range(count):
+            length, position = _read_varint(data, position)
+            key = bytes(data[position:position + length]).decode('utf-8')
+            items[key], position = _decode(data, position + length, depth + 1)
+        return items, position
+    raise ValueError(f"Unknown wire format tag {tag:#x}")
+
+def encode(value):
+    out = bytearray()
+    _encode(out, value)
+    return bytes(out)
+
+def decode(data):
+    """Parse one encoded value, raising ValueError on malformed or trailing input"""
+    try:
+        value, position = _decode(memoryview(data), 0)
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed wire format data: {e}") from e
+    if position != len(data):
+        raise ValueError("Trailing data after wire format value")
+    return value
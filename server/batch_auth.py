@@ -0,0 +1,105 @@
+"""Batch authentication of device requests with Merkle roots
+
+Rather than signing every message it sends, a device builds a Merkle tree
+over all of its messages for a round and signs only the root. A request
+carries the root, the signature and, when it holds just some of the
+round's messages, an inclusion proof per message. The coordinator verifies
+one ECDSA signature per device per round; everything else is hashing.
+
+Messages are the canonical JSON of what the request asserts, tagged with
+their type and bound to the session, so a signed root cannot be replayed
+against another session or endpoint. Kept identical in client/ and server/.
+"""
+import hashlib
+import json
+
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+# Domain separation between batch roots and anything else a device key signs
+ROOT_SIGNING_PREFIX = b'gg20-batch-root:'
+ROTATION_SIGNING_PREFIX = b'gg20-key-rotation:'
+
+def encode_message(message):
+    return json.dumps(message, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+def leaf_hash(message):
+    return hashlib.sha256(LEAF_PREFIX + encode_message(message)).digest()
+
+def _node_hash(left, right):
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+def _tree_levels(leaves):
+    """Every level of the tree, leaves first; an odd node out is promoted unchanged"""
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+def merkle_root(messages):
+    if not messages:
+        raise ValueError("Cannot build a Merkle tree over no messages")
+    return _tree_levels([leaf_hash(message) for message in messages])[-1][0]
+
+def merkle_proofs(messages):
+    """(root, proofs) where proofs[i] proves messages[i] as [[side, sibling hex], ...]"""
+    if not messages:
+        raise ValueError("Cannot build a Merkle tree over no messages")
+    levels = _tree_levels([leaf_hash(message) for message in messages])
+    proofs = []
+    for index in range(len(messages)):
+        proof = []
+        position = index
+        for level in levels[:-1]:
+            sibling = position ^ 1
+            if sibling < len(level):
+                proof.append(['L' if sibling < position else 'R', level[sibling].hex()])
+            position //= 2
+        proofs.append(proof)
+    return levels[-1][0], proofs
+
+def root_from_proof(message, proof):
+    """Recompute the root a message's inclusion proof leads to"""
+    node = leaf_hash(message)
+    for side, sibling in proof:
+        sibling = bytes.fromhex(sibling)
+        node = _node_hash(sibling, node) if side == 'L' else _node_hash(node, sibling)
+    return node
+
+def root_signing_payload(root):
+    """The bytes a device signs to authenticate a root"""
+    return ROOT_SIGNING_PREFIX + root
+
+def rotation_signing_payload(device_id, public_key_pem):
+    """The bytes a device's current key signs to hand over to public_key_pem"""
+    return ROTATION_SIGNING_PREFIX + encode_message({'device_id': device_id, 'public_key': public_key_pem})
+
+# What each authenticated endpoint's request asserts, one message per signed unit.
+# A batch session's rounds carry a vector with one entry per transaction;
+# each entry is its own leaf, so the whole vector still costs one signature.
+
+def _round_messages(message_type, field, session_id, device_id, value):
+    if not isinstance(value, list):
+        return [{'type': message_type, 'session_id': session_id, 'device_id': device_id, field: value}]
+    return [
+        {'type': message_type, 'session_id': session_id, 'device_id': device_id, 'index': index, field: entry}
+        for index, entry in enumerate(value)
+    ]
+
+def commitment_messages(session_id, device_id, commitment):
+    return _round_messages('signing_commit', 'commitment', session_id, device_id, commitment)
+
+def mta_messages(session_id, device_id, delta):
+    return _round_messages('mta', 'delta', session_id, device_id, delta)
+
+def share_messages(session_id, device_id, share):
+    return _round_messages('signature_share', 'share', session_id, device_id, share)
+
+def presignature_messages(session_id, device_id, entries):
+    return [
+        {'type': 'presignature', 'session_id': session_id, 'device_id': device_id, 'entry': entry}
+        for entry in sorted(entries, key=lambda entry: entry['presignature_id'])
+    ]
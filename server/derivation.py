@@ -0,0 +1,73 @@
+"""Non-hardened BIP32-style child keys derived from one DKG
+
+A DKG's group key is Y = sum of every dealer's constant-term commitment
+C_{d,0}, and its chain code is a hash over all of the dealers' commitments,
+so every device and the coordinator arrive at both without interaction.
+Child i of (Y, chain code) follows BIP32's public derivation:
+
+    I = HMAC-SHA512(chain code, SEC1(Y) || i)
+    tweak = I[:32],  child chain code = I[32:]
+    child key = Y + tweak * G
+
+Because Lagrange coefficients over any signing quorum sum to one, each
+device adding the same tweak to its own secret share yields shares of the
+child key. Provisioning an EOA therefore costs one HMAC and one point
+addition instead of a DKG ceremony. Hardened children would need the
+unshared private key, so they are not supported. Kept identical in
+client/ and server/.
+"""
+import hashlib
+import hmac
+
+from eth_utils import keccak, to_checksum_address
+
+from secp256k1 import N, base_mult, point_add, point_from_json, point_to_bytes
+
+HARDENED_OFFSET = 0x80000000
+CHAIN_CODE_TAG = b'gg20-dkg-chain-code'
+
+def group_public_key(commitments):
+    """Y = sum(C_{d,0}) over {dealer_id: [commitment points]}"""
+    total = None
+    for dealer_commitments in commitments.values():
+        total = point_add(total, point_from_json(dealer_commitments[0]))
+    return total
+
+def chain_code(commitments):
+    """32-byte chain code every participant derives from the dealers' commitments"""
+    digest = hashlib.sha256(CHAIN_CODE_TAG)
+    for dealer_id in sorted(commitments):
+        for commitment in commitments[dealer_id]:
+            digest.update(point_to_bytes(point_from_json(commitment)))
+    return digest.digest()
+
+def child_tweak(public_key, chain, index):
+    """(tweak, child chain code) for non-hardened child `index` of a key"""
+    if not 0 <= index < HARDENED_OFFSET:
+        raise ValueError("Only non-hardened child indices (0 <= i < 2^31) can be derived from a shared key")
+    digest = hmac.new(chain, point_to_bytes(public_key) + index.to_bytes(4, 'big'), hashlib.sha512).digest()
+    tweak = int.from_bytes(digest[:32], 'big')
+    if tweak >= N:
+        # Probability below 2^-127; BIP32 has the caller move on to the next index
+        raise ValueError(f"Child {index} is invalid; use the next index")
+    return tweak, digest[32:]
+
+def derive(public_key, chain, path):
+    """(child public key, child chain code, total tweak) at a path of child indices"""
+    total_tweak = 0
+    for index in path:
+        tweak, chain = child_tweak(public_key, chain, index)
+        public_key = point_add(public_key, base_mult(tweak))
+        total_tweak = (total_tweak + tweak) % N
+    if public_key is None:
+        raise ValueError("Derived key is the point at infinity")
+    return public_key, chain, total_tweak
+
+def derive_share(secret_share, total_tweak):
+    """A device's share of the child key from its share of the parent"""
+    return (secret_share + total_tweak) % N
+
+def eth_address(public_key):
+    """Checksummed Ethereum address of a public key point"""
+    x, y = public_key
+    return to_checksum_address(keccak(x.to_bytes(32, 'big') + y.to_bytes(32, 'big'))[-20:])
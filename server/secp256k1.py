@@ -0,0 +1,328 @@
+"""Pure-Python secp256k1 point arithmetic
+
+Points are affine (x, y) tuples of ints, with None standing for the point
+at infinity. Internally all arithmetic runs in Jacobian coordinates
+(X, Y, Z), with x = X / Z^2 and y = Y / Z^3, so a chain of additions and
+doublings needs a single field inversion at the end.
+
+- base_mult(k) uses a fixed-base comb table for G built once at import
+- scalar_mult(k, point) uses a width-w NAF for arbitrary points
+- multi_scalar_mult(scalars, points) computes sum(k_i * P_i) with Strauss
+  (interleaved wNAF) for small inputs and Pippenger buckets for large ones
+
+On the wire points are SEC1 compressed, 33 bytes or their 66-character
+hex in JSON. Decompressing costs a modular square root, so it goes
+through an LRU cache keyed by the encoding: a commitment or R_i that is
+referenced again in a later round is only decompressed once.
+
+client/secp256k1.py and server/secp256k1.py are identical copies because
+each Docker image only ships its own directory.
+"""
+
+from functools import lru_cache
+
+# Field prime, group order and generator
+P = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+G = (
+    0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+    0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8
+)
+
+# Comb parameters: COMB_TEETH bits of the scalar are consumed per addition,
+# spaced COMB_SPACING apart, for a table of 2^COMB_TEETH points
+COMB_TEETH = 8
+COMB_SPACING = 256 // COMB_TEETH
+
+# Window width for variable-base wNAF multiplication
+WNAF_WIDTH = 5
+
+# Multi-scalar multiplication: Strauss below this many terms, Pippenger above
+STRAUSS_WIDTH = 4
+PIPPENGER_THRESHOLD = 64
+
+# Decompressed points kept, keyed by their 33-byte encoding
+POINT_CACHE_SIZE = 4096
+
+def is_on_curve(point):
+    if point is None:
+        return True
+    x, y = point
+    return 0 <= x < P and 0 <= y < P and (y * y - x * x * x - 7) % P == 0
+
+def point_neg(point):
+    if point is None:
+        return None
+    return (point[0], -point[1] % P)
+
+def _to_jacobian(point):
+    return None if point is None else (point[0], point[1], 1)
+
+def _to_affine(jacobian):
+    if jacobian is None:
+        return None
+    X, Y, Z = jacobian
+    z_inv = pow(Z, -1, P)
+    z_inv2 = z_inv * z_inv % P
+    return (X * z_inv2 % P, Y * z_inv2 * z_inv % P)
+
+def _batch_to_affine(points):
+    """Normalize many Jacobian points with one shared inversion (Montgomery's trick)"""
+    prefix = []
+    acc = 1
+    for jacobian in points:
+        prefix.append(acc)
+        if jacobian is not None:
+            acc = acc * jacobian[2] % P
+    acc_inv = pow(acc, -1, P)
+    affine = [None] * len(points)
+    for i in range(len(points) - 1, -1, -1):
+        jacobian = points[i]
+        if jacobian is None:
+            continue
+        X, Y, Z = jacobian
+        z_inv = acc_inv * prefix[i] % P
+        acc_inv = acc_inv * Z % P
+        z_inv2 = z_inv * z_inv % P
+        affine[i] = (X * z_inv2 % P, Y * z_inv2 * z_inv % P)
+    return affine
+
+def _double(jacobian):
+    # dbl-2009-l, specialised for a = 0
+    if jacobian is None:
+        return None
+    X, Y, Z = jacobian
+    if Y == 0:
+        return None
+    A = X * X % P
+    B = Y * Y % P
+    C = B * B % P
+    D = 2 * ((X + B) * (X + B) - A - C) % P
+    E = 3 * A % P
+    X3 = (E * E - 2 * D) % P
+    Y3 = (E * (D - X3) - 8 * C) % P
+    Z3 = 2 * Y * Z % P
+    return (X3, Y3, Z3)
+
+def _add_affine(jacobian, point):
+    """Mixed addition of a Jacobian point and an affine point (madd-2007-bl)"""
+    if point is None:
+        return jacobian
+    if jacobian is None:
+        return _to_jacobian(point)
+    X1, Y1, Z1 = jacobian
+    x2, y2 = point
+    Z1Z1 = Z1 * Z1 % P
+    H = (x2 * Z1Z1 - X1) % P
+    r = 2 * (y2 * Z1 * Z1Z1 - Y1) % P
+    if H == 0:
+        return _double(jacobian) if r == 0 else None
+    HH = H * H % P
+    I = 4 * HH % P
+    J = H * I % P
+    V = X1 * I % P
+    X3 = (r * r - J - 2 * V) % P
+    Y3 = (r * (V - X3) - 2 * Y1 * J) % P
+    Z3 = ((Z1 + H) * (Z1 + H) - Z1Z1 - HH) % P
+    return (X3, Y3, Z3)
+
+def _add(j1, j2):
+    """Addition of two Jacobian points (add-2007-bl)"""
+    if j1 is None:
+        return j2
+    if j2 is None:
+        return j1
+    X1, Y1, Z1 = j1
+    X2, Y2, Z2 = j2
+    Z1Z1 = Z1 * Z1 % P
+    Z2Z2 = Z2 * Z2 % P
+    U1 = X1 * Z2Z2 % P
+    U2 = X2 * Z1Z1 % P
+    S1 = Y1 * Z2 * Z2Z2 % P
+    S2 = Y2 * Z1 * Z1Z1 % P
+    H = (U2 - U1) % P
+    r = 2 * (S2 - S1) % P
+    if H == 0:
+        return _double(j1) if r == 0 else None
+    I = 4 * H * H % P
+    J = H * I % P
+    V = U1 * I % P
+    X3 = (r * r - J - 2 * V) % P
+    Y3 = (r * (V - X3) - 2 * S1 * J) % P
+    Z3 = ((Z1 + Z2) * (Z1 + Z2) - Z1Z1 - Z2Z2) * H % P
+    return (X3, Y3, Z3)
+
+def point_add(p1, p2):
+    return _to_affine(_add_affine(_to_jacobian(p1), p2))
+
+def _build_comb_table():
+    # Tooth j sits at bit j * COMB_SPACING, so it contributes 2^(j * spacing) * G
+    teeth = []
+    tooth = _to_jacobian(G)
+    for _ in range(COMB_TEETH):
+        teeth.append(tooth)
+        for _ in range(COMB_SPACING):
+            tooth = _double(tooth)
+    teeth = _batch_to_affine(teeth)
+    # table[mask] = sum of the teeth whose bit is set in mask
+    table = [None]
+    for mask in range(1, 1 << COMB_TEETH):
+        low = mask & -mask
+        table.append(_add_affine(table[mask ^ low], teeth[low.bit_length() - 1]))
+    return _batch_to_affine(table)
+
+_COMB_TABLE = _build_comb_table()
+
+def base_mult(k):
+    """k * G using the precomputed comb table"""
+    k %= N
+    acc = None
+    for column in range(COMB_SPACING - 1, -1, -1):
+        acc = _double(acc)
+        mask = 0
+        for tooth in range(COMB_TEETH):
+            mask |= ((k >> (tooth * COMB_SPACING + column)) & 1) << tooth
+        if mask:
+            acc = _add_affine(acc, _COMB_TABLE[mask])
+    return _to_affine(acc)
+
+def _wnaf(k, width):
+    """Width-w non-adjacent form of k, least significant digit first"""
+    digits = []
+    window = 1 << width
+    half = window >> 1
+    while k:
+        if k & 1:
+            digit = k & (window - 1)
+            if digit >= half:
+                digit -= window
+            k -= digit
+        else:
+            digit = 0
+        digits.append(digit)
+        k >>= 1
+    return digits
+
+def _odd_multiples(point, width):
+    """[P, 3P, 5P, ..., (2^(w-1) - 1)P] in affine form"""
+    jacobian = _to_jacobian(point)
+    twice = _to_affine(_double(jacobian))
+    multiples = [jacobian]
+    for _ in range((1 << (width - 2)) - 1):
+        multiples.append(_add_affine(multiples[-1], twice))
+    return _batch_to_affine(multiples)
+
+def scalar_mult(k, point):
+    """k * point for an arbitrary point, via wNAF"""
+    k %= N
+    if k == 0 or point is None:
+        return None
+    if point == G:
+        return base_mult(k)
+    multiples = _odd_multiples(point, WNAF_WIDTH)
+    acc = None
+    for digit in reversed(_wnaf(k, WNAF_WIDTH)):
+        acc = _double(acc)
+        if digit > 0:
+            acc = _add_affine(acc, multiples[digit >> 1])
+        elif digit < 0:
+            acc = _add_affine(acc, point_neg(multiples[-digit >> 1]))
+    return _to_affine(acc)
+
+def _strauss(scalars, points):
+    """Interleaved wNAF: one shared doubling chain for every term"""
+    nafs = [_wnaf(k, STRAUSS_WIDTH) for k in scalars]
+    # Odd multiples of every point, normalized together with one inversion
+    per_point = 1 << (STRAUSS_WIDTH - 2)
+    jacobians = []
+    for point in points:
+        multiple = _to_jacobian(point)
+        twice = _double(multiple)
+        jacobians.append(multiple)
+        for _ in range(per_point - 1):
+            multiple = _add(multiple, twice)
+            jacobians.append(multiple)
+    affine = _batch_to_affine(jacobians)
+    tables = [affine[i:i + per_point] for i in range(0, len(affine), per_point)]
+    
+    acc = None
+    for position in range(max(len(naf) for naf in nafs) - 1, -1, -1):
+        acc = _double(acc)
+        for naf, table in zip(nafs, tables):
+            if position >= len(naf):
+                continue
+            digit = naf[position]
+            if digit > 0:
+                acc = _add_affine(acc, table[digit >> 1])
+            elif digit < 0:
+                acc = _add_affine(acc, point_neg(table[-digit >> 1]))
+    return acc
+
+def _pippenger(scalars, points):
+    """Bucket method: per window, sort points into buckets by digit and sum the buckets"""
+    window = max(2, len(points).bit_length() - 3)
+    mask = (1 << window) - 1
+    acc = None
+    for shift in range(((256 + window - 1) // window - 1) * window, -1, -window):
+        for _ in range(window):
+            acc = _double(acc)
+        buckets = [None] * (mask + 1)
+        for k, point in zip(scalars, points):
+            digit = (k >> shift) & mask
+            if digit:
+                buckets[digit] = _add_affine(buckets[digit], point)
+        # sum(d * bucket[d]) via running sums, highest bucket first
+        running = None
+        window_sum = None
+        for digit in range(mask, 0, -1):
+            running = _add(running, buckets[digit])
+            window_sum = _add(window_sum, running)
+        acc = _add(acc, window_sum)
+    return acc
+
+def multi_scalar_mult(scalars, points):
+    """sum(k_i * P_i) over all terms, sharing the doubling work between them"""
+    terms = [
+        (k % N, point) for k, point in zip(scalars, points)
+        if point is not None and k % N
+    ]
+    if not terms:
+        return None
+    scalars, points = zip(*terms)
+    if len(terms) < PIPPENGER_THRESHOLD:
+        return _to_affine(_strauss(scalars, points))
+    return _to_affine(_pippenger(scalars, points))
+
+def point_to_bytes(point):
+    """33-byte SEC1 compressed encoding: 0x02 or 0x03 by the parity of y, then x"""
+    return bytes([2 + (point[1] & 1)]) + point[0].to_bytes(32, 'big')
+
+@lru_cache(maxsize=POINT_CACHE_SIZE)
+def point_from_bytes(data):
+    """Parse a SEC1 compressed point, recovering y with a modular square root"""
+    if len(data) != 33 or data[0] not in (2, 3):
+        raise ValueError("Expected a 33-byte compressed point")
+    x = int.from_bytes(data[1:], 'big')
+    if x >= P:
+        raise ValueError("Point is not on secp256k1")
+    # P = 3 mod 4, so a square root is a single exponentiation
+    y_squared = (x * x * x + 7) % P
+    y = pow(y_squared, (P + 1) // 4, P)
+    if y * y % P != y_squared:
+        raise ValueError("Point is not on secp256k1")
+    if (y & 1) != data[0] - 2:
+        y = P - y
+    return (x, y)
+
+def point_to_json(point):
+    """Hex of the compressed encoding, e.g. '02' + 64 hex digits"""
+    return point_to_bytes(point).hex()
+
+def point_from_json(data):
+    """Parse a compressed hex point, or a legacy {'x': int, 'y': int} one, rejecting anything off the curve"""
+    if isinstance(data, str):
+        return point_from_bytes(bytes.fromhex(data))
+    point = (int(data['x']), int(data['y']))
+    if not is_on_curve(point):
+        raise ValueError("Point is not on secp256k1")
+    return point
@@ -1,5 +1,7 @@
-from flask import Flask, request, jsonify
-from cryptography.hazmat.primitives import serialization
+import flask
+from flask import Flask, Request, Response, request
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import ec
 import base64
 import json
@@ -8,16 +10,29 @@ from eth_account import Account
 from eth_account._utils.structured_data.hashing import hash_message
 from eth_hash.auto import keccak
 from flask_cors import CORS
+from werkzeug.exceptions import BadRequest
+from werkzeug.serving import WSGIRequestHandler
 import secrets
 from eth_utils import to_bytes, to_hex, decode_hex, encode_hex
 import sys
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from eth_account import Account
 from eth_account._utils.legacy_transactions import (
     serializable_unsigned_transaction_from_dict,
     encode_transaction
 )
 from termcolor import colored
+from secp256k1 import point_add, point_from_json, point_to_json, scalar_mult
+from store import StateStore, PersistentDict, StripeLock
+import batch_auth
+import derivation
+import wire
 
 # Load config first
 with open('config.json', 'r') as f:
@@ -31,21 +46,58 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class WireRequest(Request):
+    """Request whose get_json() (and so .json) also parses the binary wire format"""
+
+    def get_json(self, force=False, silent=False, cache=True):
+        if self.mimetype != wire.MIMETYPE:
+            try:
+                return super().get_json(force=force, silent=silent, cache=cache)
+            except RecursionError:
+                # json's own nesting limit is the interpreter's recursion limit
+                if silent:
+                    return None
+                raise BadRequest("JSON body nested too deeply")
+        try:
+            return wire.decode(self.get_data(cache=cache))
+        except ValueError as e:
+            if silent:
+                return None
+            raise BadRequest(f"Malformed {wire.MIMETYPE} body: {e}")
+
 app = Flask(__name__)
+app.request_class = WireRequest
 CORS(app)
 
+def jsonify(*args, **kwargs):
+    """flask.jsonify, or the binary wire format when the request's Accept header prefers it"""
+    if request.accept_mimetypes.best_match(['application/json', wire.MIMETYPE]) == wire.MIMETYPE:
+        return Response(wire.encode(args[0] if args else kwargs), mimetype=wire.MIMETYPE)
+    return flask.jsonify(*args, **kwargs)
+
+@app.after_request
+def drain_request_body(response):
+    """Read any body the handler skipped (404s, early errors) so the next request on a keep-alive connection parses cleanly"""
+    request.get_data()
+    return response
+
 # Ensure Flask's logger also uses DEBUG level
 app.logger.setLevel(logging.DEBUG)
 for handler in app.logger.handlers:
     handler.setLevel(logging.DEBUG)
 
+# Coordinator state lives in SQLite so restarts and extra workers see in-flight ceremonies
+state_store = StateStore(SERVER_CONFIG.get('state_db', 'coordinator.db'))
+state_locks = StripeLock(f"{state_store.path}.lock")
+
 # Configuration
-transactions = []  # Store pending transactions
-partial_signatures = {}
+partial_signatures = PersistentDict(state_store, 'partial_signatures')
 backup_ciphertext = None  # Store encrypted key
 
 # Store enrolled devices & their public keys
-enrolled_devices = {}  
+enrolled_devices = PersistentDict(state_store, 'enrolled_devices')
+# Child EOAs derived from a DKG's group key: {"dkg_session_id/eth_address": {"dkg_session_id", "path", "public_key"}}
+derived_keys = PersistentDict(state_store, 'derived_keys')
 commitments = {}  
 shares = {}  
 private_shares = {}  # device_id -> ki
@@ -65,20 +117,386 @@ CURVE = ec.SECP256K1()
 # SECP256K1 curve order (n)
 CURVE_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
 
-# Storage
-dkg_shares = {}  # {device_id: {"commitments": [], "shares": {}}}
-dkg_round = 0
-signing_data = {
-    "commitments": {},  # {device_id: {"R_i": point, "Gamma_i": point}}
-    "mta_values": {},  # {from_device: {to_device: delta_ij}}
-    "sig_shares": {},  # {device_id: sigma_i}
-    "R": None,  # Combined R value
-    "message_hash": None
-}
+# Signing and presign sessions, and signing requests, untouched for this many seconds are dropped
+SIGNING_SESSION_TTL = 3600
+PRUNE_INTERVAL = 60
+
+# Seconds a ceremony round waits for its slowest device before stragglers are excluded
+ROUND_TIMEOUT = 30
+# How often the reaper looks for rounds past their deadline
+REAPER_INTERVAL = 1.0
+# Weight of the newest sample in each device's response-time average
+LATENCY_EWMA_ALPHA = 0.3
+
+# Signature finalization (EC math, RLP encoding, logging) runs on this many
+# worker threads, with at most FINALIZE_MAX_PENDING jobs queued or running
+FINALIZE_WORKERS = 4
+FINALIZE_MAX_PENDING = 64
+# Longest a /signing/result request is held open, and how often it re-reads the store
+RESULT_WAIT_MAX = 30
+RESULT_POLL_INTERVAL = 0.5
+
+# Most keys one batch DKG may generate, and most transactions one batch signing ceremony may sign
+MAX_BATCH_KEYS = 10000
+MAX_SIGNING_BATCH = 1000
+
+# Queued signing requests are dispatched as one ceremony once this many are
+# waiting for a signer group, or once the oldest has waited this many seconds
+SIGNING_QUEUE_BATCH_SIZE = SERVER_CONFIG.get('signing_batch_size', 32)
+# seconds; the dispatcher ticks at a quarter of the window, so it is kept above a floor
+SIGNING_QUEUE_MIN_WINDOW = 0.02
+SIGNING_QUEUE_WINDOW = max(SERVER_CONFIG.get('signing_batch_window', 0.25), SIGNING_QUEUE_MIN_WINDOW)
+
+# Events kept per device for reconnecting clients to catch up on
+DEVICE_EVENT_BACKLOG = 100
+# Longest an event long-poll is held open, how often waiters re-read the
+# store for events published by other workers, and the SSE keepalive period
+EVENT_WAIT_MAX = 30
+EVENT_POLL_INTERVAL = 0.5
+SSE_KEEPALIVE = 15
+
+# Reject unsigned /signing/* and /presign/submit requests; signed ones are always checked
+REQUIRE_REQUEST_AUTH = SERVER_CONFIG.get('require_request_auth', False)
+# Batch roots remembered as verified, so further requests in a round skip the ECDSA check
+VERIFIED_ROOT_CACHE_SIZE = 4096
+
+class CeremonyRegistry:
+    """DKG, presign and signing ceremonies keyed by session ID, persisted in the state store"""
+
+    def __init__(self, store, locks):
+        self._store = store
+        self._locks = locks
+        self._sessions = {
+            kind: PersistentDict(store, f"{kind}_sessions")
+            for kind in ('dkg', 'presign', 'signing')
+        }
+        self._dkg_by_eoa = PersistentDict(store, 'dkg_by_eoa')  # {target_eoa: dkg session_id}
+        self._deadlines = PersistentDict(store, 'round_deadlines')  # {session_id: {"kind", "deadline"}}
+        self._last_prune = 0
+
+    def create(self, kind, round_name, round_timeout=None, **state):
+        """Register a new ceremony of the given kind ('dkg', 'presign' or 'signing')
+
+        The ceremony opens in round `round_name`, which has to finish within
+        round_timeout seconds (ROUND_TIMEOUT by default).
+        """
+        session_id = f"{kind}_{secrets.token_hex(8)}"
+        session = {
+            'session_id': session_id,
+            'kind': kind,
+            'status': 'in_progress',
+            'created_at': time.time(),
+            'excluded': [],  # devices dropped for missing a round deadline
+            'round_timeout': round_timeout or ROUND_TIMEOUT,
+            **state
+        }
+        self.start_round(session, round_name)
+        self._prune()
+        self._sessions[kind][session_id] = session
+        if kind == 'dkg' and session['target_eoa']:
+            self._dkg_by_eoa[session['target_eoa']] = session_id
+        self._sync_deadline(session)
+        self._store.flush()
+        return session
+
+    def start_round(self, session, round_name):
+        """Enter a round and restart the session's deadline clock"""
+        now = time.time()
+        session['round'] = round_name
+        session['round_started_at'] = now
+        session['deadline'] = now + session['round_timeout']
+
+    def _sync_deadline(self, session):
+        """Keep the deadline index, which the reaper scans, in step with the session"""
+        session_id = session['session_id']
+        if session['status'] in ('in_progress', 'finalizing'):
+            entry = {'kind': session['kind'], 'deadline': session['deadline']}
+            if self._deadlines.get(session_id) != entry:
+                self._deadlines[session_id] = entry
+        elif session_id in self._deadlines:
+            del self._deadlines[session_id]
+
+    def expired_rounds(self):
+        """(session_id, kind) of every in-progress or finalizing round whose deadline has passed"""
+        now = time.time()
+        expired = []
+        for session_id in self._deadlines:
+            entry = self._deadlines.get(session_id)
+            if entry and entry['deadline'] <= now:
+                expired.append((session_id, entry['kind']))
+        return expired
+
+    def forget_deadline(self, session_id):
+        self._deadlines.pop(session_id, None)
+
+    def get(self, session_id, kind):
+        """Look up a ceremony, returning None if it is unknown or of another kind"""
+        if not session_id or kind not in self._sessions:
+            return None
+        return self._sessions[kind].get(session_id)
+
+    @contextmanager
+    def lock(self, session, save=True):
+        """Serialize updates to one ceremony across threads and worker processes
+
+        The session dict is refreshed in place from the store on entry, in
+        case another worker changed it, and written back on exit. If the
+        body raises, its partial changes are discarded: the cached entry is
+        dropped and the dict reloaded from the store.
+        """
+        session_id = session['session_id']
+        with self._locks(session_id):
+            latest = self.get(session_id, session['kind'])
+            if latest is not None and latest is not session:
+                session.clear()
+                session.update(latest)
+            try:
+                yield
+            except BaseException:
+                self._sessions[session['kind']].invalidate(session_id)
+                stored = self.get(session_id, session['kind'])
+                if stored is not None:
+                    session.clear()
+                    session.update(stored)
+                raise
+            if save:
+                self._sessions[session['kind']][session_id] = session
+                self._sync_deadline(session)
+                self._store.flush()
+
+    def dkg_for_eoa(self, target_eoa):
+        """Most recent DKG session that generated key material for an EOA"""
+        return self.get(self._dkg_by_eoa.get(target_eoa), 'dkg')
+
+    def _prune(self):
+        if time.time() - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = time.time()
+        for kind in ('presign', 'signing'):
+            expired = self._store.expire(f"{kind}_sessions", SIGNING_SESSION_TTL)
+            if kind == 'signing':
+                for session in expired.values():
+                    settle_expired_session(session)
+
+ceremonies = CeremonyRegistry(state_store, state_locks)
+
+class DeviceLatency:
+    """Exponentially weighted response time per device, used to rank signers
+
+    Updates are not locked: a sample lost to a concurrent update only
+    nudges one average, which the ranking tolerates.
+    """
+
+    def __init__(self, store):
+        self._latency = PersistentDict(store, 'device_latency')  # {device_id: seconds}
+
+    def record(self, device_id, seconds):
+        previous = self._latency.get(device_id)
+        if previous is not None:
+            seconds = LATENCY_EWMA_ALPHA * seconds + (1 - LATENCY_EWMA_ALPHA) * previous
+        self._latency[device_id] = seconds
+
+    def record_response(self, device_id, session):
+        """Sample the time from the start of the session's current round until now"""
+        self.record(device_id, time.time() - session['round_started_at'])
+
+    def rank(self, device_ids):
+        """Fastest first; devices without history go first so they get measured"""
+        return sorted(device_ids, key=lambda device_id: self._latency.get(device_id, 0.0))
+
+device_latency = DeviceLatency(state_store)
+
+class DeviceEvents:
+    """Per-device feed of ceremony events, served over SSE and long-poll
+
+    Each device's feed keeps its last DEVICE_EVENT_BACKLOG events, numbered
+    by a per-device sequence, so a client resumes from the last ID it saw.
+    Feeds use their own lock file, so publishing while a session lock is
+    held cannot collide with a session's lock stripe.
+    """
+
+    def __init__(self, store, locks):
+        self._store = store
+        self._locks = locks
+        self._feeds = PersistentDict(store, 'device_events')  # {device_id: {"seq", "events"}}
+        self._changed = threading.Condition()
+
+    def publish(self, device_ids, event_type, **payload):
+        now = time.time()
+        for device_id in device_ids:
+            with self._locks(device_id):
+                feed = self._feeds.get(device_id) or {'seq': 0, 'events': []}
+                seq = feed['seq'] + 1
+                event = {'id': seq, 'type': event_type, 'time': now, **payload}
+                self._feeds[device_id] = {
+                    'seq': seq,
+                    'events': (feed['events'] + [event])[-DEVICE_EVENT_BACKLOG:]
+                }
+        self._store.flush()
+        with self._changed:
+            self._changed.notify_all()
+
+    def since(self, device_id, cursor):
+        """Events after `cursor`, oldest first"""
+        feed = self._feeds.get(device_id)
+        if not feed:
+            return []
+        return [event for event in feed['events'] if event['id'] > cursor]
+
+    def wait(self, device_id, cursor, timeout):
+        """Block until the device has events after `cursor`, or timeout"""
+        deadline = time.time() + timeout
+        while True:
+            with self._changed:
+                events = self.since(device_id, cursor)
+                remaining = deadline - time.time()
+                if events or remaining <= 0:
+                    return events
+                # Another worker process may publish, so re-read the store now and then
+                self._changed.wait(min(remaining, EVENT_POLL_INTERVAL))
+
+device_events = DeviceEvents(state_store, StripeLock(f"{state_store.path}.events.lock"))
+
+# Presignature pool sizing: devices are asked to refill once an EOA's pool
+# drops below the low watermark
+PRESIGNATURE_LOW_WATERMARK = 4
+PRESIGNATURE_BATCH_SIZE = 16
 
-# Global state
-dkg_state = None
-signing_state = None
+class PresignaturePool:
+    """Pool of presignatures produced by the offline signing phase
+
+    Pools are keyed by DKG session: a presignature is only usable by the
+    signer group that dealt it, and several groups may hold keys for the
+    same EOA.
+    """
+
+    def __init__(self, store, locks):
+        self._store = store
+        self._locks = locks
+        self._pools = PersistentDict(store, 'presignatures')  # {dkg_session_id: [presignature]}
+
+    def add(self, dkg_session_id, presignatures):
+        with self._locks(f"presignatures:{dkg_session_id}"):
+            self._pools[dkg_session_id] = self._pools.get(dkg_session_id, []) + presignatures
+            self._store.flush()
+
+    def take(self, dkg_session_id):
+        """Remove and return the oldest presignature for a DKG session, or None if the pool is empty"""
+        with self._locks(f"presignatures:{dkg_session_id}"):
+            pool = self._pools.get(dkg_session_id)
+            if not pool:
+                return None
+            self._pools[dkg_session_id] = pool[1:]
+            self._store.flush()
+            return pool[0]
+
+    def available(self, dkg_session_id):
+        return len(self._pools.get(dkg_session_id, ()))
+
+    def refill_needed(self, dkg_session_id):
+        """Number of presignatures devices should generate to top the pool back up"""
+        available = self.available(dkg_session_id)
+        if available >= PRESIGNATURE_LOW_WATERMARK:
+            return 0
+        return PRESIGNATURE_BATCH_SIZE - available
+
+presignature_pool = PresignaturePool(state_store, state_locks)
+
+class NonceAllocator:
+    """Per-EOA transaction nonces, so concurrent and batched ceremonies never share one
+
+    Each EOA tracks its next fresh nonce, the nonces held by ceremonies
+    still in flight, the highest nonce signed, and gaps: nonces below
+    `next` whose ceremony failed. Gaps are handed out again before fresh
+    nonces, since every later transaction is stuck until they are mined.
+    Uses its own lock file, as nonces are released while a session lock is
+    held.
+    """
+
+    def __init__(self, store, locks):
+        self._store = store
+        self._locks = locks
+        self._eoas = PersistentDict(store, 'nonces')  # {eth_address: {"next", "pending", "gaps", "signed"}}
+
+    def _update(self, eth_address, change):
+        """Apply change(state) to an EOA's state under its lock; returns change's result"""
+        with self._locks(eth_address):
+            state = self.state(eth_address)
+            result = change(state)
+            # A gap just below `next` is simply unused
+            while state['gaps'] and state['gaps'][-1] == state['next'] - 1:
+                state['gaps'].pop()
+                state['next'] -= 1
+            self._eoas[eth_address] = state
+            self._store.flush()
+            return result
+
+    def allocate(self, eth_address, count=1):
+        """Claim `count` nonces, lowest first, filling gaps before fresh nonces"""
+        def change(state):
+            nonces = state['gaps'][:count]
+            state['gaps'] = state['gaps'][count:]
+            fresh = count - len(nonces)
+            nonces += range(state['next'], state['next'] + fresh)
+            state['next'] += fresh
+            state['pending'] = sorted(state['pending'] + nonces)
+            return nonces
+        return self._update(eth_address, change)
+
+    def reserve(self, eth_address, nonce):
+        """Claim a caller-chosen nonce; False if another ceremony holds it or it has been signed"""
+        def change(state):
+            if nonce < state['next'] and nonce not in state['gaps']:
+                return False
+            if nonce in state['gaps']:
+                state['gaps'].remove(nonce)
+            else:
+                # Skipped-over nonces are gaps until someone fills them
+                state['gaps'] += range(state['next'], nonce)
+                state['next'] = nonce + 1
+            state['pending'] = sorted(state['pending'] + [nonce])
+            return True
+        return self._update(eth_address, change)
+
+    def release(self, eth_address, nonces):
+        """Return the nonces of a failed ceremony"""
+        def change(state):
+            released = [nonce for nonce in nonces if nonce in state['pending']]
+            state['pending'] = [nonce for nonce in state['pending'] if nonce not in released]
+            state['gaps'] = sorted(state['gaps'] + released)
+        self._update(eth_address, change)
+
+    def confirm(self, eth_address, nonces):
+        """Mark nonces used by a signed transaction"""
+        def change(state):
+            state['pending'] = [nonce for nonce in state['pending'] if nonce not in nonces]
+            state['signed'] = max([state['signed'], *nonces])
+        self._update(eth_address, change)
+
+    def reset(self, eth_address, next_nonce, force=False):
+        """Resynchronize with the chain's transaction count, dropping gaps it has passed
+
+        A count below a nonce already signed (e.g. a transaction not yet
+        mined) is refused, returning False, unless forced; those nonces then
+        become gaps to sign again. Nonces of ceremonies in flight are never
+        handed out twice.
+        """
+        def change(state):
+            if next_nonce <= state['signed'] and not force:
+                return False
+            state['next'] = max(next_nonce, max(state['pending'], default=-1) + 1)
+            state['signed'] = min(state['signed'], next_nonce - 1)
+            state['gaps'] = [nonce for nonce in state['gaps'] if nonce >= next_nonce]
+            state['gaps'] += [nonce for nonce in range(next_nonce, state['next'])
+                              if nonce not in state['pending'] and nonce not in state['gaps']]
+            state['gaps'].sort()
+            return True
+        return self._update(eth_address, change)
+
+    def state(self, eth_address):
+        return {'next': 0, 'pending': [], 'gaps': [], 'signed': -1, **(self._eoas.get(eth_address) or {})}
+
+nonces = NonceAllocator(state_store, StripeLock(f"{state_store.path}.nonces.lock"))
 
 # Test EOAs that we want to generate signatures for
 TEST_EOAS = [
@@ -91,7 +509,7 @@ TEST_TRANSACTIONS = {
     "0x742d35Cc6634C0532925a3b844Bc454e4438f44e": {
         "to": decode_hex("0x742d35Cc6634C0532925a3b844Bc454e4438f44f"),  # Convert to bytes
         "value": 1000000000000000000,  # 1 ETH in wei (as int)
-        "nonce": 0,  # as int
+        "nonce": 0,  # as int; /signing/start allocates the real one
         "gasPrice": 20000000000,  # 20 Gwei (as int)
         "gas": 21000,  # as int
         "chainId": 1,  # Mainnet
@@ -99,6 +517,91 @@ TEST_TRANSACTIONS = {
     }
 }
 
+def parse_share_index(device_id):
+    """Fallback share index for devices that did not send one: device_3 -> 3"""
+    return int(device_id.rsplit('_', 1)[1])
+
+def signer_mask(share_indices):
+    """Bitmask identifying a signer subset by its share indices"""
+    mask = 0
+    for index in share_indices:
+        mask |= 1 << index
+    return mask
+
+@lru_cache(maxsize=4096)
+def lagrange_coefficients(mask):
+    """{share_index: lambda_i} interpolating at 0 over the signer subset in `mask`
+
+    lambda_i = prod(j / (j - i)) over the other signers j. All denominators
+    are inverted with a single modular inversion, and the result is cached
+    per subset so repeat quorums cost a dict lookup.
+    """
+    indices = [i for i in range(mask.bit_length()) if mask >> i & 1]
+    numerators = []
+    denominators = []
+    for i in indices:
+        numerator = 1
+        denominator = 1
+        for j in indices:
+            if j != i:
+                numerator = numerator * j % CURVE_ORDER
+                denominator = denominator * (j - i) % CURVE_ORDER
+        numerators.append(numerator)
+        denominators.append(denominator)
+    
+    # Montgomery's trick: invert the product once, then peel off each factor
+    prefix = [1]
+    for denominator in denominators:
+        prefix.append(prefix[-1] * denominator % CURVE_ORDER)
+    inverse = pow(prefix[-1], -1, CURVE_ORDER)
+    coefficients = {}
+    for position in range(len(indices) - 1, -1, -1):
+        denominator_inv = inverse * prefix[position] % CURVE_ORDER
+        inverse = inverse * denominators[position] % CURVE_ORDER
+        coefficients[indices[position]] = numerators[position] * denominator_inv % CURVE_ORDER
+    return coefficients
+
+def valid_points(points):
+    """Whether every point decodes onto the curve
+
+    Decoding at submission also warms the decompression cache for the
+    rounds that use the points later.
+    """
+    try:
+        for point in points:
+            point_from_json(point)
+    except (ValueError, KeyError, TypeError):
+        return False
+    return True
+
+def aggregate_points(points):
+    """Sum of JSON-encoded points, e.g. Gamma = sum(Gamma_i)"""
+    total = None
+    for point in points:
+        total = point_add(total, point_from_json(point))
+    return total
+
+def quorum_coefficients(dkg_session, device_ids):
+    """{device_id: hex lambda_i} interpolating the group key at 0 over a signer subset
+
+    Each signer weights its key share x_i by lambda_i, so any `threshold`
+    devices hold additive shares of the key x.
+    """
+    share_indices = {
+        device_id: dkg_session.get('share_indices', {}).get(device_id) or parse_share_index(device_id)
+        for device_id in device_ids
+    }
+    coefficients = lagrange_coefficients(signer_mask(share_indices.values()))
+    return {device_id: hex(coefficients[share_indices[device_id]]) for device_id in device_ids}
+
+def combine_nonce(deltas, gamma_points):
+    """R = delta^-1 * sum(Gamma_i) = k^-1 * G, from every signer's delta_i and Gamma_i
+
+    delta = sum(delta_i) = k * gamma is safe to open, as gamma masks k.
+    """
+    delta = sum(int(delta_i, 16) for delta_i in deltas) % CURVE_ORDER
+    return scalar_mult(pow(delta, -1, CURVE_ORDER), aggregate_points(gamma_points))
+
 def format_tx_for_json(tx):
     """Convert transaction values to hex strings for JSON"""
     return {
@@ -111,37 +614,199 @@ def format_tx_for_json(tx):
         "data": to_hex(tx["data"])
     }
 
-# Utility: Hash Ethereum transactions
-def hash_transaction(tx_data):
-    tx_json = json.dumps(tx_data, sort_keys=True).encode()
-    return keccak(tx_json)
+def build_signed_transaction(raw_tx, r, s, v):
+    """Attach (v, r, s) to a transaction, returning its JSON form and serialized hex"""
+    signed_tx = {
+        **format_tx_for_json(raw_tx),
+        "r": hex(r),
+        "s": hex(s),
+        "v": hex(v)
+    }
+    tx_unsigned = serializable_unsigned_transaction_from_dict(raw_tx)
+    tx_signed = encode_transaction(tx_unsigned, vrs=(v, r, s))
+    return signed_tx, encode_hex(tx_signed)
+
+def parse_transaction(tx):
+    """Raw legacy transaction from its JSON form (hex or int quantities), raising ValueError/KeyError if malformed
+
+    The nonce is None when left out, for the NonceAllocator to fill in.
+    """
+    def quantity(value):
+        return int(value, 16) if isinstance(value, str) else int(value)
+    return {
+        "to": decode_hex(tx["to"]),
+        "value": quantity(tx.get("value", 0)),
+        "nonce": quantity(tx["nonce"]) if tx.get("nonce") is not None else None,
+        "gasPrice": quantity(tx["gasPrice"]),
+        "gas": quantity(tx["gas"]),
+        "chainId": quantity(tx.get("chainId", 1)),
+        "data": decode_hex(tx.get("data", "0x"))
+    }
+
+def transaction_signing_hash(raw_tx):
+    """The hash a transaction's ECDSA signature covers"""
+    return encode_hex(serializable_unsigned_transaction_from_dict(raw_tx).hash())
+
+def ethereum_signature(R, s, chain_id):
+    """(r, s, v) from the nonce point and summed shares: low s (EIP-2) and v = chainId * 2 + 35 + parity (EIP-155)"""
+    r = R[0] % CURVE_ORDER
+    parity = R[1] % 2
+    if s > CURVE_ORDER // 2:
+        # -s is the same signature with the recovery point's y flipped
+        s, parity = CURVE_ORDER - s, parity ^ 1
+    return r, s, chain_id * 2 + 35 + parity
+
+def signed_by(serialized_tx, eth_address):
+    """Whether a serialized transaction's signature recovers to eth_address"""
+    try:
+        return Account.recover_transaction(serialized_tx) == eth_address
+    except Exception:
+        return False
+
+def parse_device_public_key(public_key_pem):
+    """Load an enclave public key from PEM, raising ValueError unless it is an EC key"""
+    public_key = serialization.load_pem_public_key(public_key_pem.encode())
+    if not isinstance(public_key, ec.EllipticCurvePublicKey):
+        raise ValueError("Device keys must be EC public keys")
+    return public_key
+
+class DeviceKeyCache:
+    """Enrolled devices' public keys, parsed once per enrollment
+
+    Each entry remembers the PEM it was parsed from, so a re-enrollment,
+    in this or another worker process, is noticed by comparing strings
+    and only then re-parsed.
+    """
+
+    def __init__(self, enrolled):
+        self._enrolled = enrolled
+        self._keys = {}  # {device_id: (public_key_pem, public key object)}
+
+    def enroll(self, device_id, public_key_pem):
+        public_key = parse_device_public_key(public_key_pem)
+        self._enrolled[device_id] = {'public_key': public_key_pem, 'enrolled_at': time.time()}
+        self._keys[device_id] = (public_key_pem, public_key)
+
+    def get(self, device_id):
+        """Parsed public key of an enrolled device, or None"""
+        record = self._enrolled.get(device_id)
+        if record is None:
+            self._keys.pop(device_id, None)
+            return None
+        cached = self._keys.get(device_id)
+        if cached and cached[0] == record['public_key']:
+            return cached[1]
+        try:
+            public_key = parse_device_public_key(record['public_key'])
+        except ValueError:
+            return None
+        self._keys[device_id] = (record['public_key'], public_key)
+        return public_key
+
+device_keys = DeviceKeyCache(enrolled_devices)
+
+class BatchAuthenticator:
+    """Verifies requests authenticated by a signed Merkle root (see batch_auth)
+
+    A root is verified with ECDSA once and then remembered against the
+    parsed key object it was checked with; re-enrolling replaces that
+    object, which invalidates every root signed with the old key.
+    """
+
+    def __init__(self, keys, max_roots):
+        self._keys = keys
+        self._max_roots = max_roots
+        self._verified = OrderedDict()  # {(device_id, root): public key object}
+        self._lock = threading.Lock()
+
+    def verify_root(self, device_id, root, signature):
+        public_key = self._keys.get(device_id)
+        if public_key is None:
+            return False
+        with self._lock:
+            if self._verified.get((device_id, root)) is public_key:
+                self._verified.move_to_end((device_id, root))
+                return True
+        try:
+            public_key.verify(
+                base64.b64decode(signature),
+                batch_auth.root_signing_payload(root),
+                ec.ECDSA(hashes.SHA256())
+            )
+        except (InvalidSignature, ValueError):
+            return False
+        with self._lock:
+            self._verified[(device_id, root)] = public_key
+            if len(self._verified) > self._max_roots:
+                self._verified.popitem(last=False)
+        return True
+
+    def verify(self, device_id, messages, auth):
+        """Check that a device's signed root covers every one of the messages
+
+        auth is {"root", "signature"} plus, when the request carries only
+        part of the signed batch, "proofs" holding one inclusion proof per
+        message. Without proofs the messages must be the whole batch.
+        """
+        try:
+            root = bytes.fromhex(auth['root'])
+            if 'proofs' in auth:
+                if len(auth['proofs']) != len(messages):
+                    return False
+                included = all(
+                    batch_auth.root_from_proof(message, proof) == root
+                    for message, proof in zip(messages, auth['proofs'])
+                )
+            else:
+                included = batch_auth.merkle_root(messages) == root
+        except (KeyError, TypeError, ValueError):
+            return False
+        return included and self.verify_root(device_id, root, auth['signature'])
+
+request_auth = BatchAuthenticator(device_keys, VERIFIED_ROOT_CACHE_SIZE)
+
+def authenticate_request(device_id, messages, auth):
+    """Error response for a request that fails batch authentication, or None to proceed"""
+    if auth is None:
+        if REQUIRE_REQUEST_AUTH:
+            return jsonify({'error': 'Request must be signed'}), 401
+        return None
+    if not request_auth.verify(device_id, messages, auth):
+        return jsonify({'error': 'Invalid request signature'}), 401
+    return None
 
 # Utility: Verify request signature
 def verify_signature(device_id, request_data, signature):
     """Verify that the request was signed with the iPhone's private key"""
-    if device_id not in enrolled_devices:
+    public_key = device_keys.get(device_id)
+    if public_key is None:
         return False
-
-    public_key_pem = enrolled_devices[device_id]["public_key"]
     try:
-        # Debug logging to see what we're receiving
-        print(f"Received PEM: {public_key_pem}")
-        
-        # Ensure PEM is properly formatted and encoded
-        if not public_key_pem.startswith('-----BEGIN PUBLIC KEY-----'):
-            return False
-            
-        public_key = serialization.load_pem_public_key(public_key_pem.encode())
         public_key.verify(
             base64.b64decode(signature),
             request_data.encode(),
             ec.ECDSA(hashes.SHA256())
         )
         return True
-    except Exception as e:
-        print(f"Signature verification failed: {e}")
+    except (InvalidSignature, ValueError) as e:
+        print(f"Signature verification failed for {device_id}: {e!r}")
         return False
 
+def verify_rotation(device_id, public_key_pem, signature):
+    """Whether the device's current key signed the hand-over to public_key_pem"""
+    public_key = device_keys.get(device_id)
+    if public_key is None or not signature:
+        return False
+    try:
+        public_key.verify(
+            base64.b64decode(signature),
+            batch_auth.rotation_signing_payload(device_id, public_key_pem),
+            ec.ECDSA(hashes.SHA256())
+        )
+    except (InvalidSignature, ValueError):
+        return False
+    return True
+
 # Utility: Generate an Ethereum key pair
 def generate_key_pair():
     private_key = ec.generate_private_key(ec.SECP256K1())
@@ -182,6 +847,34 @@ def enroll_device():
             
     return jsonify({'status': 'ok', 'device_id': device_id})
 
+@app.route('/enroll', methods=['POST'])
+def enroll_device_key():
+    """Register (or rotate) a device's enclave public key, used to verify its signed requests
+
+    A first registration needs the server's `enrollment_key`. Rotating to a
+    new key needs a `signature` by the current one over
+    batch_auth.rotation_signing_payload; re-sending the current key is a
+    no-op.
+    """
+    data = request.get_json(silent=True) or {}
+    device_id = data.get('device_id')
+    public_key_pem = data.get('public_key')
+    if not device_id or not public_key_pem:
+        return jsonify({'error': 'Missing device_id or public_key'}), 400
+    current = enrolled_devices.get(device_id)
+    if current is None:
+        if not secrets.compare_digest(str(data.get('enrollment_key', '')), SERVER_CONFIG['enrollment_key']):
+            return jsonify({'error': 'Invalid enrollment key'}), 401
+    elif current['public_key'] == public_key_pem:
+        return jsonify({'status': 'ok', 'device_id': device_id})
+    elif not verify_rotation(device_id, public_key_pem, data.get('signature')):
+        return jsonify({'error': 'Key rotation must be signed by the current key'}), 401
+    try:
+        device_keys.enroll(device_id, public_key_pem)
+    except ValueError:
+        return jsonify({'error': 'Invalid public key'}), 400
+    return jsonify({'status': 'ok', 'device_id': device_id})
+
 @app.route('/distribute_shares', methods=['POST'])
 def distribute_shares():
     data = request.json
@@ -226,17 +919,40 @@ def generate_public_key():
 
 @app.route('/request_txn_signature', methods=['POST'])
 def request_txn_signature():
-    """Request threshold signing from iPhones."""
-    data = request.json
+    """Queue a transaction for threshold signing by the iPhones
+
+    Takes the signer group (dkg_session_id or target_eoa), the transaction
+    as for /signing/batch, an optional integer `priority` (higher goes
+    first) and `urgent` to skip batching. Poll /signing/request for the
+    signed transaction.
+    """
+    data = request.get_json(silent=True) or {}
     transaction_data = data.get("transaction")
 
     if not transaction_data:
         return jsonify({"error": "No transaction data provided"}), 400
+    dkg_session = _resolve_dkg_session(data)
+    if not dkg_session or dkg_session['status'] != 'completed':
+        return jsonify({'error': 'DKG not initialized'}), 400
+    try:
+        (eth_address,), (raw_tx,) = prepare_batch(dkg_session, [transaction_data])
+        priority = int(data.get('priority', 0))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    # The dispatcher allocates missing nonces; a chosen one is claimed now so clashes surface here
+    transaction_data = {**transaction_data, 'from': eth_address}
+    if raw_tx['nonce'] is not None:
+        if not nonces.reserve(eth_address, raw_tx['nonce']):
+            return jsonify({'error': f"Nonce {raw_tx['nonce']} of {eth_address} is already in use"}), 400
+        transaction_data['nonce'] = hex(raw_tx['nonce'])
 
-    txn_hash = hash_transaction(transaction_data).hex()
-    transactions.append({"txn_hash": txn_hash, "transaction_data": transaction_data})
-
-    return jsonify({"message": "Transaction signature requested", "txn_hash": txn_hash})
+    record = signing_queue.submit(dkg_session, transaction_data, priority, bool(data.get('urgent')))
+    return jsonify({
+        "message": "Transaction signature requested",
+        "request_id": record['request_id'],
+        "status": record['status'],
+        "session_id": record['session_id']
+    })
 
 @app.route('/submit_partial_signature', methods=['POST'])
 def submit_partial_signature():
@@ -292,256 +1008,1025 @@ def recover_private_key():
 
 @app.route('/dkg/start', methods=['POST'])
 def start_dkg():
-    global dkg_state
-    target_eoa = "0x742d35Cc6634C0532925a3b844Bc454e4438f44e"
-    raw_tx = TEST_TRANSACTIONS[target_eoa]
-    display_tx = format_tx_for_json(raw_tx)
-    
-    dkg_state = {
-        'status': 'in_progress',
-        'commitments': {},
-        'shares': {},
-        'target_eoa': target_eoa,
-        'transaction': raw_tx,  # Store raw transaction
-        'display_transaction': display_tx  # Store display version
-    }
+    """Open a DKG; with key_count > 1 one ceremony generates that many independent keys"""
+    data = request.get_json(silent=True) or {}
+    key_count = int(data.get('key_count', 1))
+    if not 1 <= key_count <= MAX_BATCH_KEYS:
+        return jsonify({'error': f'key_count must be between 1 and {MAX_BATCH_KEYS}'}), 400
+    # The dealers may be named up front; otherwise the first dealer's recipients fix them
+    participants = data.get('participants')
+    total_signers = data.get('total_signers', len(participants) if participants else TOTAL_SIGNERS)
+    if participants is not None and (
+        not isinstance(participants, list) or not all(isinstance(device_id, str) for device_id in participants)
+        or len(set(participants)) != len(participants) or len(participants) != total_signers
+    ):
+        return jsonify({'error': 'participants must name total_signers distinct devices'}), 400
+    # A batch DKG's keys get their addresses from their group keys once it completes
+    target_eoa = "0x742d35Cc6634C0532925a3b844Bc454e4438f44e" if key_count == 1 else None
+    raw_tx = TEST_TRANSACTIONS[target_eoa] if target_eoa else None
+    display_tx = format_tx_for_json(raw_tx) if raw_tx else None
+    
+    session = ceremonies.create(
+        'dkg',
+        'dkg',
+        round_timeout=data.get('round_timeout'),
+        target_eoa=target_eoa,
+        key_count=key_count,
+        threshold=data.get('threshold', THRESHOLD),
+        total_signers=total_signers,
+        participants=sorted(participants) if participants else None,  # devices that deal and receive shares
+        # With key_count > 1 each dealer's entry is a vector with one element per key
+        commitments={},  # {device_id: [commitment points]}
+        shares={},  # {device_id: {recipient_id: share}}
+        share_indices={},  # {device_id: x-coordinate of its Shamir share}
+        submission_log=[],  # dealer IDs in submission order; its length is the session version
+        transaction=raw_tx,  # Store raw transaction
+        display_transaction=display_tx  # Store display version
+    )
     
     return jsonify({
         'status': 'ok', 
+        'session_id': session['session_id'],
         'target_eoa': target_eoa,
+        'key_count': key_count,
         'transaction': display_tx
     })
 
 @app.route('/dkg/submit', methods=['POST'])
 def submit_dkg_data():
-    """Submit DKG shares and commitments"""
-    data = request.json
-    device_id = data['device_id']
-    commitments = data['commitments']
-    shares = data['shares']
+    """Submit DKG shares and commitments
+
+    The dealer must be one of the DKG's participants and address a share
+    to every participant, itself included; its share_index (parsed from
+    device_N if left out) must be free and at most total_signers.
+    Everything is checked before the session is touched.
+    """
+    data = request.get_json(silent=True) or {}
+    session = ceremonies.get(data.get('session_id'), 'dkg')
+    if not session:
+        return jsonify({'error': 'Unknown DKG session'}), 404
+    
+    device_id = data.get('device_id')
+    commitments = data.get('commitments')
+    shares = data.get('shares')
+    if not isinstance(device_id, str) or not isinstance(commitments, list) or not isinstance(shares, dict):
+        return jsonify({'error': 'Missing device_id, commitments or shares'}), 400
+    try:
+        share_index = int(data.get('share_index') or parse_share_index(device_id))
+    except (TypeError, ValueError, IndexError):
+        return jsonify({'error': 'Missing or malformed share_index'}), 400
+    if not 1 <= share_index <= session['total_signers']:
+        return jsonify({'error': f"share_index must be between 1 and {session['total_signers']}"}), 400
+    participants = session.get('participants') or sorted(shares)
+    if device_id not in participants:
+        return jsonify({'error': 'Device is not a participant of this DKG'}), 403
+    if sorted(shares) != participants or len(participants) != session['total_signers']:
+        return jsonify({'error': 'Shares must go to every participant of the DKG'}), 400
+    key_count = session.get('key_count', 1)
+    if key_count > 1:
+        if (len(commitments) != key_count or not all(isinstance(vector, list) for vector in commitments)
+                or any(not isinstance(vector, list) or len(vector) != key_count for vector in shares.values())):
+            return jsonify({'error': f'Batch DKG expects {key_count} commitment and share vectors'}), 400
+        points = [point for key_commitments in commitments for point in key_commitments]
+    else:
+        points = commitments
+    if not valid_points(points):
+        return jsonify({'error': 'Commitments must be points on secp256k1'}), 400
     
-    print(f"\n=== Received DKG Data from {device_id} ===")
+    print(f"\n=== Received DKG Data from {device_id} ({session['session_id']}) ===")
     print(f"  Commitments: {len(commitments)}")
     print(f"  Shares: {len(shares)}")
     
-    # Store the data
-    dkg_shares[device_id] = {
-        "commitments": commitments,
-        "shares": shares
+    with ceremonies.lock(session):
+        if device_id in session['excluded']:
+            return jsonify({'error': 'Device missed the DKG deadline and was excluded'}), 403
+        if session['status'] != 'in_progress':
+            return jsonify({'error': f"DKG already {session['status']}"}), 409
+        # The first dealer's recipients fix the participants, unless /dkg/start named them
+        if session.get('participants') not in (None, participants):
+            return jsonify({'error': 'Device is not a participant of this DKG'}), 403
+        if any(index == share_index for dealer, index in session['share_indices'].items() if dealer != device_id):
+            return jsonify({'error': f"share_index {share_index} is taken"}), 400
+        device_latency.record_response(device_id, session)
+        
+        # Store the data
+        session['participants'] = participants
+        session['commitments'][device_id] = commitments
+        session['shares'][device_id] = shares
+        session['share_indices'][device_id] = share_index
+        session['submission_log'].append(device_id)
+        version = len(session['submission_log'])
+        received = len(session['shares'])
+        total = session['total_signers']
+        
+        # Check if we have all shares; recipients fetch them via /dkg/shares
+        if received == total:
+            session['status'] = 'completed'
+            print("  ✓ All DKG shares received")
+            record_group_key(session)
+            publish_dkg_complete(session)
+            return jsonify({
+                "status": "complete",
+                "version": version
+            })
+    
+    print(f"  → Waiting for more shares ({received}/{total})")
+    return jsonify({
+        "status": "waiting",
+        "current": received,
+        "total": total,
+        "version": version
+    })
+
+@app.route('/dkg/shares', methods=['GET'])
+def fetch_dkg_shares():
+    """Deliver to one device the shares addressed to it plus the dealers' broadcast commitments
+
+    Only dealers that submitted after the caller's `since` version are
+    included, so polling never re-sends data the device already has.
+    """
+    session = ceremonies.get(request.args.get('session_id'), 'dkg')
+    if not session:
+        return jsonify({'error': 'Unknown DKG session'}), 404
+    
+    device_id = request.args.get('device_id')
+    since = request.args.get('since', 0, type=int)
+    
+    with ceremonies.lock(session, save=False):
+        version = len(session['submission_log'])
+        # A dealer that resubmitted appears more than once; send its latest data once
+        dealers = dict.fromkeys(session['submission_log'][since:])
+        shares = {
+            dealer_id: session['shares'][dealer_id][device_id]
+            for dealer_id in dealers
+            if device_id in session['shares'][dealer_id]
+        }
+        commitments = {dealer_id: session['commitments'][dealer_id] for dealer_id in dealers}
+        status = session['status']
+    
+    return jsonify({
+        "status": "complete" if status == 'completed' else "waiting",
+        "version": version,
+        "shares": shares,
+        "commitments": commitments
+    })
+
+def record_group_key(session):
+    """Store the completed DKG's group public key and chain code, the root of its derived keys
+
+    A batch DKG instead gets a list of keys, each with its address.
+    """
+    if session.get('key_count', 1) == 1:
+        public_key = derivation.group_public_key(session['commitments'])
+        session['group_public_key'] = point_to_json(public_key)
+        session['chain_code'] = derivation.chain_code(session['commitments']).hex()
+        # target_eoa only names the DKG; signatures recover to the group key's own address
+        session['eth_address'] = derivation.eth_address(public_key)
+        return
+    keys = []
+    for key_index in range(session['key_count']):
+        commitments = {
+            dealer_id: dealer_commitments[key_index]
+            for dealer_id, dealer_commitments in session['commitments'].items()
+        }
+        public_key = derivation.group_public_key(commitments)
+        keys.append({
+            'group_public_key': point_to_json(public_key),
+            'chain_code': derivation.chain_code(commitments).hex(),
+            'eth_address': derivation.eth_address(public_key)
+        })
+    session['keys'] = keys
+
+@app.route('/dkg/keys', methods=['GET'])
+def dkg_keys():
+    """Group keys and addresses produced by a completed DKG"""
+    session = ceremonies.get(request.args.get('session_id'), 'dkg')
+    if not session:
+        return jsonify({'error': 'Unknown DKG session'}), 404
+    if session['status'] != 'completed':
+        return jsonify({'error': f"DKG is {session['status']}"}), 409
+    keys = session.get('keys') or [{
+        'group_public_key': session['group_public_key'],
+        'chain_code': session['chain_code'],
+        'eth_address': session['eth_address']
+    }]
+    return jsonify({'session_id': session['session_id'], 'keys': keys})
+
+@app.route('/keys/derive', methods=['POST'])
+def derive_key():
+    """Derive a child EOA from a DKG's group key without any device interaction
+
+    Takes the DKG (dkg_session_id or target_eoa) and a non-hardened child
+    `index`, or a `path` of them. Each device derives its share of the
+    same child locally.
+    """
+    data = request.get_json(silent=True) or {}
+    dkg_session = _resolve_dkg_session(data)
+    if not dkg_session or 'group_public_key' not in dkg_session:
+        return jsonify({'error': 'No completed DKG for that key'}), 400
+    path = data.get('path', [data.get('index', 0)])
+    try:
+        path = [int(index) for index in path]
+        public_key, chain, tweak = derivation.derive(
+            point_from_json(dkg_session['group_public_key']), bytes.fromhex(dkg_session['chain_code']), path
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    eth_address = derivation.eth_address(public_key)
+    # Every signer group re-deriving the same path gets its own entry
+    derived_keys[f"{dkg_session['session_id']}/{eth_address}"] = {
+        'dkg_session_id': dkg_session['session_id'],
+        'path': path,
+        'public_key': point_to_json(public_key)
+    }
+    return jsonify({
+        'dkg_session_id': dkg_session['session_id'],
+        'path': path,
+        'public_key': point_to_json(public_key),
+        'chain_code': chain.hex(),
+        'eth_address': eth_address
+    })
+
+def publish_dkg_complete(session):
+    """Tell every dealer whose share counts that its shares are ready to fetch"""
+    device_events.publish(session['shares'], 'round_open',
+                          session_id=session['session_id'], kind='dkg', round='shares',
+                          target_eoa=session['target_eoa'], version=len(session['submission_log']))
+
+def _resolve_dkg_session(data):
+    """DKG session named by dkg_session_id, falling back to the latest one for target_eoa"""
+    if 'dkg_session_id' in data:
+        return ceremonies.get(data['dkg_session_id'], 'dkg')
+    return ceremonies.dkg_for_eoa(data.get('target_eoa'))
+
+def combine_presignature(presignature_id, contributions):
+    """Combine every participant's offline contribution into one presignature
+
+    Only R (and r) leave the server; each participant keeps its own k_i
+    and sigma_i for the online round.
+    """
+    # R = k^-1 * G is fixed before the message is known
+    R = combine_nonce(
+        [contribution['delta_i'] for contribution in contributions.values()],
+        [contribution['Gamma_i'] for contribution in contributions.values()]
+    )
+    return {
+        'presignature_id': presignature_id,
+        'participants': sorted(contributions),
+        'R': point_to_json(R),
+        'r': hex(R[0] % CURVE_ORDER)
     }
+
+@app.route('/presign/start', methods=['POST'])
+def start_presigning():
+    """Open an offline round producing a batch of presignatures for an EOA"""
+    data = request.get_json(silent=True) or {}
+    dkg_session = _resolve_dkg_session(data)
+    if not dkg_session:
+        return jsonify({'error': 'DKG not initialized'}), 400
+    if dkg_session.get('key_count', 1) > 1:
+        return jsonify({'error': 'Batch DKG keys cannot be signed with yet'}), 400
+    if dkg_session['status'] != 'completed':
+        return jsonify({'error': f"DKG is {dkg_session['status']}"}), 409
     
-    # Check if we have all shares
-    if len(dkg_shares) == TOTAL_SIGNERS:
-        print("  ✓ All DKG shares received")
-        return jsonify({
-            "status": "complete",
-            "shares": dkg_shares
+    target_eoa = dkg_session['eth_address']
+    count = data.get('count') or presignature_pool.refill_needed(dkg_session['session_id']) or PRESIGNATURE_BATCH_SIZE
+    session = ceremonies.create(
+        'presign',
+        'presign',
+        round_timeout=data.get('round_timeout'),
+        dkg_session_id=dkg_session['session_id'],
+        target_eoa=target_eoa,
+        participants=sorted(dkg_session['shares']),
+        # Presignatures are bound to their participants, who weight their key shares by these
+        coefficients=quorum_coefficients(dkg_session, sorted(dkg_session['shares'])),
+        presignature_ids=[f"presig_{secrets.token_hex(8)}" for _ in range(count)],
+        contributions={}  # {device_id: {presignature_id: {"Gamma_i", "delta_i"}}}
+    )
+    device_events.publish(session['participants'], 'round_open',
+                          session_id=session['session_id'], kind='presign', round='presign',
+                          dkg_session_id=dkg_session['session_id'], target_eoa=target_eoa,
+                          presignature_ids=session['presignature_ids'], coefficients=session['coefficients'],
+                          deadline=session['deadline'])
+    
+    return jsonify({
+        'status': 'ok',
+        'session_id': session['session_id'],
+        'target_eoa': target_eoa,
+        'participants': session['participants'],
+        'coefficients': session['coefficients'],
+        'presignature_ids': session['presignature_ids']
+    })
+
+def complete_presign_session(session):
+    """Combine every received contribution into presignatures and close the session
+
+    Must be called with the session lock held; the caller adds the result
+    to the pool after releasing it.
+    """
+    presignatures = [
+        combine_presignature(presignature_id, {
+            participant: contributions[presignature_id]
+            for participant, contributions in session['contributions'].items()
         })
+        for presignature_id in session['presignature_ids']
+    ]
+    # Drop the per-device values now that they are folded into the pool
+    session['contributions'] = {}
+    session['status'] = 'completed'
+    return presignatures
+
+@app.route('/presign/submit', methods=['POST'])
+def submit_presignatures():
+    """Submit one device's offline contributions for a whole presignature batch"""
+    data = request.get_json(silent=True) or {}
+    session = ceremonies.get(data.get('session_id'), 'presign')
+    if not session:
+        return jsonify({'error': 'Unknown presign session'}), 404
     
-    print(f"  → Waiting for more shares ({len(dkg_shares)}/{TOTAL_SIGNERS})")
+    device_id = data.get('device_id')
+    presignatures = data.get('presignatures')
+    if not isinstance(presignatures, list) or not all(
+        isinstance(entry, dict) and 'presignature_id' in entry and 'Gamma_i' in entry for entry in presignatures
+    ):
+        return jsonify({'error': 'presignatures must list {presignature_id, Gamma_i, delta_i} entries'}), 400
+    entries = {entry['presignature_id']: entry for entry in presignatures}
+    if device_id not in session['participants']:
+        return jsonify({'error': 'Device is not part of this signer group'}), 403
+    if set(entries) != set(session['presignature_ids']):
+        return jsonify({'error': 'Presignature IDs do not match the batch'}), 400
+    if not valid_points(entry['Gamma_i'] for entry in entries.values()):
+        return jsonify({'error': 'Gamma_i must be a point on secp256k1'}), 400
+    if any('delta_i' not in entry for entry in entries.values()):
+        return jsonify({'error': 'Each presignature needs its MtA output delta_i'}), 400
+    rejected = authenticate_request(
+        device_id, batch_auth.presignature_messages(session['session_id'], device_id, presignatures), data.get('auth')
+    )
+    if rejected:
+        return rejected
+    
+    logger.info(f"\n=== Received {len(entries)} presignature contributions from {device_id} ===")
+    
+    with ceremonies.lock(session):
+        if device_id in session['excluded']:
+            return jsonify({'error': 'Device missed the presigning deadline and was excluded'}), 403
+        if session['status'] != 'in_progress':
+            return jsonify({'status': session['status']})
+        device_latency.record_response(device_id, session)
+        session['contributions'][device_id] = {
+            presignature_id: {
+                'Gamma_i': entry['Gamma_i'],
+                'delta_i': entry['delta_i']
+            }
+            for presignature_id, entry in entries.items()
+        }
+        received = len(session['contributions'])
+        total = len(session['participants'])
+        if received < total:
+            return jsonify({'status': 'waiting', 'current': received, 'total': total})
+        
+        presignatures = complete_presign_session(session)
+    
+    presignature_pool.add(session['dkg_session_id'], presignatures)
+    available = presignature_pool.available(session['dkg_session_id'])
+    logger.info(colored(f"  ✓ {len(presignatures)} presignatures ready for {session['target_eoa']} ({available} pooled)", 'green'))
+    return jsonify({'status': 'complete', 'available': available})
+
+@app.route('/presign/status', methods=['GET'])
+def presignature_status():
+    dkg_session = _resolve_dkg_session(request.args)
+    if not dkg_session:
+        return jsonify({'error': 'DKG not initialized'}), 400
+    dkg_session_id = dkg_session['session_id']
     return jsonify({
-        "status": "waiting",
-        "current": len(dkg_shares),
-        "total": TOTAL_SIGNERS
+        'dkg_session_id': dkg_session_id,
+        'target_eoa': dkg_session['target_eoa'],
+        'available': presignature_pool.available(dkg_session_id),
+        'low_watermark': PRESIGNATURE_LOW_WATERMARK,
+        'refill': presignature_pool.refill_needed(dkg_session_id)
     })
 
 @app.route('/signing/start', methods=['POST'])
 def start_signing():
-    global signing_state
-    if not dkg_state:
+    data = request.get_json(silent=True) or {}
+    dkg_session = _resolve_dkg_session(data)
+    if not dkg_session:
         return jsonify({'error': 'DKG not initialized'}), 400
+    if dkg_session.get('key_count', 1) > 1:
+        return jsonify({'error': 'Batch DKG keys cannot be signed with yet'}), 400
+    if dkg_session['status'] != 'completed':
+        return jsonify({'error': f"DKG is {dkg_session['status']}"}), 409
     
-    target_eoa = dkg_state['target_eoa']
-    display_tx = dkg_state['display_transaction']  # Use display version
-    message_hash = "0x" + secrets.token_hex(32)
+    # The group key's own address sends the transaction, so its nonces are allocated there
+    target_eoa = dkg_session['eth_address']
+    transaction = {**dkg_session['transaction'], 'nonce': nonces.allocate(target_eoa)[0]}
+    display_tx = format_tx_for_json(transaction)  # Use display version
+    message_hash = transaction_signing_hash(transaction)
     
-    signing_state = {
-        'status': 'in_progress',
+    # Online-only signing when the offline phase has already produced R
+    presignature = None
+    if data.get('presign', True):
+        presignature = presignature_pool.take(dkg_session['session_id'])
+    
+    # Prefer historically fast devices; stragglers excluded from the DKG hold no key share
+    signers = device_latency.rank(
+        device_id for device_id in dkg_session['shares'] if device_id not in dkg_session['excluded']
+    )
+    
+    session = ceremonies.create(
+        'signing',
+        'share' if presignature else 'commit',
+        round_timeout=data.get('round_timeout'),
+        dkg_session_id=dkg_session['session_id'],
+        signers=signers,  # eligible devices, fastest first
+        selected=signers[:dkg_session['threshold']],  # the quorum the commit round waits on
+        attempt=1,
+        target_eoa=target_eoa,
+        message_hash=message_hash,
+        transaction=transaction,  # Store raw version
+        display_transaction=display_tx,  # Store display version
+        nonces=[[target_eoa, transaction['nonce']]],  # [[eth_address, nonce]] to confirm or release
+        commitments={},  # {device_id: {"Gamma_i"}}
+        deltas={},  # {device_id: delta_i}
+        sig_shares={},  # {device_id: s_i}
+        presignature=presignature,
+        R=presignature['R'] if presignature else None  # Combined R point, once known
+    )
+    device_events.publish(presignature['participants'] if presignature else signers, 'signing_request',
+                          session_id=session['session_id'], dkg_session_id=dkg_session['session_id'],
+                          eth_address=target_eoa, message_hash=message_hash, round=session['round'],
+                          selected=session['selected'], deadline=session['deadline'])
+    
+    response = {
+        'status': 'ok',
+        'session_id': session['session_id'],
         'target_eoa': target_eoa,
         'message_hash': message_hash,
-        'transaction': dkg_state['transaction'],  # Store raw version
-        'display_transaction': display_tx,  # Store display version
-        'commitments': {},
-        'mta_values': {}
+        'transaction': display_tx,  # Send display version
+        'signers': signers,
+        'selected': session['selected'],
+        'presignature_refill': presignature_pool.refill_needed(dkg_session['session_id'])
     }
+    if presignature:
+        response['presignature'] = {
+            key: presignature[key]
+            for key in ('presignature_id', 'participants', 'r')
+        }
+    return jsonify(response)
+
+def signing_subject(session):
+    """Event fields naming what a signing session signs: one message, or a batch's vectors"""
+    if session.get('batch_size'):
+        return {'eth_addresses': session['target_eoas'], 'message_hashes': session['message_hashes']}
+    return {'eth_address': session['target_eoa'], 'message_hash': session['message_hash']}
+
+def eoa_in_group(dkg_session, eth_address):
+    """Whether the DKG's signer group holds a key for the address, directly or by derivation"""
+    if eth_address == dkg_session.get('eth_address'):
+        return True
+    if any(key['eth_address'] == eth_address for key in dkg_session.get('keys', ())):
+        return True
+    return f"{dkg_session['session_id']}/{eth_address}" in derived_keys
+
+def prepare_batch(dkg_session, transactions):
+    """(target_eoas, raw transactions) for a batch, raising ValueError if any transaction is unusable
+
+    Each transaction's `from` (the group key's address by default) must
+    be a key the signer group holds: the group key of a single-key DKG, a
+    child derived from it, or a key of a batch DKG. Batch DKG keys have no
+    derived children.
+    """
+    target_eoas = []
+    raw_txs = []
+    for position, tx in enumerate(transactions):
+        eth_address = tx.get('from') or dkg_session.get('eth_address')
+        if not eoa_in_group(dkg_session, eth_address):
+            raise ValueError(f'Transaction {position}: {eth_address} is not held by this signer group')
+        try:
+            raw_txs.append(parse_transaction(tx))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f'Transaction {position} is malformed: {e!r}')
+        target_eoas.append(eth_address)
+    return target_eoas, raw_txs
+
+def assign_nonces(target_eoas, raw_txs, reserve_explicit=True):
+    """Fill in every missing nonce and claim caller-chosen ones, raising ValueError on a clash
+
+    Returns the session's claimed nonces as [[eth_address, nonce], ...], to
+    confirm once signed or release if the ceremony fails.
+    """
+    claimed = []
+    missing = {}
+    for eth_address, raw_tx in zip(target_eoas, raw_txs):
+        if raw_tx['nonce'] is None:
+            missing.setdefault(eth_address, []).append(raw_tx)
+            continue
+        if reserve_explicit and not nonces.reserve(eth_address, raw_tx['nonce']):
+            release_nonces(claimed)
+            raise ValueError(f"Nonce {raw_tx['nonce']} of {eth_address} is already in use")
+        claimed.append([eth_address, raw_tx['nonce']])
+    for eth_address, txs in missing.items():
+        for raw_tx, nonce in zip(txs, nonces.allocate(eth_address, len(txs))):
+            raw_tx['nonce'] = nonce
+            claimed.append([eth_address, nonce])
+    return claimed
+
+def _nonces_by_eoa(claimed):
+    by_eoa = {}
+    for eth_address, nonce in claimed:
+        by_eoa.setdefault(eth_address, []).append(nonce)
+    return by_eoa.items()
+
+def release_nonces(claimed):
+    """Hand a failed session's [[eth_address, nonce], ...] back to the allocator"""
+    for eth_address, claimed_nonces in _nonces_by_eoa(claimed):
+        nonces.release(eth_address, claimed_nonces)
+
+def confirm_nonces(claimed):
+    for eth_address, claimed_nonces in _nonces_by_eoa(claimed):
+        nonces.confirm(eth_address, claimed_nonces)
+
+def start_batch_session(dkg_session, target_eoas, raw_txs, round_timeout=None, claimed_nonces=(), request_ids=None):
+    """Open a batch signing session over prepared transactions and notify its signers
+
+    request_ids names the queued requests it signs, in order, if any.
+    """
+    signers = device_latency.rank(
+        device_id for device_id in dkg_session['shares'] if device_id not in dkg_session['excluded']
+    )
+    session = ceremonies.create(
+        'signing',
+        'commit',
+        round_timeout=round_timeout,
+        dkg_session_id=dkg_session['session_id'],
+        signers=signers,
+        selected=signers[:dkg_session['threshold']],
+        attempt=1,
+        batch_size=len(raw_txs),
+        target_eoa=None,
+        message_hash=None,
+        target_eoas=target_eoas,
+        message_hashes=[transaction_signing_hash(raw_tx) for raw_tx in raw_txs],
+        transactions=raw_txs,
+        display_transactions=[format_tx_for_json(raw_tx) for raw_tx in raw_txs],
+        nonces=list(claimed_nonces),
+        request_ids=request_ids,
+        commitments={},  # {device_id: [{"Gamma_i"} per transaction]}
+        deltas={},  # {device_id: [delta_i per transaction]}
+        sig_shares={},  # {device_id: [s_i per transaction]}
+        presignature=None,
+        R=None
+    )
+    device_events.publish(signers, 'signing_request',
+                          session_id=session['session_id'], dkg_session_id=dkg_session['session_id'],
+                          round=session['round'], selected=session['selected'], deadline=session['deadline'],
+                          **signing_subject(session))
+    return session
+
+@app.route('/signing/batch', methods=['POST'])
+def start_batch_signing():
+    """Sign many transactions in one ceremony, every round carrying one vector entry per transaction
+
+    Devices commit with one vector of commitments and the result holds
+    every signed transaction; see prepare_batch for which EOAs qualify.
+    """
+    data = request.get_json(silent=True) or {}
+    dkg_session = _resolve_dkg_session(data)
+    if not dkg_session or dkg_session['status'] != 'completed':
+        return jsonify({'error': 'DKG not initialized'}), 400
+    transactions = data.get('transactions') or []
+    if not 1 <= len(transactions) <= MAX_SIGNING_BATCH:
+        return jsonify({'error': f'A batch holds between 1 and {MAX_SIGNING_BATCH} transactions'}), 400
+    try:
+        target_eoas, raw_txs = prepare_batch(dkg_session, transactions)
+        claimed = assign_nonces(target_eoas, raw_txs)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
+    session = start_batch_session(dkg_session, target_eoas, raw_txs, data.get('round_timeout'), claimed)
     return jsonify({
         'status': 'ok',
-        'target_eoa': target_eoa,
-        'message_hash': message_hash,
-        'transaction': display_tx  # Send display version
+        'session_id': session['session_id'],
+        'batch_size': session['batch_size'],
+        'target_eoas': target_eoas,
+        'message_hashes': session['message_hashes'],
+        'transactions': session['display_transactions'],
+        'signers': session['signers'],
+        'selected': session['selected']
     })
 
+class SigningQueue:
+    """Signing requests waiting to be batched into ceremonies, one queue per signer group
+
+    A dispatcher thread drains a group's queue into one batch session as
+    soon as it holds `batch_size` requests, or once its oldest request has
+    waited `window` seconds, taking the highest priorities first. Urgent
+    requests skip the queue and get a ceremony of their own straight away.
+    Queues live in the state store, so requests survive restarts and any
+    worker process may dispatch them.
+    """
+
+    def __init__(self, store, locks, batch_size, window):
+        self._store = store
+        self._locks = locks
+        self.batch_size = batch_size
+        self.window = window
+        self._queues = PersistentDict(store, 'signing_queue')  # {dkg_session_id: [queued request]}
+        # {request_id: {"dkg_session_id", "status", "session_id", "index", "result"}}; the
+        # outcome is copied here so it outlives the session
+        self._requests = PersistentDict(store, 'signing_requests')
+        self._wake = threading.Event()
+        self._last_prune = 0
+
+    def submit(self, dkg_session, transaction, priority=0, urgent=False):
+        """Queue one validated transaction, its nonce already reserved if it names one; returns its request record"""
+        request_id = f"request_{secrets.token_hex(8)}"
+        record = {
+            'request_id': request_id,
+            'dkg_session_id': dkg_session['session_id'],
+            'submitted_at': time.time(),
+            'status': 'queued',
+            'session_id': None,
+            'index': None
+        }
+        self._requests[request_id] = record
+        entry = {'request_id': request_id, 'transaction': transaction, 'priority': priority,
+                 'submitted_at': record['submitted_at']}
+        if urgent:
+            self._dispatch(dkg_session['session_id'], [entry])
+            return self._requests[request_id]
+        
+        with self._locks(f"signing_queue:{dkg_session['session_id']}"):
+            queue = self._queues.get(dkg_session['session_id'], []) + [entry]
+            self._queues[dkg_session['session_id']] = queue
+            self._store.flush()
+        if len(queue) >= self.batch_size:
+            self._wake.set()
+        return record
+
+    def get(self, request_id):
+        return self._requests.get(request_id)
+
+    def _take_ready(self, dkg_session_id):
+        """Pop the next batch off a group's queue if it is full or its window has closed"""
+        with self._locks(f"signing_queue:{dkg_session_id}"):
+            queue = self._queues.get(dkg_session_id)
+            if not queue:
+                return []
+            oldest = min(entry['submitted_at'] for entry in queue)
+            if len(queue) < self.batch_size and time.time() - oldest < self.window:
+                return []
+            # Highest priority first, then first come first served
+            queue = sorted(queue, key=lambda entry: (-entry['priority'], entry['submitted_at']))
+            batch, rest = queue[:self.batch_size], queue[self.batch_size:]
+            if rest:
+                self._queues[dkg_session_id] = rest
+            else:
+                del self._queues[dkg_session_id]
+            self._store.flush()
+            return batch
+
+    def _dispatch(self, dkg_session_id, batch):
+        """Start one ceremony for a batch of queued requests and point each request at it
+
+        The batch is already off the queue, so if no ceremony starts its
+        requests fail and their nonces go back to the allocator.
+        """
+        dkg_session = ceremonies.get(dkg_session_id, 'dkg')
+        try:
+            if not dkg_session or dkg_session['status'] != 'completed':
+                raise ValueError('DKG not initialized')
+            target_eoas, raw_txs = prepare_batch(dkg_session, [entry['transaction'] for entry in batch])
+        except ValueError as e:
+            logger.error(f"Dropping {len(batch)} signing requests for {dkg_session_id}: {e}")
+            self._fail(batch)
+            return
+        claimed = []
+        try:
+            # Nonces are allocated at dispatch, so higher-priority requests get the lower ones
+            claimed = assign_nonces(target_eoas, raw_txs, reserve_explicit=False)
+            session = start_batch_session(dkg_session, target_eoas, raw_txs, claimed_nonces=claimed,
+                                          request_ids=[entry['request_id'] for entry in batch])
+        except Exception:
+            logger.exception(f"Dispatching {len(batch)} signing requests for {dkg_session_id} failed")
+            self._fail(batch, claimed)
+            return
+        for index, entry in enumerate(batch):
+            record = self._requests.get(entry['request_id'])
+            # A session that already finished has recorded its outcome
+            if record and record['status'] == 'queued':
+                self._requests[entry['request_id']] = {
+                    **record,
+                    'status': 'dispatched',
+                    'session_id': session['session_id'],
+                    'index': index
+                }
+        self._store.flush()
+        logger.info(f"Dispatched {len(batch)} signing requests as {session['session_id']}")
+
+    def _fail(self, batch, claimed=()):
+        """Fail requests that will never be signed, releasing claimed nonces or else their own reserved ones"""
+        release_nonces(claimed or [
+            [entry['transaction']['from'], int(entry['transaction']['nonce'], 16)] for entry in batch
+            if entry['transaction'].get('nonce') is not None
+        ])
+        for entry in batch:
+            record = self._requests.get(entry['request_id'])
+            if record:
+                self._requests[entry['request_id']] = {**record, 'status': 'failed'}
+        self._store.flush()
+
+    def record_outcome(self, session):
+        """Copy a completed or failed batch session's outcome onto the requests it signed"""
+        for index, request_id in enumerate(session.get('request_ids') or ()):
+            record = self._requests.get(request_id)
+            if record is None:
+                continue
+            outcome = {'status': session['status'], 'session_id': session['session_id'], 'index': index}
+            if session['status'] == 'completed':
+                outcome['result'] = session['results'][index]
+            self._requests[request_id] = {**record, **outcome}
+
+    def _prune(self):
+        """Drop request records untouched for SIGNING_SESSION_TTL and fail requests queued that long"""
+        if time.time() - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = time.time()
+        self._store.expire('signing_requests', SIGNING_SESSION_TTL)
+        cutoff = time.time() - SIGNING_SESSION_TTL
+        for dkg_session_id in list(self._queues):
+            with self._locks(f"signing_queue:{dkg_session_id}"):
+                queue = self._queues.get(dkg_session_id) or []
+                stale = [entry for entry in queue if entry['submitted_at'] < cutoff]
+                if not stale:
+                    continue
+                rest = [entry for entry in queue if entry['submitted_at'] >= cutoff]
+                if rest:
+                    self._queues[dkg_session_id] = rest
+                else:
+                    del self._queues[dkg_session_id]
+            logger.error(f"Dropping {len(stale)} signing requests for {dkg_session_id} queued too long")
+            self._fail(stale)
+
+    def run(self):
+        """Dispatcher loop, ticking often enough to honour the window"""
+        while True:
+            self._wake.wait(self.window / 4)
+            self._wake.clear()
+            for dkg_session_id in list(self._queues):
+                try:
+                    batch = self._take_ready(dkg_session_id)
+                    while batch:
+                        self._dispatch(dkg_session_id, batch)
+                        batch = self._take_ready(dkg_session_id)
+                except Exception:
+                    logger.exception(f"Dispatching signing requests for {dkg_session_id} failed")
+            try:
+                self._prune()
+            except Exception:
+                logger.exception("Pruning signing requests failed")
+
+signing_queue = SigningQueue(state_store, state_locks, SIGNING_QUEUE_BATCH_SIZE, SIGNING_QUEUE_WINDOW)
+
+def signing_vector(session, value):
+    """A submission as a list with one entry per message, or None if its shape is wrong
+
+    Batch sessions take lists of batch_size entries; the others a single value.
+    """
+    batch_size = session.get('batch_size')
+    if not batch_size:
+        return [value]
+    if not isinstance(value, list) or len(value) != batch_size:
+        return None
+    return value
+
 @app.route('/signing/commit', methods=['POST'])
 def submit_signing_commitment():
-    if not signing_state:
-        return jsonify({'error': 'Signing not initialized'}), 400
-    
+    """Commit round: Gamma_i = gamma_i * G from each selected signer
+
+    The first `threshold` devices to commit form the quorum, which then
+    runs MtA; the response carries each quorum member's Lagrange
+    coefficient, by which it weights its key share.
+    """
     data = request.json
+    session = ceremonies.get(data.get('session_id'), 'signing')
+    if not session:
+        return jsonify({'error': 'Unknown signing session'}), 404
+    dkg_session = ceremonies.get(session['dkg_session_id'], 'dkg')
+    
     device_id = data['device_id']
+    # A batch session takes one commitment per transaction, as a list
     commitment = data['commitment']
+    vector = signing_vector(session, commitment)
+    if vector is None:
+        return jsonify({'error': f"Expected a vector of {session['batch_size']} commitments"}), 400
+    if device_id not in session['signers']:
+        return jsonify({'error': 'Device is not part of this signer group'}), 403
+    if not valid_points(entry['Gamma_i'] for entry in vector):
+        return jsonify({'error': 'Gamma_i must be a point on secp256k1'}), 400
+    rejected = authenticate_request(
+        device_id, batch_auth.commitment_messages(session['session_id'], device_id, commitment), data.get('auth')
+    )
+    if rejected:
+        return rejected
     
-    logger.debug(f"Received commitment from {device_id}")
-    
-    signing_state['commitments'][device_id] = {
-        'k_i': commitment['k_i'],
-        'gamma_i': commitment['gamma_i'],
-        'R_i': commitment['R_i']
-    }
+    logger.debug(f"Received commitment from {device_id} ({session['session_id']})")
     
-    # If we have all commitments, generate final signature
-    if len(signing_state['commitments']) == len(dkg_state['shares']):
-        logger.debug("All commitments received, generating final signature...")
-        
-        # Combine shares to generate final signature
-        k = 0
-        gamma = 0
-        for device_data in signing_state['commitments'].values():
-            k = (k + int(device_data['k_i'], 16)) % CURVE_ORDER
-            gamma = (gamma + int(device_data['gamma_i'], 16)) % CURVE_ORDER
-        
-        # Calculate R = k * G
-        R = ec.derive_private_key(k, CURVE).public_key()
-        r = R.public_numbers().x % CURVE_ORDER
-        
-        # Calculate s using combined shares
-        message_int = int(signing_state['message_hash'], 16)
-        k_inv = pow(k, -1, CURVE_ORDER)
-        s = (k_inv * (message_int + r * gamma)) % CURVE_ORDER
+    with ceremonies.lock(session):
+        if device_id in session['excluded']:
+            return jsonify({'error': 'Device missed a signing deadline and was excluded'}), 403
+        if session['status'] != 'in_progress' or session['round'] != 'commit':
+            # Late commitments after the quorum formed are not needed
+            return jsonify({'status': session['status'], 'round': session['round']})
+        device_latency.record_response(device_id, session)
         
-        # Calculate v (27 or 28 depending on y coordinate)
-        v = 27 + (R.public_numbers().y % 2)
+        vector = [{'Gamma_i': entry['Gamma_i']} for entry in vector]
+        session['commitments'][device_id] = vector if session.get('batch_size') else vector[0]
         
-        # Create final signed transaction
-        signed_tx = {
-            **signing_state['transaction'],
-            "r": hex(r),
-            "s": hex(s),
-            "v": hex(v)
-        }
-        
-        # Create serialized transaction
-        tx_unsigned = serializable_unsigned_transaction_from_dict(signing_state['transaction'])
-        tx_signed = encode_transaction(tx_unsigned, vrs=(v, r, s))
-        
-        # Store in signing state
-        signing_state['final_signature'] = {
-            'r': hex(r),
-            's': hex(s),
-            'v': hex(v)
-        }
-        signing_state['signed_transaction'] = signed_tx
-        signing_state['serialized_transaction'] = encode_hex(tx_signed)
-        signing_state['status'] = 'completed'
-        
-        # Print final transaction details in green
-        logger.info("\n" + colored("=== 🔐 Final Signed Transaction ===", 'green', attrs=['bold']))
-        logger.info(colored("\nTransaction Details:", 'green'))
-        logger.info(colored(json.dumps(signed_tx, indent=2), 'green'))
-        
-        logger.info(colored("\nSignature Components:", 'green'))
-        logger.info(colored(f"R: {hex(r)}", 'green'))
-        logger.info(colored(f"S: {hex(s)}", 'green'))
-        logger.info(colored(f"V: {hex(v)}", 'green'))
-        
-        logger.info(colored("\nBroadcastable Transaction:", 'green'))
-        logger.info(colored(f"Hex: {encode_hex(tx_signed)}", 'green'))
-        
-        logger.info(colored("\nParticipant Information:", 'green'))
-        logger.info(colored(f"Total Participants: {len(signing_state['commitments'])}", 'green'))
-        for participant_id in signing_state['commitments']:
-            logger.info(colored(f"• {participant_id} contributed partial signature", 'green'))
-        
-        return jsonify({'status': 'completed'})
+        # The first `threshold` devices to commit form the quorum; stragglers are not waited for
+        if len(session['commitments']) < dkg_session['threshold']:
+            return jsonify({'status': 'ok'})
+        session['quorum'] = list(session['commitments'])[:dkg_session['threshold']]
+        session['coefficients'] = quorum_coefficients(dkg_session, session['quorum'])
+        ceremonies.start_round(session, 'mta')
+        logger.debug(f"Quorum reached ({', '.join(session['quorum'])}), starting MtA")
     
-    return jsonify({'status': 'ok'})
+    device_events.publish(session['quorum'], 'round_open',
+                          session_id=session['session_id'], kind='signing', round='mta',
+                          attempt=session['attempt'], quorum=session['quorum'],
+                          coefficients=session['coefficients'], deadline=session['deadline'])
+    return jsonify({
+        'status': 'ok',
+        'round': 'mta',
+        'quorum': session['quorum'],
+        'coefficients': session['coefficients']
+    })
 
 @app.route('/signing/mta', methods=['POST'])
+@app.route('/signing/mta/batch', methods=['POST'])
 def submit_mta():
-    if not signing_state:
-        return jsonify({'error': 'Signing not initialized'}), 400
-    
+    """MtA round: delta_i, one quorum device's share of k * gamma
+
+    Each device folds every one of its pairwise MtA outputs into delta_i,
+    so it submits once per round. Once every quorum member has, the
+    server opens R = delta^-1 * sum(Gamma_i) = k^-1 * G and the share
+    round starts. /signing/mta/batch is the same endpoint under its older name.
+    """
     data = request.json
-    from_device = data['from']
-    to_device = data['to']
-    delta = data['delta']
-    
-    logger.info(f"\n=== Received MtA Value ===")
-    logger.info(f"  From: {from_device}")
-    logger.info(f"  To: {to_device}")
-    
-    # Store MtA value
-    if 'mta_values' not in signing_state:
-        signing_state['mta_values'] = {}
-    
-    mta_key = f"{from_device}->{to_device}"
-    signing_state['mta_values'][mta_key] = delta
+    session = ceremonies.get(data.get('session_id'), 'signing')
+    if not session:
+        return jsonify({'error': 'Unknown signing session'}), 404
     
-    # Calculate n from number of unique devices in commitments
-    n = len(signing_state['commitments'])
-    expected_mta_count = n * (n - 1)  # Each device sends to every other device
-    current_count = len(signing_state['mta_values'])
-    
-    logger.info(f"  MtA Progress: {current_count}/{expected_mta_count}")
-    logger.info(f"  Number of participants: {n}")
+    device_id = data['device_id']
+    delta = data['delta']
+    vector = signing_vector(session, delta)
+    if vector is None:
+        return jsonify({'error': f"Expected a vector of {session['batch_size']} MtA values"}), 400
+    if device_id not in (session.get('quorum') or ()):
+        return jsonify({'error': 'Device is not in the signing quorum'}), 403
+    rejected = authenticate_request(
+        device_id, batch_auth.mta_messages(session['session_id'], device_id, delta), data.get('auth')
+    )
+    if rejected:
+        return rejected
     
-    # Only proceed when we have all MtA values and haven't generated signature yet
-    if current_count < expected_mta_count or signing_state.get('status') == 'completed':
-        return jsonify({'status': 'ok'})
+    logger.info(f"\n=== Received MtA output from {device_id} ({session['session_id']}) ===")
     
-    # Now we really have all MtA values and haven't generated signature yet
-    logger.info(colored("\n✓ All MtA values received!", 'green'))
+    with ceremonies.lock(session):
+        if session['status'] != 'in_progress' or session['round'] != 'mta':
+            return jsonify({'status': session['status'], 'round': session['round']})
+        device_latency.record_response(device_id, session)
+        session['deltas'][device_id] = delta
+        received = len(session['deltas'])
+        if received < len(session['quorum']):
+            return jsonify({'status': 'waiting', 'current': received, 'total': len(session['quorum'])})
+        
+        logger.info(colored("\n✓ All MtA values received!", 'green'))
+        points = [
+            combine_nonce(
+                [signing_vector(session, session['deltas'][member])[index] for member in session['quorum']],
+                [signing_vector(session, session['commitments'][member])[index]['Gamma_i']
+                 for member in session['quorum']]
+            )
+            for index in range(session.get('batch_size') or 1)
+        ]
+        session['R'] = [point_to_json(R) for R in points] if session.get('batch_size') else point_to_json(points[0])
+        ceremonies.start_round(session, 'share')
     
-    # Generate final signature
-    k = 0
-    gamma = 0
-    for device_data in signing_state['commitments'].values():
-        k = (k + int(device_data['k_i'], 16)) % CURVE_ORDER
-        gamma = (gamma + int(device_data['gamma_i'], 16)) % CURVE_ORDER
+    device_events.publish(session['quorum'], 'round_open',
+                          session_id=session['session_id'], kind='signing', round='share',
+                          attempt=session['attempt'], r=signing_r(session), deadline=session['deadline'])
+    return jsonify({'status': 'ok', 'round': 'share', 'r': signing_r(session)})
+
+def signing_r(session):
+    """r = R.x mod n for the session's nonce point(s), once known"""
+    if not session.get('R'):
+        return None
+    values = [hex(point_from_json(R)[0] % CURVE_ORDER) for R in signing_vector(session, session['R'])]
+    return values if session.get('batch_size') else values[0]
+
+@app.route('/signing/share', methods=['POST'])
+def submit_signature_share():
+    """Share round: s_i = m * k_i + r * sigma_i from every device holding part of the nonce
+
+    Those are the presignature's participants, or the quorum of an
+    interactive session. The shares sum to s = k * (m + r * x).
+    """
+    data = request.json
+    session = ceremonies.get(data.get('session_id'), 'signing')
+    if not session:
+        return jsonify({'error': 'Unknown signing session'}), 404
     
-    # Calculate R = k * G
-    R = ec.derive_private_key(k, CURVE).public_key()
-    r = R.public_numbers().x % CURVE_ORDER
+    device_id = data['device_id']
+    share = data['share']
+    if signing_vector(session, share) is None:
+        return jsonify({'error': f"Expected a vector of {session['batch_size']} shares"}), 400
+    participants = session['presignature']['participants'] if session['presignature'] else session.get('quorum') or ()
+    if device_id not in participants:
+        return jsonify({'error': 'Device does not hold part of this signing nonce'}), 403
+    rejected = authenticate_request(
+        device_id, batch_auth.share_messages(session['session_id'], device_id, share), data.get('auth')
+    )
+    if rejected:
+        return rejected
     
-    # Calculate s using combined shares
-    message_int = int(signing_state['message_hash'], 16)
-    k_inv = pow(k, -1, CURVE_ORDER)
-    s = (k_inv * (message_int + r * gamma)) % CURVE_ORDER
+    print(f"\n=== Received Signature Share from {device_id} ({session['session_id']}) ===")
+    with ceremonies.lock(session):
+        if session['status'] in ('finalizing', 'completed'):
+            return jsonify({'status': session['status']})
+        if session['status'] != 'in_progress' or session['round'] != 'share':
+            # The reaper restarted the session after a straggler; the shares of the old nonce are void
+            return jsonify({'error': 'Share round expired', 'round': session['round']}), 409
+        device_latency.record_response(device_id, session)
+        session['sig_shares'][device_id] = share
+        received = len(session['sig_shares'])
+        ready = received == len(participants)
+        if ready:
+            print("  ✓ All signature shares received")
+            begin_finalization(session)
     
-    # Calculate v (27 or 28 depending on y coordinate)
-    v = 27 + (R.public_numbers().y % 2)
+    if ready:
+        finalizer.submit(session['session_id'])
+        return jsonify({"status": "finalizing"})
+    print(f"  → Waiting for more shares ({received}/{len(participants)})")
+    return jsonify({
+        "status": "waiting",
+        "current": received,
+        "total": len(participants)
+    })
+
+def begin_finalization(session):
+    """Freeze a signing session's inputs and hand it to the finalizer
+
+    Must be called with the session lock held; call finalizer.submit() once
+    it is released. The 'finalize' round's deadline lets the reaper retry a
+    job lost to a crash.
+    """
+    session['status'] = 'finalizing'
+    ceremonies.start_round(session, 'finalize')
+
+def finalize_signature(session_id):
+    """The one finalization stage for every signing path: compute (r, s, v), build, store and log the transaction"""
+    session = ceremonies.get(session_id, 'signing')
+    if not session or session['status'] != 'finalizing':
+        return
+    if session.get('batch_size'):
+        finalize_signature_batch(session)
+        return
     
-    # Create final signed transaction with hex strings
-    raw_tx = signing_state['transaction']
-    signed_tx = {
-        "to": to_hex(raw_tx["to"]),
-        "value": hex(raw_tx["value"]),
-        "nonce": hex(raw_tx["nonce"]),
-        "gasPrice": hex(raw_tx["gasPrice"]),
-        "gas": hex(raw_tx["gas"]),
-        "chainId": raw_tx["chainId"],
-        "data": to_hex(raw_tx["data"]),
-        "r": hex(r),
-        "s": hex(s),
-        "v": hex(v)
-    }
+    # R was fixed by the presignature or the MtA round; s is the sum of the shares
+    s = sum(int(share, 16) for share in session['sig_shares'].values()) % CURVE_ORDER
+    r, s, v = ethereum_signature(point_from_json(session['R']), s, session['transaction']['chainId'])
+    participants = session['presignature']['participants'] if session['presignature'] else session['quorum']
+    signed_tx, serialized_tx = build_signed_transaction(session['transaction'], r, s, v)
     
-    # Create serialized transaction
-    tx_unsigned = serializable_unsigned_transaction_from_dict(signing_state['transaction'])
-    tx_signed = encode_transaction(tx_unsigned, vrs=(v, r, s))
+    # A bad share yields a valid-looking signature for some other key
+    if not signed_by(serialized_tx, session['target_eoa']):
+        reject_signature(session)
+        return
     
-    # Store in signing state
-    signing_state['final_signature'] = {
-        'r': hex(r),
-        's': hex(s),
-        'v': hex(v)
-    }
-    signing_state['signed_transaction'] = signed_tx
-    signing_state['serialized_transaction'] = encode_hex(tx_signed)
-    signing_state['status'] = 'completed'
+    with ceremonies.lock(session):
+        if session['status'] != 'finalizing':
+            return
+        session['final_signature'] = {
+            'r': hex(r),
+            's': hex(s),
+            'v': hex(v)
+        }
+        session['signed_transaction'] = signed_tx
+        session['serialized_transaction'] = serialized_tx
+        session['status'] = 'completed'
+    confirm_nonces(session.get('nonces', ()))
+    finalizer.notify(session_id)
+    # Every eligible signer was asked, including those the quorum went without
+    device_events.publish(session['signers'], 'signature_complete',
+                          session_id=session_id, eth_address=session['target_eoa'],
+                          message_hash=session['message_hash'], signature=session['final_signature'],
+                          serialized_transaction=serialized_tx)
     
-    # Print final transaction in green
-    logger.info(colored("\n=== 🔐 Final Signed Transaction ===", 'green', attrs=['bold']))
+    # Print final transaction details in green
+    logger.info("\n" + colored("=== 🔐 Final Signed Transaction ===", 'green', attrs=['bold']))
     logger.info(colored("\nTransaction Details:", 'green'))
     logger.info(colored(json.dumps(signed_tx, indent=2), 'green'))
     
@@ -551,62 +2036,354 @@ def submit_mta():
     logger.info(colored(f"V: {hex(v)}", 'green'))
     
     logger.info(colored("\nBroadcastable Transaction:", 'green'))
-    logger.info(colored(f"Hex: {encode_hex(tx_signed)}", 'green'))
+    logger.info(colored(f"Hex: {serialized_tx}", 'green'))
     
     logger.info(colored("\nParticipant Information:", 'green'))
-    logger.info(colored(f"Total Participants: {len(signing_state['commitments'])}", 'green'))
-    for participant_id in signing_state['commitments']:
+    logger.info(colored(f"Total Participants: {len(participants)}", 'green'))
+    for participant_id in participants:
         logger.info(colored(f"• {participant_id} contributed partial signature", 'green'))
-    
-    return jsonify({'status': 'completed'})
 
-@app.route('/signing/share', methods=['POST'])
-def submit_signature_share():
-    """Submit partial signature share"""
-    data = request.json
-    device_id = data['device_id']
-    share = data['share']
+def finalize_signature_batch(session):
+    """finalize_signature for a batch session: one signed transaction per vector entry"""
+    results = []
+    for index, raw_tx in enumerate(session['transactions']):
+        s = sum(int(shares[index], 16) for shares in session['sig_shares'].values()) % CURVE_ORDER
+        r, s, v = ethereum_signature(point_from_json(session['R'][index]), s, raw_tx['chainId'])
+        signed_tx, serialized_tx = build_signed_transaction(raw_tx, r, s, v)
+        if not signed_by(serialized_tx, session['target_eoas'][index]):
+            reject_signature(session)
+            return
+        results.append({
+            'eth_address': session['target_eoas'][index],
+            'message_hash': session['message_hashes'][index],
+            'signature': {'r': hex(r), 's': hex(s), 'v': hex(v)},
+            'signed_transaction': signed_tx,
+            'serialized_transaction': serialized_tx
+        })
     
-    print(f"\n=== Received Signature Share from {device_id} ===")
-    signing_data["sig_shares"][device_id] = share
+    session_id = session['session_id']
+    with ceremonies.lock(session):
+        if session['status'] != 'finalizing':
+            return
+        session['results'] = results
+        session['status'] = 'completed'
+        signing_queue.record_outcome(session)
+    confirm_nonces(session['nonces'])
+    finalizer.notify(session_id)
+    device_events.publish(session['signers'], 'signature_complete',
+                          session_id=session_id, **signing_subject(session))
     
-    if len(signing_data["sig_shares"]) == THRESHOLD:
-        print("  ✓ Threshold of signature shares received")
-        # Combine shares into final signature
-        shares = list(signing_data["sig_shares"].values())
-        R = signing_data["R"]
-        
-        # Get r value from R point
-        r = int(R.public_numbers().x) % CURVE_ORDER
-        
-        # Sum all shares modulo curve order
-        s = sum(int(share, 16) for share in shares) % CURVE_ORDER
-        
-        # Standard v value for Ethereum
-        v = 27
-        
-        final_signature = {
-            'r': hex(r),
-            's': hex(s),
-            'v': hex(v)
-        }
-        
-        print("\n=== Final Signature ===")
-        print(f"  R: {final_signature['r']}")
-        print(f"  S: {final_signature['s']}")
-        print(f"  V: {final_signature['v']}")
-        
-        return jsonify({
-            "status": "complete",
-            "signature": final_signature
+    logger.info("\n" + colored(f"=== 🔐 {len(results)} Signed Transactions ({session_id}) ===", 'green', attrs=['bold']))
+    for result in results:
+        logger.info(colored(f"{result['eth_address']} nonce {result['signed_transaction']['nonce']}: {result['serialized_transaction']}", 'green'))
+    logger.info(colored(f"Quorum: {', '.join(session['quorum'])}", 'green'))
+
+def reject_signature(session):
+    """Fail a finalizing session whose signature does not recover to its sender"""
+    with ceremonies.lock(session):
+        if session['status'] != 'finalizing':
+            return
+        fail_session(session, session['signers'])
+    finalizer.notify(session['session_id'])
+    logger.error(colored(f"✗ Signature of {session['session_id']} does not recover to its sender", 'red'))
+
+class SignatureFinalizer:
+    """Bounded worker pool running finalize_signature off the request threads
+
+    At most `max_pending` jobs are queued or running; submit() blocks past
+    that, pushing back on the handlers. wait() backs /signing/result.
+    """
+
+    def __init__(self, workers, max_pending):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='finalize')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._events = {}  # {session_id: threading.Event}
+        self._events_lock = threading.Lock()
+
+    def submit(self, session_id):
+        self._slots.acquire()
+        future = self._executor.submit(self._run, session_id)
+        future.add_done_callback(lambda _: self._slots.release())
+
+    def _run(self, session_id):
+        try:
+            finalize_signature(session_id)
+        except Exception:
+            # The session stays 'finalizing'; the reaper resubmits it after its deadline
+            logger.exception(f"Finalizing {session_id} failed")
+
+    def _event(self, session_id):
+        with self._events_lock:
+            return self._events.setdefault(session_id, threading.Event())
+
+    def notify(self, session_id):
+        with self._events_lock:
+            event = self._events.pop(session_id, None)
+        if event:
+            event.set()
+
+    def wait(self, session_id, timeout):
+        """Block until the session is completed or failed, or timeout; returns the session"""
+        deadline = time.time() + timeout
+        while True:
+            event = self._event(session_id)
+            session = ceremonies.get(session_id, 'signing')
+            remaining = deadline - time.time()
+            if session is None or session['status'] in ('completed', 'failed') or remaining <= 0:
+                return session
+            # Another worker process may finish it, so re-read the store now and then
+            event.wait(min(remaining, RESULT_POLL_INTERVAL))
+
+finalizer = SignatureFinalizer(FINALIZE_WORKERS, FINALIZE_MAX_PENDING)
+
+@app.route('/signing/result', methods=['GET'])
+def signing_result():
+    """Long-poll for a signing session's outcome, waiting up to `timeout` seconds"""
+    session_id = request.args.get('session_id')
+    timeout = min(request.args.get('timeout', RESULT_WAIT_MAX, type=float), RESULT_WAIT_MAX)
+    session = finalizer.wait(session_id, timeout)
+    if not session:
+        return jsonify({'error': 'Unknown signing session'}), 404
+    response = {'session_id': session_id, 'status': session['status']}
+    if session['status'] == 'completed' and session.get('batch_size'):
+        response['transactions'] = session['results']
+    elif session['status'] == 'completed':
+        response.update({
+            'signature': session['final_signature'],
+            'signed_transaction': session['signed_transaction'],
+            'serialized_transaction': session['serialized_transaction']
         })
+    return jsonify(response)
+
+@app.route('/signing/status', methods=['GET'])
+def signing_status():
+    """Current round of a signing session, so devices can follow restarts after a timeout"""
+    session = ceremonies.get(request.args.get('session_id'), 'signing')
+    if not session:
+        return jsonify({'error': 'Unknown signing session'}), 404
+    return jsonify({
+        'session_id': session['session_id'],
+        'status': session['status'],
+        'round': session['round'],
+        'attempt': session['attempt'],
+        'deadline': session['deadline'],
+        'signers': [device_id for device_id in session['signers'] if device_id not in session['excluded']],
+        'selected': session['selected'],
+        'excluded': session['excluded'],
+        'quorum': session.get('quorum'),
+        'coefficients': session.get('coefficients'),
+        'r': signing_r(session)
+    })
+
+@app.route('/nonces', methods=['GET', 'POST'])
+def eoa_nonces():
+    """An EOA's nonce state; POST {eth_address, next_nonce, force} resynchronizes it with the chain"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            eth_address = data['eth_address']
+            next_nonce = int(data['next_nonce'])
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': 'eth_address and an integer next_nonce are required'}), 400
+        if not nonces.reset(eth_address, next_nonce, force=bool(data.get('force'))):
+            return jsonify({
+                'error': f"Nonces up to {nonces.state(eth_address)['signed']} are already signed; pass force to reuse them",
+                'eth_address': eth_address, **nonces.state(eth_address)
+            }), 409
+    else:
+        eth_address = request.args.get('eth_address')
+        if not eth_address:
+            return jsonify({'error': 'eth_address is required'}), 400
+    return jsonify({'eth_address': eth_address, **nonces.state(eth_address)})
+
+@app.route('/signing/request', methods=['GET'])
+def signing_request_result():
+    """A queued signing request's progress, long-polling up to `timeout` seconds once it is dispatched"""
+    record = signing_queue.get(request.args.get('request_id'))
+    if not record:
+        return jsonify({'error': 'Unknown signing request'}), 404
+    if record['status'] == 'dispatched':
+        timeout = min(request.args.get('timeout', 0, type=float), RESULT_WAIT_MAX)
+        session = finalizer.wait(record['session_id'], timeout)
+        # The session records its outcome on the request before waking waiters
+        record = signing_queue.get(record['request_id']) or record
+        if not session and record['status'] == 'dispatched':
+            record = {**record, 'status': 'failed'}
+    response = {key: record[key] for key in ('request_id', 'status', 'session_id')}
+    if record['status'] == 'completed':
+        response.update(record['result'])
+    return jsonify(response)
+
+@app.route('/events/<device_id>', methods=['GET'])
+def device_event_stream(device_id):
+    """Server-Sent Events feed of one device's ceremony events
+
+    Resumes after the Last-Event-ID header, or ?since=, so a reconnecting
+    device picks up whatever it missed from the backlog.
+    """
+    try:
+        cursor = int(request.headers.get('Last-Event-ID') or request.args.get('since', 0))
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID and since must be integers'}), 400
+    
+    def stream(cursor):
+        # Sent straight away so proxies and clients see the stream open
+        yield ": connected\n\n"
+        while True:
+            events = device_events.wait(device_id, cursor, SSE_KEEPALIVE)
+            if not events:
+                yield ": keepalive\n\n"
+            for event in events:
+                cursor = event['id']
+                yield f"id: {cursor}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
     
-    print(f"  → Waiting for more shares ({len(signing_data['sig_shares'])}/{THRESHOLD})")
+    return Response(stream(cursor), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/events/<device_id>/poll', methods=['GET'])
+def poll_device_events(device_id):
+    """Long-poll fallback for the event stream, waiting up to `timeout` seconds for events after `since`"""
+    since = request.args.get('since', 0, type=int)
+    timeout = min(request.args.get('timeout', EVENT_WAIT_MAX, type=float), EVENT_WAIT_MAX)
+    events = device_events.wait(device_id, since, timeout)
     return jsonify({
-        "status": "waiting",
-        "current": len(signing_data["sig_shares"]),
-        "total": THRESHOLD
+        'device_id': device_id,
+        'events': events,
+        'cursor': events[-1]['id'] if events else since
     })
 
+def expire_round(session):
+    """Exclude the devices that missed the session's round deadline and carry on without them
+
+    A DKG round completes with whoever responded, as long as that is still
+    a threshold. A presign round needs every participant, since each
+    presignature's MtA ran across all of them, so a straggler fails it. A
+    commit round waits on a selected quorum; its stragglers are replaced
+    by the next-fastest remaining signers and the round restarts. A
+    straggler in the MtA or share round voids the nonce, so the session
+    restarts from a fresh commit round without it; a presignature whose
+    online round timed out is discarded the same way. Sessions left
+    without a threshold of devices fail.
+
+    Must be called with the session lock held.
+    """
+    if session['kind'] == 'dkg':
+        threshold = session['threshold']
+        responded = list(session['shares'])
+        expected = {recipient for shares in session['shares'].values() for recipient in shares}
+    else:
+        threshold = ceremonies.get(session['dkg_session_id'], 'dkg')['threshold']
+        if session['kind'] == 'presign':
+            responded = list(session['contributions'])
+            expected = session['participants']
+        elif session['round'] == 'commit':
+            responded = list(session['commitments'])
+            expected = session['selected']
+        elif session['round'] == 'mta':
+            responded = list(session['deltas'])
+            expected = session['quorum']
+        else:
+            responded = list(session['sig_shares'])
+            expected = session['presignature']['participants'] if session['presignature'] else session['quorum']
+    
+    stragglers = sorted(
+        device_id for device_id in set(expected)
+        if device_id not in responded and device_id not in session['excluded']
+    )
+    for device_id in stragglers:
+        device_latency.record(device_id, session['round_timeout'])
+    session['excluded'] = session['excluded'] + stragglers
+    logger.warning(colored(
+        f"⏱ {session['session_id']} {session['round']} round timed out; excluding {', '.join(stragglers) or 'nobody'}",
+        'yellow'
+    ))
+    
+    if session['kind'] == 'dkg':
+        if len(responded) < threshold:
+            fail_session(session, expected)
+            return
+        session['status'] = 'completed'
+        record_group_key(session)
+        publish_dkg_complete(session)
+        return
+    if session['kind'] == 'presign':
+        fail_session(session, expected)
+        return
+    
+    remaining = [device_id for device_id in session['signers'] if device_id not in session['excluded']]
+    if len(remaining) < threshold:
+        fail_session(session, session['signers'])
+        return
+    if session['round'] != 'commit':
+        # The nonce was shared with a straggler, so every device draws a new one
+        session['presignature'] = None
+        session['R'] = None
+        session['quorum'] = None
+        session['commitments'] = {}
+        session['deltas'] = {}
+        session['sig_shares'] = {}
+    # Keep whoever already committed and top the quorum up with the next-fastest signers
+    committed = [device_id for device_id in remaining if device_id in session['commitments']]
+    session['selected'] = (committed + [device_id for device_id in remaining if device_id not in committed])[:threshold]
+    session['attempt'] += 1
+    ceremonies.start_round(session, 'commit')
+    device_events.publish(session['selected'], 'round_open',
+                          session_id=session['session_id'], kind='signing', round='commit',
+                          attempt=session['attempt'], selected=session['selected'],
+                          deadline=session['deadline'], **signing_subject(session))
+
+def fail_session(session, device_ids):
+    """Mark a session failed and tell its devices to stop working on it"""
+    session['status'] = 'failed'
+    # Its transactions will never be signed, so their nonces go back to the allocator
+    release_nonces(session.get('nonces', ()))
+    signing_queue.record_outcome(session)
+    device_events.publish(device_ids, 'session_failed',
+                          session_id=session['session_id'], kind=session['kind'], round=session['round'])
+
+def settle_expired_session(session):
+    """Settle the nonces and requests of a signing session dropped by its TTL"""
+    if session['status'] == 'completed':
+        confirm_nonces(session.get('nonces', ()))
+        return
+    release_nonces(session.get('nonces', ()))
+    if session['status'] != 'failed':
+        signing_queue.record_outcome({**session, 'status': 'failed'})
+
+def reap_expired_rounds():
+    """Background loop applying expire_round to every round past its deadline"""
+    while True:
+        time.sleep(REAPER_INTERVAL)
+        try:
+            for session_id, kind in ceremonies.expired_rounds():
+                session = ceremonies.get(session_id, kind)
+                if session is None:
+                    ceremonies.forget_deadline(session_id)
+                    continue
+                retry_finalization = False
+                with ceremonies.lock(session):
+                    # Another worker may have finished or reaped it first
+                    if session['deadline'] <= time.time():
+                        if session['status'] == 'in_progress':
+                            expire_round(session)
+                        elif session['status'] == 'finalizing':
+                            ceremonies.start_round(session, 'finalize')
+                            retry_finalization = True
+                if retry_finalization:
+                    finalizer.submit(session_id)
+        except Exception:
+            logger.exception("Round reaper failed")
+
+def start_background_threads():
+    """Start the round reaper and signing dispatcher, once per process serving requests"""
+    threading.Thread(target=reap_expired_rounds, name="round-reaper", daemon=True).start()
+    threading.Thread(target=signing_queue.run, name="signing-dispatcher", daemon=True).start()
+
 if __name__ == '__main__':
-    app.run(host=SERVER_CONFIG['host'], port=SERVER_CONFIG['port'], debug=True)
+    start_background_threads()
+    # HTTP/1.1 so clients can keep pooled connections alive between requests
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+    # The reloader would re-run this module in a child process, doubling every background thread
+    app.run(host=SERVER_CONFIG['host'], port=SERVER_CONFIG['port'], debug=True, use_reloader=False)
@@ -0,0 +1,294 @@
+"""Crash-safe coordinator state on SQLite
+
+All coordinator state lives in one table of (namespace, key) -> JSON value
+rows in a WAL-mode database, so a restarted coordinator resumes in-flight
+ceremonies and several worker processes can share one database file.
+
+- Writes are group-committed: put() queues the row and a writer thread
+  commits everything queued in one transaction. flush() waits for that.
+- Reads go through an in-memory LRU cache. The cache is dropped whenever
+  SQLite's data_version shows another process has committed.
+- StripeLock serializes updates to one key across threads and processes.
+"""
+import fcntl
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Marks a queued delete in the pending-writes map
+_DELETED = object()
+
+def _encode_default(value):
+    if isinstance(value, bytes):
+        return {'__bytes__': value.hex()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _decode_hook(value):
+    if len(value) == 1 and '__bytes__' in value:
+        return bytes.fromhex(value['__bytes__'])
+    return value
+
+def encode_value(value):
+    return json.dumps(value, default=_encode_default, separators=(',', ':'))
+
+def decode_value(text):
+    return json.loads(text, object_hook=_decode_hook)
+
+class StateStore:
+    """SQLite-backed key/value store with group commit and an LRU read cache"""
+
+    def __init__(self, path, cache_size=4096, flush_interval=0.002):
+        self.path = path
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+
+        # One connection for reads and writes, so data_version only moves
+        # when another process commits
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn_lock = threading.Lock()
+        self._data_version = self._read_data_version()
+
+        self._cache = OrderedDict()  # {(namespace, key): value}
+        self._pending = {}  # {(namespace, key): (value, encoded) or _DELETED}
+        self._lock = threading.Lock()
+        self._queued = 0  # sequence number of the latest queued write
+        self._committed = 0  # sequence number of the latest committed write
+        self._wakeup = threading.Condition(self._lock)
+        self._writer = threading.Thread(target=self._write_loop, name="state-writer", daemon=True)
+        self._writer.start()
+
+    def _read_data_version(self):
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_external_writes(self):
+        """Drop the cache if another process committed since we last looked"""
+        with self._conn_lock:
+            version = self._read_data_version()
+        if version != self._data_version:
+            with self._lock:
+                self._data_version = version
+                self._cache.clear()
+
+    def _remember(self, cache_key, value):
+        self._cache[cache_key] = value
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get(self, namespace, key, default=None):
+        cache_key = (namespace, key)
+        with self._lock:
+            if cache_key in self._pending:
+                pending = self._pending[cache_key]
+                return default if pending is _DELETED else pending[0]
+        self._check_external_writes()
+        with self._lock:
+            if cache_key in self._cache:
+                self._cache.move_to_end(cache_key)
+                return self._cache[cache_key]
+        with self._conn_lock:
+            row = self._conn.execute(
+                "SELECT value FROM state WHERE namespace = ? AND key = ?", cache_key
+            ).fetchone()
+        if row is None:
+            return default
+        value = decode_value(row[0])
+        with self._lock:
+            # A write may have been queued while we were reading
+            if cache_key in self._pending:
+                pending = self._pending[cache_key]
+                return default if pending is _DELETED else pending[0]
+            self._remember(cache_key, value)
+        return value
+
+    def put(self, namespace, key, value):
+        """Queue a write; it is visible to get() at once and durable after flush()
+
+        The value is encoded here, while the caller still holds whatever lock
+        protects it, so later in-place changes cannot race the writer thread.
+        """
+        cache_key = (namespace, key)
+        encoded = encode_value(value)
+        with self._lock:
+            self._pending[cache_key] = (value, encoded)
+            self._remember(cache_key, value)
+            self._queued += 1
+            self._wakeup.notify_all()
+
+    def delete(self, namespace, key):
+        cache_key = (namespace, key)
+        with self._lock:
+            self._pending[cache_key] = _DELETED
+            self._cache.pop(cache_key, None)
+            self._queued += 1
+            self._wakeup.notify_all()
+
+    def invalidate(self, namespace, key):
+        """Forget a value changed in place without put(), so the next get() reads the stored one"""
+        cache_key = (namespace, key)
+        with self._lock:
+            self._cache.pop(cache_key, None)
+            pending = self._pending.get(cache_key)
+            if pending is not None and pending is not _DELETED:
+                # The queued write was encoded when put() was called, before the changes
+                self._pending[cache_key] = (decode_value(pending[1]), pending[1])
+
+    def keys(self, namespace):
+        self.flush()
+        with self._conn_lock:
+            rows = self._conn.execute(
+                "SELECT key FROM state WHERE namespace = ? ORDER BY updated_at", (namespace,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def expire(self, namespace, max_age):
+        """Delete rows in a namespace that have not been written for max_age seconds; returns them as {key: value}"""
+        self.flush()
+        cutoff = time.time() - max_age
+        with self._conn_lock:
+            expired = {key: value for key, value in self._conn.execute(
+                "SELECT key, value FROM state WHERE namespace = ? AND updated_at < ?", (namespace, cutoff)
+            )}
+            self._conn.execute(
+                "DELETE FROM state WHERE namespace = ? AND updated_at < ?", (namespace, cutoff)
+            )
+        with self._lock:
+            for key in expired:
+                self._cache.pop((namespace, key), None)
+        return {key: decode_value(value) for key, value in expired.items()}
+
+    def flush(self):
+        """Block until every write queued so far has been committed"""
+        with self._lock:
+            target = self._queued
+            self._wakeup.notify_all()
+            while self._committed < target:
+                self._wakeup.wait()
+
+    def _write_loop(self):
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._wakeup.wait()
+            # Give concurrent writers a moment to join this transaction
+            time.sleep(self.flush_interval)
+            with self._lock:
+                batch = self._pending
+                self._pending = {}
+                sequence = self._queued
+            now = time.time()
+            upserts = [
+                (namespace, key, pending[1], now)
+                for (namespace, key), pending in batch.items()
+                if pending is not _DELETED
+            ]
+            deletes = [cache_key for cache_key, pending in batch.items() if pending is _DELETED]
+            try:
+                self._commit(upserts, deletes)
+            except sqlite3.Error:
+                logger.exception("State store commit failed, retrying")
+                with self._lock:
+                    # Newer writes to the same keys win over the failed batch
+                    self._pending = {**batch, **self._pending}
+                time.sleep(0.1)
+                continue
+            with self._lock:
+                self._committed = sequence
+                self._wakeup.notify_all()
+
+    def _commit(self, upserts, deletes):
+        with self._conn_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO state (namespace, key, value, updated_at) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (namespace, key) DO UPDATE"
+                    " SET value = excluded.value, updated_at = excluded.updated_at",
+                    upserts
+                )
+                self._conn.executemany("DELETE FROM state WHERE namespace = ? AND key = ?", deletes)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+
+class PersistentDict(MutableMapping):
+    """dict-like view of one store namespace
+
+    Values are returned by reference from the cache, so in-place changes
+    must be written back with `mapping[key] = value`.
+    """
+
+    def __init__(self, store, namespace):
+        self._store = store
+        self._namespace = namespace
+
+    def __getitem__(self, key):
+        value = self._store.get(self._namespace, key, _DELETED)
+        if value is _DELETED:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._store.put(self._namespace, key, value)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._store.delete(self._namespace, key)
+
+    def __contains__(self, key):
+        return self._store.get(self._namespace, key, _DELETED) is not _DELETED
+
+    def __iter__(self):
+        return iter(self._store.keys(self._namespace))
+
+    def invalidate(self, key):
+        """Drop in-place changes to a value that were not written back"""
+        self._store.invalidate(self._namespace, key)
+
+    def __len__(self):
+        return len(self._store.keys(self._namespace))
+
+class StripeLock:
+    """Striped lock that excludes other threads and other processes
+
+    Each key hashes to one of `stripes` slots. A slot is a threading.Lock
+    for this process plus a one-byte fcntl record lock on a shared lock
+    file for other processes (record locks are per process, which is why
+    the thread lock is taken first).
+    """
+
+    def __init__(self, path, stripes=1024):
+        self._stripes = stripes
+        self._thread_locks = [threading.Lock() for _ in range(stripes)]
+        self._fd = open(path, 'a+b')
+
+    @contextmanager
+    def __call__(self, key):
+        stripe = zlib.crc32(key.encode()) % self._stripes
+        with self._thread_locks[stripe]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe)
@@ -0,0 +1,154 @@
+"""Shared fixtures; the client/ and server/ directories are put on sys.path as the images run them
+
+Modules kept identical in both directories (secp256k1, wire, batch_auth,
+derivation) are imported from server/.
+"""
+import importlib.util
+import json
+import os
+import secrets
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / 'server'), str(ROOT / 'client')]
+
+@pytest.fixture(scope='session')
+def coordinator(tmp_path_factory):
+    """server/server.py imported in a scratch directory, with its own config.json and state database
+
+    It is loaded by path: collecting demo/ from the repo root puts that
+    directory, with its own server.py, first on sys.path.
+    """
+    workdir = tmp_path_factory.mktemp('coordinator')
+    config = json.loads((ROOT / 'server' / 'config.json').read_text())
+    config['state_db'] = str(workdir / 'coordinator.db')
+    (workdir / 'config.json').write_text(json.dumps(config))
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    spec = importlib.util.spec_from_file_location('server', ROOT / 'server' / 'server.py')
+    server = importlib.util.module_from_spec(spec)
+    sys.modules['server'] = server
+    try:
+        spec.loader.exec_module(server)
+    finally:
+        os.chdir(cwd)
+    return server
+
+@pytest.fixture
+def http(coordinator):
+    """Flask test client for the coordinator; no background threads run"""
+    return coordinator.app.test_client()
+
+@pytest.fixture
+def dkg(http):
+    """A completed single-key DKG run through the endpoints by five simulated devices
+
+    Returns {"session_id", "device_ids", "secret_shares": {device_id: x_i}, "eth_address"}.
+    Device names are unique per test, so event feeds and latencies do not carry over.
+    """
+    from device_crypto import deal_shares
+    from secp256k1 import N, point_to_json
+
+    prefix = f"dev{secrets.token_hex(4)}"
+    device_ids = [f"{prefix}_device_{i}" for i in range(1, 6)]
+    session_id = http.post('/dkg/start', json={'total_signers': len(device_ids)}).json['session_id']
+    secret_shares = dict.fromkeys(device_ids, 0)
+    for dealer in device_ids:
+        points, shares = deal_shares([secrets.randbelow(N) for _ in range(3)], range(1, len(device_ids) + 1))
+        response = http.post('/dkg/submit', json={
+            'session_id': session_id,
+            'device_id': dealer,
+            'share_index': device_ids.index(dealer) + 1,
+            'commitments': [point_to_json(point) for point in points],
+            'shares': dict(zip(device_ids, shares))
+        })
+        assert response.status_code == 200, response.json
+        for device_id, share in zip(device_ids, shares):
+            secret_shares[device_id] = (secret_shares[device_id] + share) % N
+    eth_address = http.get('/dkg/keys', query_string={'session_id': session_id}).json['keys'][0]['eth_address']
+    return {'session_id': session_id, 'device_ids': device_ids, 'secret_shares': secret_shares,
+            'eth_address': eth_address}
+
+class SimulatedDevices:
+    """Device side of signing ceremonies over a `dkg` fixture's shares, posted through the test client
+
+    Batch sessions take one vector per device per round, the others one
+    value; `batch` picks which shape is sent.
+    """
+
+    def __init__(self, http, dkg):
+        self.http = http
+        self.dkg = dkg
+        self.states = {}  # {(session_id or presignature_id, device_id): signing state}
+
+    def state(self, slot, device_id, count):
+        from secp256k1 import N
+        return self.states.setdefault((slot, device_id), {
+            'x': [self.dkg['secret_shares'][device_id]] * count,
+            'k': [secrets.randbelow(N) for _ in range(count)],
+            'gamma': [secrets.randbelow(N) for _ in range(count)]
+        })
+
+    def post(self, path, body, expect=200):
+        response = self.http.post(path, json=body)
+        assert response.status_code == expect, response.json
+        return response.json
+
+    def commit(self, session_id, device_id, count=1, batch=False):
+        from secp256k1 import base_mult, point_to_json
+        state = self.state(session_id, device_id, count)
+        commitments = [{'Gamma_i': point_to_json(base_mult(gamma))} for gamma in state['gamma']]
+        return self.post('/signing/commit', {
+            'session_id': session_id, 'device_id': device_id,
+            'commitment': commitments if batch else commitments[0]
+        })
+
+    def run_mta(self, slot, quorum, coefficients):
+        """Simulated MtA among the quorum's states for one session or presignature"""
+        from client import EnclaveClient
+        states = {device_id: self.states[(slot, device_id)] for device_id in quorum}
+        for device_id, state in states.items():
+            EnclaveClient.prepare_mta(state, coefficients[device_id])
+        for device_id, state in states.items():
+            for other_id, other in states.items():
+                if other_id != device_id:
+                    EnclaveClient.mta(state, other)
+
+    def shares(self, slot, device_id, message_hashes, r_values):
+        from secp256k1 import N
+        state = self.states[(slot, device_id)]
+        return [hex((int(m, 16) * k + int(r, 16) * sigma) % N)
+                for m, r, k, sigma in zip(message_hashes, r_values, state['k'], state['sigma'])]
+
+    def sign(self, session_id, selected, message_hashes, batch=False, corrupt=None):
+        """Commit, MtA and share rounds of an interactive session; returns /signing/result
+
+        The device named by `corrupt` sends shares off by one.
+        """
+        count = len(message_hashes)
+        pack = (lambda values: values) if batch else (lambda values: values[0])
+        for device_id in selected:
+            response = self.commit(session_id, device_id, count, batch)
+            if 'quorum' in response:
+                break
+        quorum = response['quorum']
+        self.run_mta(session_id, quorum, response['coefficients'])
+        for device_id in quorum:
+            delta = [hex(delta_i) for delta_i in self.states[(session_id, device_id)]['delta']]
+            response = self.post('/signing/mta', {
+                'session_id': session_id, 'device_id': device_id, 'delta': pack(delta)
+            })
+        r_values = response['r'] if batch else [response['r']]
+        for device_id in quorum:
+            share = self.shares(session_id, device_id, message_hashes, r_values)
+            if device_id == corrupt:
+                share = [hex(int(s_i, 16) + 1) for s_i in share]
+            self.post('/signing/share', {'session_id': session_id, 'device_id': device_id, 'share': pack(share)})
+        return self.http.get('/signing/result', query_string={'session_id': session_id, 'timeout': 5}).json
+
+@pytest.fixture
+def devices(http, dkg):
+    return SimulatedDevices(http, dkg)
@@ -0,0 +1,84 @@
+"""Merkle batch authentication of device requests"""
+import base64
+import secrets
+
+import pytest
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+import batch_auth
+from secp256k1 import N, base_mult, point_to_json
+
+def messages(count):
+    entries = [{'presignature_id': f"presig_{i:04}", 'delta_i': hex(i)} for i in range(count)]
+    return batch_auth.presignature_messages('presign_1', 'device_1', entries)
+
+@pytest.mark.parametrize('count', [1, 2, 3, 7, 8, 33])
+def test_every_proof_leads_to_the_root(count):
+    batch = messages(count)
+    root, proofs = batch_auth.merkle_proofs(batch)
+    assert root == batch_auth.merkle_root(batch)
+    for message, proof in zip(batch, proofs):
+        assert batch_auth.root_from_proof(message, proof) == root
+
+def test_proof_does_not_cover_another_message():
+    batch = messages(4)
+    root, proofs = batch_auth.merkle_proofs(batch)
+    forged = {**batch[0], 'entry': {**batch[0]['entry'], 'delta_i': hex(99)}}
+    assert batch_auth.root_from_proof(forged, proofs[0]) != root
+    assert batch_auth.root_from_proof(batch[1], proofs[0]) != root
+
+def test_messages_are_bound_to_session_and_type():
+    share = batch_auth.share_messages('signing_1', 'device_1', hex(5))
+    other_session = batch_auth.share_messages('signing_2', 'device_1', hex(5))
+    other_type = batch_auth.mta_messages('signing_1', 'device_1', hex(5))
+    assert len({batch_auth.merkle_root(batch) for batch in (share, other_session, other_type)}) == 3
+
+def test_signing_payloads_are_domain_separated():
+    root = batch_auth.merkle_root(messages(2))
+    rotation = batch_auth.rotation_signing_payload('device_1', 'PEM')
+    assert batch_auth.root_signing_payload(root) != rotation
+    assert rotation != batch_auth.rotation_signing_payload('device_2', 'PEM')
+
+def test_empty_batch_is_rejected():
+    with pytest.raises(ValueError):
+        batch_auth.merkle_root([])
+
+def test_batch_vectors_get_one_leaf_per_entry():
+    vector = [hex(i) for i in range(5)]
+    batch = batch_auth.share_messages('signing_1', 'device_1', vector)
+    assert [message['index'] for message in batch] == list(range(5))
+    assert [message['share'] for message in batch] == vector
+    root, proofs = batch_auth.merkle_proofs(batch)
+    assert all(batch_auth.root_from_proof(message, proof) == root for message, proof in zip(batch, proofs))
+    # Reordering the vector changes what the root covers
+    assert batch_auth.merkle_root(batch_auth.share_messages('signing_1', 'device_1', vector[::-1])) != root
+    assert len(batch_auth.share_messages('signing_1', 'device_1', hex(5))) == 1
+
+def test_one_signature_authenticates_a_whole_batch_round(coordinator, http, dkg):
+    device_id = dkg['device_ids'][0]
+    key = ec.generate_private_key(ec.SECP256R1())
+    http.post('/enroll', json={
+        'device_id': device_id,
+        'enrollment_key': coordinator.SERVER_CONFIG['enrollment_key'],
+        'public_key': key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+    })
+    transaction = {'to': '0x742d35Cc6634C0532925a3b844Bc454e4438f44f', 'gasPrice': 1, 'gas': 21000}
+    session_id = http.post('/signing/batch', json={
+        'dkg_session_id': dkg['session_id'], 'transactions': [transaction] * 4
+    }).json['session_id']
+    commitment = [{'Gamma_i': point_to_json(base_mult(secrets.randbelow(N - 1) + 1))} for _ in range(4)]
+    messages = batch_auth.commitment_messages(session_id, device_id, commitment)
+    root = batch_auth.merkle_root(messages)
+    signature = base64.b64encode(key.sign(batch_auth.root_signing_payload(root), ec.ECDSA(hashes.SHA256())))
+    auth = {'root': root.hex(), 'signature': signature.decode()}
+
+    tampered = [commitment[1], commitment[0], *commitment[2:]]
+    body = {'session_id': session_id, 'device_id': device_id}
+    assert http.post('/signing/commit', json={**body, 'commitment': tampered, 'auth': auth}).status_code == 401
+    assert http.post('/signing/commit', json={**body, 'commitment': commitment, 'auth': auth}).status_code == 200
+    # Every entry is a leaf of the signed root, so each can also be proven alone
+    _, proofs = batch_auth.merkle_proofs(messages)
+    assert coordinator.request_auth.verify(device_id, messages[2:3], {**auth, 'proofs': proofs[2:3]})
@@ -0,0 +1,27 @@
+"""Ceremony registry locking and persistence"""
+import pytest
+
+def test_failed_update_is_rolled_back(coordinator):
+    ceremonies = coordinator.ceremonies
+    session = ceremonies.create('presign', 'presign', contributions={})
+    with ceremonies.lock(session):
+        session['contributions']['device_1'] = {'presig_1': {}}
+    with pytest.raises(RuntimeError):
+        with ceremonies.lock(session):
+            session['contributions']['mallory'] = {'presig_1': {}}
+            session['status'] = 'completed'
+            raise RuntimeError('handler failed midway')
+
+    assert session['status'] == 'in_progress'
+    assert list(session['contributions']) == ['device_1']
+    stored = ceremonies.get(session['session_id'], 'presign')
+    assert stored['status'] == 'in_progress'
+    assert list(stored['contributions']) == ['device_1']
+
+    # The next successful update must not persist the discarded changes
+    with ceremonies.lock(session):
+        session['round'] = 'done'
+    coordinator.state_store.invalidate('presign_sessions', session['session_id'])
+    stored = ceremonies.get(session['session_id'], 'presign')
+    assert stored['round'] == 'done'
+    assert list(stored['contributions']) == ['device_1']
@@ -0,0 +1,88 @@
+"""DKG endpoints, driven through the Flask test client"""
+import secrets
+
+import pytest
+
+from device_crypto import deal_shares
+from secp256k1 import N, point_to_json
+
+def dkg_message(session_id, dealer, device_ids, share_index=None):
+    points, shares = deal_shares([secrets.randbelow(N) for _ in range(3)], range(1, len(device_ids) + 1))
+    message = {
+        'session_id': session_id,
+        'device_id': dealer,
+        'commitments': [point_to_json(point) for point in points],
+        'shares': dict(zip(device_ids, shares))
+    }
+    if share_index is not None:
+        message['share_index'] = share_index
+    return message
+
+def test_failed_submission_leaves_no_trace(coordinator, http):
+    prefix = f"dev{secrets.token_hex(4)}"
+    device_ids = [f"{prefix}_device_{i}" for i in (1, 2)]
+    session_id = http.post('/dkg/start', json={'total_signers': 2}).json['session_id']
+    http.post('/dkg/submit', json=dkg_message(session_id, device_ids[0], device_ids, 1))
+
+    response = http.post('/dkg/submit', json=dkg_message(session_id, 'mallory', device_ids))
+    assert response.status_code == 400
+
+    response = http.post('/dkg/submit', json=dkg_message(session_id, device_ids[1], device_ids, 2))
+    assert response.json['status'] == 'complete'
+    session = coordinator.ceremonies.get(session_id, 'dkg')
+    assert sorted(session['shares']) == device_ids
+    assert sorted(session['commitments']) == device_ids
+    assert session['submission_log'] == device_ids
+
+def new_devices(count=3):
+    prefix = f"dev{secrets.token_hex(4)}"
+    return [f"{prefix}_device_{i}" for i in range(1, count + 1)]
+
+@pytest.mark.parametrize('named', [False, True])
+@pytest.mark.parametrize('change, status', [
+    # Not a participant, though it sends a full set of shares
+    (lambda message, devices: {**message, 'device_id': 'mallory_2'}, 403),
+    # Shares addressed to someone other than the participants
+    (lambda message, devices: {**message, 'shares': {**message['shares'], 'mallory_4': 1}}, 400),
+    (lambda message, devices: {**message, 'share_index': 'two'}, 400),
+    (lambda message, devices: {**message, 'share_index': 4}, 400),
+    (lambda message, devices: {**message, 'share_index': 1}, 400),
+    (lambda message, devices: {key: value for key, value in message.items() if key != 'shares'}, 400),
+    (lambda message, devices: {**message, 'commitments': [{'x': 1, 'y': 2}] * 3}, 400),
+])
+def test_bad_submission_is_refused_untouched(coordinator, http, named, change, status):
+    devices = new_devices()
+    session_id = http.post('/dkg/start', json={
+        'total_signers': 3, **({'participants': devices} if named else {})
+    }).json['session_id']
+    assert http.post('/dkg/submit', json=dkg_message(session_id, devices[0], devices, 1)).status_code == 200
+    before = coordinator.ceremonies.get(session_id, 'dkg')
+    before = {key: before[key] for key in ('commitments', 'shares', 'share_indices', 'submission_log')}
+
+    response = http.post('/dkg/submit', json=change(dkg_message(session_id, devices[1], devices, 2), devices))
+    assert response.status_code == status
+    session = coordinator.ceremonies.get(session_id, 'dkg')
+    assert {key: session[key] for key in before} == before
+
+def test_named_participants_bind_the_first_dealer(http):
+    devices = new_devices()
+    session_id = http.post('/dkg/start', json={'total_signers': 3, 'participants': devices}).json['session_id']
+    others = new_devices()
+    response = http.post('/dkg/submit', json=dkg_message(session_id, others[0], others, 1))
+    assert response.status_code == 403
+
+@pytest.mark.parametrize('body', [
+    {'total_signers': 3, 'participants': ['device_1', 'device_2']},
+    {'total_signers': 2, 'participants': ['device_1', 'device_1']},
+    {'participants': 'device_1'},
+])
+def test_start_rejects_bad_participants(http, body):
+    assert http.post('/dkg/start', json=body).status_code == 400
+
+def test_batch_dkg_rejects_malformed_vectors(http):
+    devices = new_devices()
+    session_id = http.post('/dkg/start', json={'total_signers': 3, 'key_count': 2}).json['session_id']
+    message = dkg_message(session_id, devices[0], devices, 1)
+    message['commitments'] = [message['commitments']] * 2
+    message['shares'] = {device_id: 5 for device_id in devices}
+    assert http.post('/dkg/submit', json=message).status_code == 400
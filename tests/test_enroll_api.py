@@ -0,0 +1,67 @@
+"""Enclave key enrollment and rotation, driven through the Flask test client"""
+import base64
+import secrets
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+import batch_auth
+from secp256k1 import N, base_mult, point_to_json
+
+def new_key():
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    return private_key, public_pem
+
+def sign(private_key, payload):
+    return base64.b64encode(private_key.sign(payload, ec.ECDSA(hashes.SHA256()))).decode()
+
+def enroll(http, device_id, public_pem, **fields):
+    return http.post('/enroll', json={'device_id': device_id, 'public_key': public_pem, **fields})
+
+def test_first_enrollment_needs_the_enrollment_key(coordinator, http):
+    device_id = f"device_{secrets.token_hex(4)}"
+    _, public_pem = new_key()
+    assert enroll(http, device_id, public_pem).status_code == 401
+    assert enroll(http, device_id, public_pem, enrollment_key='guess').status_code == 401
+    enrollment_key = coordinator.SERVER_CONFIG['enrollment_key']
+    assert enroll(http, device_id, public_pem, enrollment_key=enrollment_key).status_code == 200
+    # Re-sending the current key is a no-op
+    assert enroll(http, device_id, public_pem).status_code == 200
+
+def test_rotation_must_be_signed_by_the_current_key(coordinator, http):
+    device_id = f"device_{secrets.token_hex(4)}"
+    current, current_pem = new_key()
+    enroll(http, device_id, current_pem, enrollment_key=coordinator.SERVER_CONFIG['enrollment_key'])
+    other, other_pem = new_key()
+    payload = batch_auth.rotation_signing_payload(device_id, other_pem)
+
+    assert enroll(http, device_id, other_pem).status_code == 401
+    # The enrollment key does not override the current key
+    assert enroll(http, device_id, other_pem,
+                  enrollment_key=coordinator.SERVER_CONFIG['enrollment_key']).status_code == 401
+    assert enroll(http, device_id, other_pem, signature=sign(other, payload)).status_code == 401
+    assert enroll(http, device_id, other_pem, signature=sign(current, payload)).status_code == 200
+    assert coordinator.enrolled_devices[device_id]['public_key'] == other_pem
+
+def test_malformed_enrollment(coordinator, http):
+    enrollment_key = coordinator.SERVER_CONFIG['enrollment_key']
+    assert http.post('/enroll', json={'device_id': 'device_x'}).status_code == 400
+    assert enroll(http, f"device_{secrets.token_hex(4)}", 'not a key', enrollment_key=enrollment_key).status_code == 400
+
+def test_signed_requests_follow_the_enrolled_key(coordinator, http, dkg):
+    device_id = dkg['device_ids'][0]
+    current, current_pem = new_key()
+    enroll(http, device_id, current_pem, enrollment_key=coordinator.SERVER_CONFIG['enrollment_key'])
+    session_id = http.post('/signing/start', json={'dkg_session_id': dkg['session_id'], 'presign': False}).json['session_id']
+    commitment = {'Gamma_i': point_to_json(base_mult(secrets.randbelow(N - 1) + 1))}
+    root = batch_auth.merkle_root(batch_auth.commitment_messages(session_id, device_id, commitment))
+    body = {'session_id': session_id, 'device_id': device_id, 'commitment': commitment}
+
+    stranger, _ = new_key()
+    forged = {'root': root.hex(), 'signature': sign(stranger, batch_auth.root_signing_payload(root))}
+    assert http.post('/signing/commit', json={**body, 'auth': forged}).status_code == 401
+    auth = {'root': root.hex(), 'signature': sign(current, batch_auth.root_signing_payload(root))}
+    assert http.post('/signing/commit', json={**body, 'auth': auth}).status_code == 200
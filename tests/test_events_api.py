@@ -0,0 +1,52 @@
+"""Device event feeds over long-poll and SSE, driven through the Flask test client"""
+import json
+
+def poll(http, device_id, **params):
+    response = http.get(f"/events/{device_id}/poll", query_string={'timeout': 0, **params})
+    assert response.status_code == 200
+    return response.json
+
+def test_poll_resumes_after_the_cursor(http, dkg):
+    device_id = dkg['device_ids'][0]
+    feed = poll(http, device_id)
+    assert [event['type'] for event in feed['events']] == ['round_open']
+    assert feed['events'][0]['session_id'] == dkg['session_id']
+    assert poll(http, device_id, since=feed['cursor']) == {'device_id': device_id, 'events': [], 'cursor': feed['cursor']}
+
+    started = http.post('/signing/start', json={'dkg_session_id': dkg['session_id'], 'presign': False}).json
+    events = poll(http, device_id, since=feed['cursor'])['events']
+    assert [(event['type'], event['session_id']) for event in events] == [('signing_request', started['session_id'])]
+    assert events[0]['message_hash'] == started['message_hash']
+    assert poll(http, 'device_unknown') == {'device_id': 'device_unknown', 'events': [], 'cursor': 0}
+
+def test_poll_ignores_an_unparsable_timeout(http, dkg):
+    assert poll(http, dkg['device_ids'][0], timeout='soon')['events']
+
+def read_sse(response, count):
+    """The first `count` messages of an event stream"""
+    messages = []
+    for chunk in response.response:
+        messages.append(chunk.decode() if isinstance(chunk, bytes) else chunk)
+        if len(messages) == count:
+            break
+    response.close()
+    return messages
+
+def test_event_stream_resumes_after_last_event_id(http, dkg):
+    device_id = dkg['device_ids'][1]
+    http.post('/signing/start', json={'dkg_session_id': dkg['session_id'], 'presign': False})
+    response = http.get(f"/events/{device_id}", buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    connected, first, second = read_sse(response, 3)
+    assert connected == ": connected\n\n"
+    assert first.startswith("id: 1\nevent: round_open\n")
+    assert second.startswith("id: 2\nevent: signing_request\n")
+
+    response = http.get(f"/events/{device_id}", headers={'Last-Event-ID': '1'}, buffered=False)
+    _, resumed = read_sse(response, 2)
+    assert resumed == second
+    data = json.loads(resumed.split('data: ', 1)[1])
+    assert data['type'] == 'signing_request'
+
+def test_event_stream_rejects_a_bad_cursor(http):
+    assert http.get('/events/device_1', headers={'Last-Event-ID': 'latest'}).status_code == 400
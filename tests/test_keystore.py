@@ -0,0 +1,94 @@
+"""Append-only device keystore, including several processes sharing one log"""
+import multiprocessing
+
+import keystore
+from keystore import Keystore
+
+def test_records_survive_reopening(tmp_path):
+    path = str(tmp_path / 'keystore.log')
+    store = Keystore(path)
+    store.put_device('device_1', {'name': 'one'})
+    store.put_key_materials('device_1', {'0xa': {'share': 1}, '0xb': {'share': 2}})
+    store.put_presignatures('device_1', {'presig_1': {'k': '1', 'sigma': '2'}})
+    store.delete_presignature('device_1', 'presig_1')
+    store.put_key_material('device_1', '0xa', {'share': 3})
+
+    reopened = Keystore(path)
+    assert reopened.device('device_1') == {'name': 'one'}
+    assert reopened.key_materials('device_1') == {'0xa': {'share': 3}, '0xb': {'share': 2}}
+    assert reopened.presignature('device_1', 'presig_1') is None
+
+def test_torn_final_line_is_dropped(tmp_path):
+    path = tmp_path / 'keystore.log'
+    Keystore(str(path)).put_device('device_1', {'name': 'one'})
+    with open(path, 'ab') as f:
+        f.write(b'device\tdevice_2\t{"na')
+    store = Keystore(str(path))
+    assert store.device_names() == ['device_1']
+    store.put_device('device_3', {'name': 'three'})
+    assert Keystore(str(path)).device('device_3') == {'name': 'three'}
+
+def test_writers_index_each_others_appends(tmp_path):
+    path = str(tmp_path / 'keystore.log')
+    first, second = Keystore(path), Keystore(path)
+    first.put_device('device_1', {'name': 'one'})
+    second.put_device('device_2', {'name': 'two'})
+    first.put_device('device_1', {'name': 'uno'})
+    # Offsets come from the real end of the log, whoever wrote last
+    assert second.device('device_2') == {'name': 'two'}
+    assert first.device('device_2') == {'name': 'two'}
+    assert Keystore(path).device('device_1') == {'name': 'uno'}
+
+def test_writer_follows_another_process_compacting(tmp_path, monkeypatch):
+    monkeypatch.setattr(keystore, 'COMPACT_MIN_LINES', 8)
+    path = str(tmp_path / 'keystore.log')
+    first, second = Keystore(path), Keystore(path)
+    second.put_device('device_2', {'name': 'two'})
+    for i in range(12):
+        first.put_device('device_1', {'version': i})
+    second.put_device('device_3', {'name': 'three'})
+    reopened = Keystore(path)
+    assert reopened.device('device_1') == {'version': 11}
+    assert reopened.device('device_2') == {'name': 'two'}
+    assert reopened.device('device_3') == {'name': 'three'}
+    assert reopened._lines < 14
+
+def append_devices(path, writer, count):
+    store = Keystore(path)
+    for i in range(count):
+        store.put_key_material(f"device_{writer}", f"0x{i:04x}", {'writer': writer, 'i': i})
+
+def test_concurrent_processes(tmp_path):
+    path = str(tmp_path / 'keystore.log')
+    Keystore(path)
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=append_devices, args=(path, writer, 200)) for writer in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+    store = Keystore(path)
+    for writer in range(4):
+        materials = store.key_materials(f"device_{writer}")
+        assert len(materials) == 200
+        assert all(material == {'writer': writer, 'i': int(address, 16)} for address, material in materials.items())
+
+def test_listings_only_cover_their_device(tmp_path):
+    path = str(tmp_path / 'keystore.log')
+    store = Keystore(path)
+    store.put_device('device_1', {'name': 'one'})
+    store.put_device('device_10', {'name': 'ten'})
+    store.put_key_materials('device_1', {'0xa': {'share': 1}, '0xb': {'share': 2}})
+    store.put_key_material('device_10', '0xc', {'share': 3})
+    store.put_ceremony('ceremony_1', {'status': 'done'})
+    store.put_key_material('device_1', '0xb', None)
+
+    for opened in (store, Keystore(path)):
+        assert opened.device_names() == ['device_1', 'device_10']
+        assert opened.eth_addresses('device_1') == ['0xa']
+        assert opened.eth_addresses('device_10') == ['0xc']
+        assert opened.eth_addresses('device_2') == []
+        assert opened.ceremonies() == {'ceremony_1': {'status': 'done'}}
+    store.compact()
+    assert store.eth_addresses('device_1') == ['0xa']
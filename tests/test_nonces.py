@@ -0,0 +1,75 @@
+"""Per-EOA nonce allocation"""
+import secrets
+
+import pytest
+
+from store import StripeLock
+
+@pytest.fixture
+def nonces(coordinator, tmp_path):
+    return coordinator.NonceAllocator(coordinator.state_store, StripeLock(str(tmp_path / 'nonces.lock')))
+
+@pytest.fixture
+def eoa():
+    return '0x' + secrets.token_hex(20)
+
+def test_allocates_consecutive_nonces(nonces, eoa):
+    assert nonces.allocate(eoa, 3) == [0, 1, 2]
+    assert nonces.allocate(eoa) == [3]
+    assert nonces.state(eoa)['pending'] == [0, 1, 2, 3]
+
+def test_released_nonces_are_reused_first(nonces, eoa):
+    nonces.allocate(eoa, 4)
+    nonces.release(eoa, [1, 2])
+    assert nonces.state(eoa)['gaps'] == [1, 2]
+    assert nonces.allocate(eoa, 3) == [1, 2, 4]
+
+def test_release_at_the_top_shrinks_next(nonces, eoa):
+    nonces.allocate(eoa, 3)
+    nonces.release(eoa, [2])
+    assert nonces.state(eoa)['next'] == 2
+    assert nonces.state(eoa)['gaps'] == []
+
+def test_reserve_rejects_clashes(nonces, eoa):
+    assert nonces.reserve(eoa, 2)
+    assert not nonces.reserve(eoa, 2)
+    # Skipped nonces become gaps for allocate to fill
+    assert nonces.allocate(eoa, 3) == [0, 1, 3]
+    nonces.confirm(eoa, [0])
+    assert not nonces.reserve(eoa, 0)
+
+def test_confirm_records_highest_signed(nonces, eoa):
+    nonces.allocate(eoa, 3)
+    nonces.confirm(eoa, [0, 1])
+    state = nonces.state(eoa)
+    assert state['pending'] == [2]
+    assert state['signed'] == 1
+
+def test_reset_refuses_to_go_below_signed(nonces, eoa):
+    nonces.allocate(eoa, 4)
+    nonces.confirm(eoa, [0, 1, 2, 3])
+    assert not nonces.reset(eoa, 2)
+    assert nonces.state(eoa)['next'] == 4
+    assert nonces.reset(eoa, 4)
+    assert nonces.reset(eoa, 6)
+    assert nonces.state(eoa)['next'] == 6
+
+def test_forced_reset_reissues_signed_nonces(nonces, eoa):
+    nonces.allocate(eoa, 3)
+    nonces.confirm(eoa, [0, 1, 2])
+    assert nonces.reset(eoa, 1, force=True)
+    assert nonces.allocate(eoa, 2) == [1, 2]
+
+def test_reset_never_reissues_pending_nonces(nonces, eoa):
+    nonces.allocate(eoa, 3)
+    assert nonces.reset(eoa, 0, force=True)
+    assert nonces.allocate(eoa) == [3]
+
+def test_expired_signing_session_settles_its_nonces(coordinator, eoa):
+    allocated = coordinator.nonces.allocate(eoa, 2)
+    coordinator.settle_expired_session({'status': 'in_progress', 'nonces': [[eoa, allocated[0]]]})
+    coordinator.settle_expired_session({'status': 'completed', 'nonces': [[eoa, allocated[1]]]})
+    state = coordinator.nonces.state(eoa)
+    assert state['pending'] == []
+    assert state['gaps'] == [0]
+    assert state['signed'] == 1
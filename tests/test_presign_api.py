@@ -0,0 +1,69 @@
+"""Presignature pool endpoints, driven through the Flask test client"""
+from secp256k1 import base_mult, point_to_json
+
+def contributions(devices, device_id, presignature_ids):
+    entries = []
+    for presignature_id in presignature_ids:
+        state = devices.states[(presignature_id, device_id)]
+        entries.append({
+            'presignature_id': presignature_id,
+            'Gamma_i': point_to_json(base_mult(state['gamma'][0])),
+            'delta_i': hex(state['delta'][0])
+        })
+    return entries
+
+def presign(http, dkg, devices, count):
+    started = devices.post('/presign/start', {'dkg_session_id': dkg['session_id'], 'count': count})
+    for presignature_id in started['presignature_ids']:
+        for device_id in started['participants']:
+            devices.state(presignature_id, device_id, 1)
+        devices.run_mta(presignature_id, started['participants'], started['coefficients'])
+    return started
+
+def test_presigned_signing_over_http(coordinator, http, dkg, devices):
+    started = presign(http, dkg, devices, 2)
+    for device_id in started['participants']:
+        response = devices.post('/presign/submit', {
+            'session_id': started['session_id'], 'device_id': device_id,
+            'presignatures': contributions(devices, device_id, started['presignature_ids'])
+        })
+    assert response == {'status': 'complete', 'available': 2}
+
+    signing = devices.post('/signing/start', {'dkg_session_id': dkg['session_id']})
+    presignature = signing['presignature']
+    assert presignature['presignature_id'] in started['presignature_ids']
+    for device_id in presignature['participants']:
+        share, = devices.shares(presignature['presignature_id'], device_id, [signing['message_hash']],
+                                [presignature['r']])
+        devices.post('/signing/share', {'session_id': signing['session_id'], 'device_id': device_id, 'share': share})
+    result = http.get('/signing/result', query_string={'session_id': signing['session_id'], 'timeout': 5}).json
+    assert result['status'] == 'completed'
+    assert coordinator.signed_by(result['serialized_transaction'], dkg['eth_address'])
+    status = http.get('/presign/status', query_string={'dkg_session_id': dkg['session_id']}).json
+    assert status['available'] == 1
+
+def test_bad_contributions_are_refused(http, dkg, devices):
+    started = presign(http, dkg, devices, 2)
+    device_id = started['participants'][0]
+    entries = contributions(devices, device_id, started['presignature_ids'])
+    session_id = started['session_id']
+    devices.post('/presign/submit', {'session_id': session_id, 'device_id': 'mallory_9', 'presignatures': entries},
+                 expect=403)
+    devices.post('/presign/submit', {'session_id': session_id, 'device_id': device_id, 'presignatures': entries[:1]},
+                 expect=400)
+    missing_delta = [{key: value for key, value in entry.items() if key != 'delta_i'} for entry in entries]
+    devices.post('/presign/submit', {'session_id': session_id, 'device_id': device_id,
+                                     'presignatures': missing_delta}, expect=400)
+    devices.post('/presign/submit', {'session_id': 'presign_unknown', 'device_id': device_id,
+                                     'presignatures': entries}, expect=404)
+
+def test_presigning_needs_a_completed_dkg(http):
+    session_id = http.post('/dkg/start', json={'total_signers': 3}).json['session_id']
+    assert http.post('/presign/start', json={'dkg_session_id': session_id}).status_code == 409
+    assert http.post('/presign/start', json={'dkg_session_id': 'dkg_unknown'}).status_code == 400
+
+def test_malformed_submission_is_a_bad_request(http, dkg, devices):
+    started = presign(http, dkg, devices, 1)
+    device_id = started['participants'][0]
+    for body in ({'device_id': device_id}, {'device_id': device_id, 'presignatures': [{'delta_i': '0x1'}]}):
+        devices.post('/presign/submit', {'session_id': started['session_id'], **body}, expect=400)
@@ -0,0 +1,85 @@
+"""Known-answer tests for the pure-Python curve arithmetic against OpenSSL (via cryptography)"""
+import secrets
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from secp256k1 import (
+    G, N, PIPPENGER_THRESHOLD, base_mult, multi_scalar_mult, point_add, point_from_bytes,
+    point_from_json, point_neg, point_to_bytes, point_to_json, scalar_mult
+)
+
+def reference_point(k):
+    """k * G computed by OpenSSL"""
+    numbers = ec.derive_private_key(k, ec.SECP256K1()).public_key().public_numbers()
+    return (numbers.x, numbers.y)
+
+def reference_compressed(k):
+    return ec.derive_private_key(k, ec.SECP256K1()).public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.CompressedPoint
+    )
+
+SCALARS = [1, 2, 3, 7, 2 ** 128 + 1, N - 2, N - 1] + [secrets.randbelow(N - 1) + 1 for _ in range(8)]
+
+@pytest.mark.parametrize('k', SCALARS)
+def test_base_mult_matches_openssl(k):
+    assert base_mult(k) == reference_point(k)
+
+def test_base_mult_of_order_is_infinity():
+    assert base_mult(0) is None
+    assert base_mult(N) is None
+
+@pytest.mark.parametrize('k', SCALARS)
+def test_scalar_mult_matches_openssl(k):
+    # k * (b * G) == (k * b) * G
+    b = secrets.randbelow(N - 1) + 1
+    assert scalar_mult(k, reference_point(b)) == reference_point(k * b % N)
+
+def test_scalar_mult_agrees_with_ecdh():
+    private_key = ec.generate_private_key(ec.SECP256K1())
+    peer = ec.generate_private_key(ec.SECP256K1())
+    shared_x = private_key.exchange(ec.ECDH(), peer.public_key())
+    peer_numbers = peer.public_key().public_numbers()
+    k = private_key.private_numbers().private_value
+    x, _ = scalar_mult(k, (peer_numbers.x, peer_numbers.y))
+    assert x.to_bytes(32, 'big') == shared_x
+
+def test_point_add_and_negation():
+    a, b = secrets.randbelow(N), secrets.randbelow(N)
+    assert point_add(reference_point(a), reference_point(b)) == reference_point((a + b) % N)
+    assert point_add(G, G) == reference_point(2)
+    assert point_add(G, point_neg(G)) is None
+    assert point_add(None, G) == G
+
+@pytest.mark.parametrize('count', [1, 2, 5, PIPPENGER_THRESHOLD - 1, PIPPENGER_THRESHOLD, 150])
+def test_multi_scalar_mult_matches_openssl(count):
+    # sum(a_i * (b_i * G)) == (sum(a_i * b_i)) * G, on both sides of the Strauss/Pippenger switch
+    scalars = [secrets.randbelow(N) for _ in range(count)]
+    bases = [secrets.randbelow(N - 1) + 1 for _ in range(count)]
+    points = [reference_point(b) for b in bases]
+    expected = sum(a * b for a, b in zip(scalars, bases)) % N
+    assert multi_scalar_mult(scalars, points) == reference_point(expected)
+
+def test_multi_scalar_mult_cancelling_terms():
+    P = reference_point(secrets.randbelow(N - 1) + 1)
+    assert multi_scalar_mult([5, N - 5], [P, P]) is None
+    assert multi_scalar_mult([0, 3], [P, None]) is None
+
+@pytest.mark.parametrize('k', SCALARS)
+def test_sec1_encoding_matches_openssl(k):
+    encoded = reference_compressed(k)
+    assert point_to_bytes(reference_point(k)) == encoded
+    assert point_from_bytes(encoded) == reference_point(k)
+    assert point_from_json(point_to_json(reference_point(k))) == reference_point(k)
+
+def test_sec1_rejects_off_curve_input():
+    with pytest.raises(ValueError):
+        point_from_bytes(b'\x04' + bytes(32))
+    with pytest.raises(ValueError):
+        point_from_bytes(b'\x02' + bytes(31))
+    # x = 5 has no square root for x^3 + 7 on secp256k1
+    with pytest.raises(ValueError):
+        point_from_bytes(b'\x02' + (5).to_bytes(32, 'big'))
+    with pytest.raises(ValueError):
+        point_from_json({'x': G[0], 'y': G[1] + 1})
@@ -0,0 +1,11 @@
+"""client/ and server/ each ship their own copy of the shared protocol modules; the copies must not drift"""
+import filecmp
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.parametrize('module', ['batch_auth.py', 'derivation.py', 'secp256k1.py', 'wire.py'])
+def test_client_and_server_copies_match(module):
+    assert filecmp.cmp(os.path.join(ROOT, 'client', module), os.path.join(ROOT, 'server', module), shallow=False)
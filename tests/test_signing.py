@@ -0,0 +1,111 @@
+"""Threshold signing end to end without the network: the signed transaction must recover to the group's address"""
+import secrets
+
+import pytest
+from eth_account import Account
+
+import derivation
+from client import EnclaveClient
+from device_crypto import deal_shares
+from secp256k1 import N, base_mult, point_to_json
+
+THRESHOLD = 3
+TOTAL_SIGNERS = 5
+
+@pytest.fixture(scope='module')
+def group():
+    """(secret shares by share index, group public key, chain code) of a simulated DKG"""
+    share_indices = range(1, TOTAL_SIGNERS + 1)
+    secret_shares = dict.fromkeys(share_indices, 0)
+    commitments = {}
+    for dealer in share_indices:
+        points, shares = deal_shares([secrets.randbelow(N) for _ in range(THRESHOLD)], share_indices)
+        commitments[f"device_{dealer}"] = [point_to_json(point) for point in points]
+        for j, share in zip(share_indices, shares):
+            secret_shares[j] = (secret_shares[j] + share) % N
+    return secret_shares, derivation.group_public_key(commitments), derivation.chain_code(commitments)
+
+def transaction(coordinator, nonce=0, chain_id=1):
+    return coordinator.parse_transaction({
+        'to': '0x742d35Cc6634C0532925a3b844Bc454e4438f44f',
+        'value': hex(10 ** 18),
+        'nonce': nonce,
+        'gasPrice': hex(20 * 10 ** 9),
+        'gas': 21000,
+        'chainId': chain_id
+    })
+
+def threshold_sign(coordinator, secret_shares, quorum, message_hash, tweak=0):
+    """Run commit, MtA and share rounds for one message over a quorum of share indices; returns (R, s)"""
+    device_ids = [f"device_{j}" for j in quorum]
+    states = {
+        device_id: {
+            'x': [derivation.derive_share(secret_shares[j], tweak)],
+            'k': [secrets.randbelow(N)],
+            'gamma': [secrets.randbelow(N)]
+        }
+        for device_id, j in zip(device_ids, quorum)
+    }
+    coefficients = coordinator.quorum_coefficients({}, device_ids)
+    for device_id, state in states.items():
+        EnclaveClient.prepare_mta(state, coefficients[device_id])
+    for device_id, state in states.items():
+        for other_id, other in states.items():
+            if other_id != device_id:
+                EnclaveClient.mta(state, other)
+    R = coordinator.combine_nonce(
+        [hex(state['delta'][0]) for state in states.values()],
+        [point_to_json(base_mult(state['gamma'][0])) for state in states.values()]
+    )
+    r = R[0] % N
+    m = int(message_hash, 16)
+    s = sum(m * state['k'][0] + r * state['sigma'][0] for state in states.values()) % N
+    return R, s
+
+def sign_transaction(coordinator, raw_tx, R, s):
+    r, s, v = coordinator.ethereum_signature(R, s, raw_tx['chainId'])
+    _, serialized = coordinator.build_signed_transaction(raw_tx, r, s, v)
+    return serialized, (r, s, v)
+
+@pytest.mark.parametrize('quorum', [(1, 2, 3), (2, 4, 5), (1, 2, 3, 4, 5)])
+@pytest.mark.parametrize('chain_id', [1, 5, 137])
+def test_signed_transaction_recovers_to_sender(coordinator, group, quorum, chain_id):
+    secret_shares, public_key, _ = group
+    raw_tx = transaction(coordinator, nonce=len(quorum), chain_id=chain_id)
+    R, s = threshold_sign(coordinator, secret_shares, quorum, coordinator.transaction_signing_hash(raw_tx))
+    serialized, (r, s, v) = sign_transaction(coordinator, raw_tx, R, s)
+
+    sender = derivation.eth_address(public_key)
+    assert Account.recover_transaction(serialized) == sender
+    assert coordinator.signed_by(serialized, sender)
+    assert s <= N // 2
+    assert v in (chain_id * 2 + 35, chain_id * 2 + 36)
+
+def test_derived_child_signs_for_its_own_address(coordinator, group):
+    secret_shares, public_key, chain = group
+    child, _, tweak = derivation.derive(public_key, chain, [7])
+    raw_tx = transaction(coordinator)
+    R, s = threshold_sign(coordinator, secret_shares, (1, 3, 5), coordinator.transaction_signing_hash(raw_tx), tweak)
+    serialized, _ = sign_transaction(coordinator, raw_tx, R, s)
+    assert Account.recover_transaction(serialized) == derivation.eth_address(child)
+
+def test_bad_share_does_not_recover_to_sender(coordinator, group):
+    secret_shares, public_key, _ = group
+    raw_tx = transaction(coordinator)
+    R, s = threshold_sign(coordinator, secret_shares, (1, 2, 3), coordinator.transaction_signing_hash(raw_tx))
+    serialized, _ = sign_transaction(coordinator, raw_tx, R, (s + 1) % N)
+    assert not coordinator.signed_by(serialized, derivation.eth_address(public_key))
+
+def test_too_few_signers_do_not_recover_to_sender(coordinator, group):
+    secret_shares, public_key, _ = group
+    raw_tx = transaction(coordinator)
+    R, s = threshold_sign(coordinator, secret_shares, (1, 2), coordinator.transaction_signing_hash(raw_tx))
+    serialized, _ = sign_transaction(coordinator, raw_tx, R, s)
+    assert not coordinator.signed_by(serialized, derivation.eth_address(public_key))
+
+def test_high_s_is_normalized(coordinator):
+    R = base_mult(secrets.randbelow(N - 1) + 1)
+    r, s, v = coordinator.ethereum_signature(R, N - 1, 1)
+    assert r == R[0] % N
+    assert s == 1
+    assert v == 37 + 1 - R[1] % 2
@@ -0,0 +1,74 @@
+"""Signing ceremony endpoints, driven through the Flask test client"""
+import secrets
+
+from secp256k1 import N, base_mult, point_to_json
+
+def commitment():
+    return {'Gamma_i': point_to_json(base_mult(secrets.randbelow(N - 1) + 1))}
+
+def start_signing(http, dkg):
+    response = http.post('/signing/start', json={'dkg_session_id': dkg['session_id'], 'presign': False})
+    assert response.status_code == 200, response.json
+    return response.json
+
+def test_outsider_cannot_join_the_quorum(coordinator, http, dkg):
+    session_id = start_signing(http, dkg)['session_id']
+    response = http.post('/signing/commit', json={
+        'session_id': session_id, 'device_id': 'mallory_9', 'commitment': commitment()
+    })
+    assert response.status_code == 403
+    assert 'mallory_9' not in coordinator.ceremonies.get(session_id, 'signing')['commitments']
+
+    for device_id in dkg['device_ids'][:3]:
+        response = http.post('/signing/commit', json={
+            'session_id': session_id, 'device_id': device_id, 'commitment': commitment()
+        })
+        assert response.status_code == 200
+    assert response.json['round'] == 'mta'
+    assert response.json['quorum'] == dkg['device_ids'][:3]
+
+def test_interactive_signing_over_http(coordinator, http, dkg, devices):
+    started = start_signing(http, dkg)
+    result = devices.sign(started['session_id'], started['selected'], [started['message_hash']])
+    assert result['status'] == 'completed'
+    assert coordinator.signed_by(result['serialized_transaction'], dkg['eth_address'])
+    nonce = int(result['signed_transaction']['nonce'], 16)
+    assert http.get('/nonces', query_string={'eth_address': dkg['eth_address']}).json['signed'] == nonce
+
+def test_rounds_refuse_devices_outside_the_quorum(http, dkg, devices):
+    started = start_signing(http, dkg)
+    session_id = started['session_id']
+    for device_id in dkg['device_ids'][:3]:
+        response = devices.commit(session_id, device_id)
+    outsider = dkg['device_ids'][3]
+    devices.post('/signing/mta', {'session_id': session_id, 'device_id': outsider, 'delta': hex(1)}, expect=403)
+    devices.post('/signing/share', {'session_id': session_id, 'device_id': outsider, 'share': hex(1)}, expect=403)
+    devices.post('/signing/mta', {'session_id': 'signing_unknown', 'device_id': outsider, 'delta': hex(1)},
+                 expect=404)
+    # A single session takes single values, not vectors
+    devices.post('/signing/commit', {'session_id': session_id, 'device_id': outsider,
+                                     'commitment': [commitment()]}, expect=400)
+    assert response['quorum'] == dkg['device_ids'][:3]
+
+def test_signing_needs_a_completed_dkg(http):
+    session_id = http.post('/dkg/start', json={'total_signers': 3}).json['session_id']
+    assert http.post('/signing/start', json={'dkg_session_id': session_id}).status_code == 409
+    assert http.post('/signing/start', json={'dkg_session_id': 'dkg_unknown'}).status_code == 400
+
+def test_result_of_an_open_or_unknown_session(http, dkg):
+    session_id = start_signing(http, dkg)['session_id']
+    result = http.get('/signing/result', query_string={'session_id': session_id, 'timeout': 0})
+    assert result.json == {'session_id': session_id, 'status': 'in_progress'}
+    # An unparsable timeout means the longest wait, not an error; the session is unknown either way
+    result = http.get('/signing/result', query_string={'session_id': 'signing_unknown', 'timeout': 'soon'})
+    assert result.status_code == 404
+
+def test_bad_share_fails_the_session_and_frees_its_nonce(http, dkg, devices):
+    started = start_signing(http, dkg)
+    nonce = int(started['transaction']['nonce'], 16)
+    result = devices.sign(started['session_id'], started['selected'], [started['message_hash']],
+                          corrupt=started['selected'][0])
+    assert result['status'] == 'failed'
+    state = http.get('/nonces', query_string={'eth_address': dkg['eth_address']}).json
+    assert nonce not in state['pending']
+    assert state['signed'] < nonce
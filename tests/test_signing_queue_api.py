@@ -0,0 +1,71 @@
+"""Queued signing requests, driven through the Flask test client"""
+import pytest
+
+TRANSACTION = {
+    'to': '0x742d35Cc6634C0532925a3b844Bc454e4438f44f',
+    'value': hex(10 ** 15),
+    'gasPrice': hex(20 * 10 ** 9),
+    'gas': 21000
+}
+
+def request_signature(http, dkg, expect=200, **fields):
+    response = http.post('/request_txn_signature', json={
+        'dkg_session_id': dkg['session_id'], 'transaction': TRANSACTION, **fields
+    })
+    assert response.status_code == expect, response.json
+    return response.json
+
+def sign_dispatched(http, dkg, devices, session_id):
+    """Run a dispatched batch session, learning what to sign from a signer's event feed"""
+    events = http.get(f"/events/{dkg['device_ids'][0]}/poll", query_string={'timeout': 0}).json['events']
+    event = next(event for event in events if event.get('session_id') == session_id)
+    return devices.sign(session_id, event['selected'], event['message_hashes'], batch=True)
+
+def request_result(http, request_id, timeout=5):
+    return http.get('/signing/request', query_string={'request_id': request_id, 'timeout': timeout}).json
+
+def test_urgent_request_gets_its_own_ceremony(coordinator, http, dkg, devices):
+    queued = request_signature(http, dkg, urgent=True)
+    assert queued['status'] == 'dispatched'
+    # An unparsable timeout does not wait rather than failing
+    assert request_result(http, queued['request_id'], 'soon')['status'] == 'dispatched'
+    sign_dispatched(http, dkg, devices, queued['session_id'])
+    result = request_result(http, queued['request_id'])
+    assert result['status'] == 'completed'
+    assert coordinator.signed_by(result['serialized_transaction'], dkg['eth_address'])
+
+def test_full_queue_is_signed_in_one_batch(coordinator, http, dkg, devices, monkeypatch):
+    queue = coordinator.signing_queue
+    monkeypatch.setattr(queue, 'batch_size', 2)
+    low = request_signature(http, dkg)
+    high = request_signature(http, dkg, priority=5)
+    assert request_result(http, low['request_id'])['status'] == 'queued'
+    queue._dispatch(dkg['session_id'], queue._take_ready(dkg['session_id']))
+
+    low, high = request_result(http, low['request_id'], 0), request_result(http, high['request_id'], 0)
+    assert low['status'] == high['status'] == 'dispatched'
+    assert low['session_id'] == high['session_id']
+    sign_dispatched(http, dkg, devices, low['session_id'])
+    low, high = request_result(http, low['request_id']), request_result(http, high['request_id'])
+    assert low['status'] == high['status'] == 'completed'
+    # The higher priority goes first and so gets the lower nonce
+    assert int(high['signed_transaction']['nonce'], 16) < int(low['signed_transaction']['nonce'], 16)
+    for result in (low, high):
+        assert coordinator.signed_by(result['serialized_transaction'], dkg['eth_address'])
+
+@pytest.mark.parametrize('fields', [
+    {'transaction': None},
+    {'transaction': {**TRANSACTION, 'from': '0x0000000000000000000000000000000000000001'}},
+    {'transaction': {**TRANSACTION, 'gas': 'lots'}},
+    {'dkg_session_id': 'dkg_unknown'},
+    {'priority': 'high'},
+])
+def test_bad_requests_are_refused(http, dkg, fields):
+    request_signature(http, dkg, expect=400, **fields)
+
+def test_clashing_nonce_is_refused(http, dkg):
+    request_signature(http, dkg, transaction={**TRANSACTION, 'nonce': 7})
+    request_signature(http, dkg, expect=400, transaction={**TRANSACTION, 'nonce': 7})
+
+def test_unknown_request(http):
+    assert http.get('/signing/request', query_string={'request_id': 'request_unknown'}).status_code == 404
@@ -0,0 +1,70 @@
+"""Round trips of the binary wire format and its error handling"""
+import json
+
+import pytest
+
+import wire
+from secp256k1 import G, N, base_mult, point_to_json
+
+POINT = point_to_json(base_mult(12345))
+
+@pytest.mark.parametrize('value', [
+    None, True, False, 0, 1, 2 ** 64 - 1, 2 ** 64, N - 1, 2 ** 300, -1, -(2 ** 300), 1.5, '', 'device_1',
+    POINT, hex(N - 1), '0x1', '0x' + 'ab' * 32, '0xabc', '0xABCD', '0x', 'café',
+    [], {}, [1, [2, [3]]], {'x': G[0], 'y': G[1]},
+])
+def test_round_trip(value):
+    assert wire.decode(wire.encode(value)) == value
+
+def test_protocol_message_round_trip():
+    message = {
+        'session_id': 'signing_0123456789abcdef',
+        'device_id': 'device_3',
+        'commitment': [{'Gamma_i': POINT}, {'Gamma_i': point_to_json(G)}],
+        'delta': [hex(7), hex(N - 7)],
+        'message_hashes': ['0x' + '00' * 31 + '01'],
+        'round_timeout': 2.5,
+        'urgent': False,
+        'auth': {'root': 'ab' * 32, 'signature': 'c2lnbmF0dXJl', 'proofs': [[['L', 'cd' * 32]]]}
+    }
+    encoded = wire.encode(message)
+    assert wire.decode(encoded) == message
+    assert len(encoded) < len(json.dumps(message))
+
+def test_compact_crypto_values():
+    # tag + 33 bytes for a point, tag + 32 bytes for a scalar
+    assert len(wire.encode(POINT)) == 34
+    assert len(wire.encode(hex(N - 1))) == 33
+    assert len(wire.encode(N - 1)) == 33
+
+def test_tuples_decode_as_lists():
+    assert wire.decode(wire.encode((1, 'a'))) == [1, 'a']
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'\xff',
+    b'\x07\x05ab',  # string shorter than its length
+    b'\x04' + bytes(31),  # truncated scalar
+    b'\x0a\x02' + (5).to_bytes(32, 'big'),  # compressed point off the curve
+    b'\x00\x00',  # trailing data
+])
+def test_malformed_input_raises_value_error(data):
+    with pytest.raises(ValueError):
+        wire.decode(data)
+
+def test_nesting_limit():
+    nested = []
+    for _ in range(wire.MAX_DEPTH - 1):
+        nested = [nested]
+    assert wire.decode(wire.encode(nested)) == nested
+    with pytest.raises(ValueError):
+        wire.decode(wire.encode([nested]))
+    # Far deeper than the interpreter's recursion limit
+    with pytest.raises(ValueError):
+        wire.decode(b'\x0b\x01' * 100000 + b'\x00')
+    with pytest.raises(ValueError):
+        wire.decode(b'\x0c\x01\x01k' * 100000 + b'\x00')
+
+def test_unencodable_value():
+    with pytest.raises(TypeError):
+        wire.encode(object())